@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import logging
+import time
+from collections import OrderedDict
+from urllib.parse import unquote_plus
+
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PublicKey
+
+logger = logging.getLogger(__name__)
+
+# Telegram Ed25519 public keys (hex) from official docs: production, then test environment.
+TELEGRAM_PUBLIC_KEYS_HEX = (
+    "e7bf03a2fa4602af4580703d88dda5bb59f32ed8b02a56c187fe7d34caed242d",
+    "40055058a4ee38156a06562e52eece92a771bcd8346a8c4615cb7376eddf72ec",
+)
+
+
+class InitDataError(Exception):
+    def __init__(self, detail: str) -> None:
+        super().__init__(detail)
+        self.detail = detail
+
+
+def build_check_string(items: dict[str, str]) -> str:
+    return "\n".join(f"{key}={value}" for key, value in sorted(items.items()))
+
+
+def build_data_check_string(bot_id: str, items: dict[str, str]) -> str:
+    """Build data-check-string per Telegram Mini Apps docs."""
+    return f"{bot_id}:WebAppData\n{build_check_string(items)}"
+
+
+def parse_init_data(raw: str) -> dict[str, str]:
+    # Telegram JS parsing (telegram-web-app.js) does:
+    # - replace '+' with '%20' then decodeURIComponent.
+    # So "plus-decoded" is the closest equivalent.
+    items: dict[str, str] = {}
+    if not raw:
+        return items
+    for part in raw.split("&"):
+        if not part:
+            continue
+        if "=" in part:
+            key, value = part.split("=", 1)
+        else:
+            key, value = part, ""
+        items[unquote_plus(key)] = unquote_plus(value)
+    return items
+
+
+class InitDataVerifier:
+    """Verifies Mini App initData with keys derived once per bot token.
+
+    Successfully verified initData strings are remembered in a bounded LRU for
+    ``cache_ttl_seconds`` (never past the ``auth_date`` expiry), so repeat requests
+    from the same session skip parsing and all crypto.
+    """
+
+    def __init__(
+        self,
+        bot_token: str,
+        max_age_seconds: int = 0,
+        cache_size: int = 10_000,
+        cache_ttl_seconds: float = 300.0,
+    ) -> None:
+        bot_token_bytes = bot_token.encode()
+        self._bot_id = bot_token.split(":", 1)[0]
+        # Docs show: secret_key = HMAC_SHA256(<bot_token>, "WebAppData")
+        # Text also implies: secret_key is HMAC_SHA256(bot_token, key="WebAppData") (constant as key)
+        self._secret_keys = (
+            hmac.new(bot_token_bytes, msg=b"WebAppData", digestmod=hashlib.sha256).digest(),
+            hmac.new(b"WebAppData", msg=bot_token_bytes, digestmod=hashlib.sha256).digest(),
+        )
+        self._public_keys = [Ed25519PublicKey.from_public_bytes(bytes.fromhex(pk)) for pk in TELEGRAM_PUBLIC_KEYS_HEX]
+        self._max_age = max_age_seconds
+        self._cache_size = cache_size
+        self._cache_ttl = cache_ttl_seconds
+        self._cache: OrderedDict[bytes, tuple[float, dict[str, str]]] = OrderedDict()
+
+    def verify(self, init_data: str) -> dict[str, str]:
+        now = time.time()
+        key = hashlib.blake2b(init_data.encode(), digest_size=16).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            expires_at, parsed = cached
+            if now < expires_at:
+                self._cache.move_to_end(key)
+                return parsed
+            del self._cache[key]
+
+        parsed = self._verify(init_data, now)
+        self._remember(key, parsed, now)
+        return parsed
+
+    def _verify(self, init_data: str, now: float) -> dict[str, str]:
+        parsed = parse_init_data(init_data)
+        if "hash" not in parsed:
+            raise InitDataError("Missing hash in initData")
+        received_hash = (parsed.get("hash") or "").strip().lower()
+
+        auth_date = parsed.get("auth_date")
+        query_id = parsed.get("query_id")
+        chat_instance = parsed.get("chat_instance")
+        signature_val = parsed.get("signature") or ""
+
+        keys_present = sorted(parsed.keys())
+        logger.info(
+            "initData received keys=%s hash_len=%s signature_len=%s auth_date=%s query_id_prefix=%s chat_instance_prefix=%s",
+            ",".join(keys_present),
+            len(received_hash),
+            len(signature_val),
+            auth_date,
+            (query_id or "")[:8] if query_id else None,
+            (chat_instance or "")[:8] if chat_instance else None,
+        )
+        if self._max_age > 0 and now - self._auth_date(parsed) > self._max_age:
+            raise InitDataError("initData expired")
+
+        # ---- 1) Validate 'hash' (Mini App backend validation) ----
+        # data_check_string: all received fields except 'hash', sorted, joined by '\n'
+        data_fields = {k: v for k, v in parsed.items() if k != "hash"}
+        data_check_string = build_check_string(data_fields).encode()
+        for secret_key in self._secret_keys:
+            computed_hash = hmac.new(secret_key, msg=data_check_string, digestmod=hashlib.sha256).hexdigest()
+            if hmac.compare_digest(computed_hash, received_hash):
+                logger.info("initData verified method=hash")
+                return parsed
+
+        # ---- 2) Validate 'signature' (Third-party / Ed25519) ----
+        # Build data_check_string_sig = "{bot_id}:WebAppData\n" + sorted fields excluding hash & signature.
+        if signature_val:
+            sig_fields = {k: v for k, v in parsed.items() if k not in {"hash", "signature"}}
+            data_check_string_sig = build_data_check_string(self._bot_id, sig_fields).encode()
+            pad = "=" * ((4 - (len(signature_val) % 4)) % 4)
+            try:
+                signature_bytes = base64.urlsafe_b64decode(signature_val + pad)
+            except Exception:
+                signature_bytes = b""
+            for public_key in self._public_keys:
+                try:
+                    public_key.verify(signature_bytes, data_check_string_sig)
+                except Exception:
+                    continue
+                logger.info("initData verified method=ed25519_signature")
+                return parsed
+
+        logger.warning(
+            "initData signature mismatch keys=%s hash_len=%s signature_len=%s auth_date=%s candidates=%s",
+            ",".join(keys_present),
+            len(received_hash),
+            len(signature_val),
+            auth_date,
+            "hash(secret_key_a|secret_key_b),ed25519_signature",
+        )
+        raise InitDataError("Invalid initData signature")
+
+    def _remember(self, key: bytes, parsed: dict[str, str], now: float) -> None:
+        if self._cache_size <= 0 or self._cache_ttl <= 0:
+            return
+        expires_at = now + self._cache_ttl
+        if self._max_age > 0:
+            expires_at = min(expires_at, self._auth_date(parsed) + self._max_age)
+        self._cache[key] = (expires_at, parsed)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
+    @staticmethod
+    def _auth_date(parsed: dict[str, str]) -> float:
+        try:
+            return float(parsed.get("auth_date") or 0)
+        except ValueError:
+            return 0.0
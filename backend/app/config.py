@@ -3,7 +3,7 @@ from __future__ import annotations
 import re
 from typing import List
 
-from pydantic import Field
+from pydantic import Field, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -55,10 +55,70 @@ class Settings(BaseSettings):
     telegram_login_mode: str = Field("bot", alias="TELEGRAM_LOGIN_MODE")  # bot | user
     telegram_session_string: str | None = Field(default=None, alias="TELEGRAM_SESSION_STRING")
     telegram_channel_ids_raw: str = Field(DEFAULT_TELEGRAM_CHANNEL_IDS, alias="TELEGRAM_CHANNEL_IDS")
-    telegram_polling_enabled: bool = Field(False, alias="TELEGRAM_POLLING_ENABLED")
+    telegram_polling_enabled: bool = Field(False, alias="TELEGRAM_POLLING_ENABLED")  # read by app.worker
+    telegram_ingest_mode: str = Field("poll", alias="TELEGRAM_INGEST_MODE")  # poll | push
+    telegram_push_flush_interval: float = Field(0.5, alias="TELEGRAM_PUSH_FLUSH_INTERVAL")  # seconds
+    # Push mode re-reads history this often to pick up posts missed while Telethon reconnected.
+    telegram_push_safety_poll: float = Field(300.0, alias="TELEGRAM_PUSH_SAFETY_POLL")  # seconds, 0 disables
+    telegram_fetch_concurrency: int = Field(4, alias="TELEGRAM_FETCH_CONCURRENCY")
+    telegram_requests_per_second: float = Field(5.0, alias="TELEGRAM_REQUESTS_PER_SECOND")  # 0 disables
+    telegram_poll_min_interval: float = Field(5.0, alias="TELEGRAM_POLL_MIN_INTERVAL")  # seconds, per channel
+    telegram_poll_max_interval: float = Field(300.0, alias="TELEGRAM_POLL_MAX_INTERVAL")
+    telegram_poll_max_page: int = Field(100, alias="TELEGRAM_POLL_MAX_PAGE")
+    telegram_poll_cost: float = Field(10.0, alias="TELEGRAM_POLL_COST")  # lower polls busy channels more often
+    telegram_backfill_depth: int = Field(0, alias="TELEGRAM_BACKFILL_DEPTH")  # messages per channel, 0 disables
+    telegram_backfill_page_size: int = Field(100, alias="TELEGRAM_BACKFILL_PAGE_SIZE")
+    media_download_workers: int = Field(4, alias="MEDIA_DOWNLOAD_WORKERS")
+    media_download_queue_size: int = Field(256, alias="MEDIA_DOWNLOAD_QUEUE_SIZE")
+    media_retry_interval: float = Field(300.0, alias="MEDIA_RETRY_INTERVAL")  # seconds between pending-media sweeps
+    telegram_health_check_interval: float = Field(60.0, alias="TELEGRAM_HEALTH_CHECK_INTERVAL")
+    extraction_workers: int = Field(2, alias="EXTRACTION_WORKERS")  # processes, 0 runs inline
+    extraction_chunk_size: int = Field(64, alias="EXTRACTION_CHUNK_SIZE")
+    media_variant_widths_raw: str = Field("320,720", alias="MEDIA_VARIANT_WIDTHS")  # px, empty disables
+    media_variant_quality: int = Field(80, alias="MEDIA_VARIANT_QUALITY")  # WebP, 0-100
+    media_variant_workers: int = Field(1, alias="MEDIA_VARIANT_WORKERS")  # processes, 0 runs inline
+    media_cache_max_age: int = Field(31_536_000, alias="MEDIA_CACHE_MAX_AGE")  # seconds; files never change
+    media_accel_redirect: str | None = Field(default=None, alias="MEDIA_ACCEL_REDIRECT")  # nginx internal location
+
+    telegram_auth_max_age: int = Field(0, alias="TELEGRAM_AUTH_MAX_AGE")  # seconds since auth_date, 0 disables
+    telegram_auth_cache_size: int = Field(10_000, alias="TELEGRAM_AUTH_CACHE_SIZE")
+    telegram_auth_cache_ttl: float = Field(300.0, alias="TELEGRAM_AUTH_CACHE_TTL")
+
+    users_profile_cache_ttl: float = Field(30.0, alias="USERS_PROFILE_CACHE_TTL")  # skips rewriting unchanged logins
 
     redis_url: str = Field(..., alias="REDIS_URL")
     postgres_dsn: str | None = Field(default=None, alias="POSTGRES_DSN")
+    postgres_replica_dsn: str | None = Field(default=None, alias="POSTGRES_REPLICA_DSN")  # listings and profile reads
+    postgres_replica_max_lag: float = Field(5.0, alias="POSTGRES_REPLICA_MAX_LAG")  # s of primary reads after writes
+    db_pool_size: int = Field(5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30.0, alias="DB_POOL_TIMEOUT")
+    db_pool_recycle: int = Field(1800, alias="DB_POOL_RECYCLE")  # seconds, -1 disables
+    db_pool_pre_ping: bool = Field(True, alias="DB_POOL_PRE_PING")
+    db_statement_cache_size: int = Field(100, alias="DB_STATEMENT_CACHE_SIZE")  # 0 behind pgbouncer transaction mode
+
+    events_cache_enabled: bool = Field(True, alias="EVENTS_CACHE_ENABLED")
+    events_cache_ttl: int = Field(60, alias="EVENTS_CACHE_TTL")
+    events_cache_local_size: int = Field(256, alias="EVENTS_CACHE_LOCAL_SIZE")
+    events_cache_version_ttl: float = Field(1.0, alias="EVENTS_CACHE_VERSION_TTL")
+    events_cache_retry_after: float = Field(5.0, alias="EVENTS_CACHE_RETRY_AFTER")  # seconds bypassed after an error
+    events_cache_media_delay: float = Field(1.0, alias="EVENTS_CACHE_MEDIA_DELAY")  # batches media invalidations
+
+    dedup_enabled: bool = Field(True, alias="DEDUP_ENABLED")
+    dedup_threshold: float = Field(0.5, alias="DEDUP_THRESHOLD")  # estimated Jaccard similarity
+    dedup_window_days: float = Field(14.0, alias="DEDUP_WINDOW_DAYS")
+    dedup_min_tokens: int = Field(10, alias="DEDUP_MIN_TOKENS")
+
+    search_max_candidates: int = Field(1_000, alias="SEARCH_MAX_CANDIDATES")  # newest matches ranked per query
+
+    events_stream_heartbeat: float = Field(15.0, alias="EVENTS_STREAM_HEARTBEAT")
+    events_stream_queue_size: int = Field(100, alias="EVENTS_STREAM_QUEUE_SIZE")  # frames per client
+    events_stream_resume_limit: int = Field(200, alias="EVENTS_STREAM_RESUME_LIMIT")
+
+    ingest_worker_id: str | None = Field(default=None, alias="INGEST_WORKER_ID")  # defaults to host:pid
+    ingest_lease_ttl: float = Field(30.0, alias="INGEST_LEASE_TTL")
+    ingest_heartbeat_interval: float = Field(10.0, alias="INGEST_HEARTBEAT_INTERVAL")
+    ingest_metrics_port: int = Field(0, alias="INGEST_METRICS_PORT")  # 0 disables
 
     bot_polling_interval: int = Field(2, alias="BOT_POLLING_INTERVAL")
     app_host: str = Field("0.0.0.0", alias="APP_HOST")
@@ -77,3 +137,15 @@ class Settings(BaseSettings):
                 out.append(p)
         return out
 
+    @field_validator("media_variant_widths_raw")
+    @classmethod
+    def _check_media_variant_widths(cls, value: str) -> str:
+        for part in re.split(r"[\s,]+", value):
+            if part and not (part.isdecimal() and int(part) > 0):
+                raise ValueError(f"MEDIA_VARIANT_WIDTHS must be positive integers, got {part!r}")
+        return value
+
+    @property
+    def media_variant_widths(self) -> list[int]:
+        return sorted({int(p) for p in re.split(r"[\s,]+", self.media_variant_widths_raw) if p.strip()})
+
@@ -3,17 +3,58 @@ from __future__ import annotations
 from contextlib import asynccontextmanager
 from typing import AsyncIterator
 
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
+from app.metrics import InstrumentedQueuePool
 
-def create_engine(dsn: str) -> AsyncEngine:
-    return create_async_engine(dsn, future=True)
+
+def create_engine(
+    dsn: str,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: float = 30.0,
+    pool_recycle: int = -1,
+    pool_pre_ping: bool = False,
+    statement_cache_size: int = 100,
+) -> AsyncEngine:
+    connect_args: dict[str, int] = {}
+    if make_url(dsn).get_driver_name() == "asyncpg":
+        # asyncpg keeps its own per-connection statement cache and SQLAlchemy's adapter
+        # another on top; both must be off behind a transaction-pooling pgbouncer.
+        connect_args = {
+            "statement_cache_size": statement_cache_size,
+            "prepared_statement_cache_size": statement_cache_size,
+        }
+    return create_async_engine(
+        dsn,
+        future=True,
+        poolclass=InstrumentedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,
+        pool_pre_ping=pool_pre_ping,
+        connect_args=connect_args,
+    )
 
 
 def create_session_maker(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
     return async_sessionmaker(engine, expire_on_commit=False)
 
 
+def pool_stats(engine: AsyncEngine) -> dict[str, object]:
+    pool = engine.pool
+    return {
+        "size": pool.size(),  # type: ignore[attr-defined]
+        "checked_out": pool.checkedout(),  # type: ignore[attr-defined]
+        "checked_in": pool.checkedin(),  # type: ignore[attr-defined]
+        "overflow": pool.overflow(),  # type: ignore[attr-defined]
+        "timeout": pool.timeout(),  # type: ignore[attr-defined]
+        "status": pool.status(),
+    }
+
+
 @asynccontextmanager
 async def session_scope(session_factory: async_sessionmaker[AsyncSession]) -> AsyncIterator[AsyncSession]:
     session = session_factory()
@@ -25,4 +66,3 @@ async def session_scope(session_factory: async_sessionmaker[AsyncSession]) -> As
         raise
     finally:
         await session.close()
-
@@ -0,0 +1,280 @@
+from __future__ import annotations
+
+import hashlib
+import logging
+import struct
+import time
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Iterable, Sequence
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.search import tokenize
+
+logger = logging.getLogger(__name__)
+
+# One-permutation MinHash: every shingle is hashed once into one of SIGNATURE_BINS bins
+# and each bin keeps its minimum, so a signature costs one cached hash per shingle.
+SIGNATURE_BINS = 32
+BAND_ROWS = 2
+BANDS = SIGNATURE_BINS // BAND_ROWS
+_BIN_SHIFT = 64 - (SIGNATURE_BINS - 1).bit_length()
+_LOW_MASK = 0xFFFFFFFF
+_GOLDEN = 0x9E3779B1
+
+
+@lru_cache(maxsize=262_144)
+def _shingle_hash(shingle: str) -> int:
+    # Signatures are persisted, so this must be stable across processes (unlike hash()).
+    return int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "little")
+
+
+def shingles(text: str | None) -> set[str]:
+    tokens = tokenize(text)
+    return {*tokens, *(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))}
+
+
+def signature(text: str | None, min_tokens: int = 10) -> bytes | None:
+    """MinHash signature of the text's word uni- and bigrams, or None if it is too short."""
+    features = shingles(text)
+    if not features or len(features) < min_tokens:
+        return None
+    mins = [-1] * SIGNATURE_BINS
+    for feature in features:
+        value = _shingle_hash(feature)
+        slot = value >> _BIN_SHIFT
+        low = value & _LOW_MASK
+        if mins[slot] < 0 or low < mins[slot]:
+            mins[slot] = low
+    # Densify: an empty bin borrows the next filled bin's minimum, offset by the distance.
+    dense = list(mins)
+    for index, value in enumerate(mins):
+        if value >= 0:
+            continue
+        distance = 1
+        while mins[(index + distance) % SIGNATURE_BINS] < 0:
+            distance += 1
+        dense[index] = (mins[(index + distance) % SIGNATURE_BINS] + distance * _GOLDEN) & _LOW_MASK
+    return array("I", dense).tobytes()
+
+
+def similarity(left: bytes, right: bytes) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(a == b for a, b in zip(array("I", left), array("I", right))) / SIGNATURE_BINS
+
+
+def _band_keys(sig: bytes) -> list[bytes]:
+    step = 4 * BAND_ROWS
+    return [sig[offset : offset + step] for offset in range(0, len(sig), step)]
+
+
+@dataclass(slots=True, eq=False)
+class _Entry:
+    event_id: str
+    channel: str
+    seen_at: datetime
+    signature: bytes
+
+
+class NearDuplicateIndex:
+    """MinHash LSH index of recent canonical events.
+
+    Signatures are cut into BANDS bands of BAND_ROWS bins; two posts with Jaccard
+    similarity 0.5 share at least one band with probability ~0.99, and candidates
+    are then checked against ``threshold``. A lookup is BANDS dict probes plus a few
+    candidate comparisons whatever the index size. Only events seen within ``window``
+    are kept, which also bounds memory to roughly 2 KB per indexed event.
+    """
+
+    def __init__(self, threshold: float = 0.5, window: timedelta = timedelta(days=14)) -> None:
+        self._threshold = threshold
+        self._window = window
+        # Most buckets hold a single entry, stored bare to save a list per band.
+        self._bands: list[dict[bytes, _Entry | list[_Entry]]] = [{} for _ in range(BANDS)]
+        self._order: deque[_Entry] = deque()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def empty_copy(self) -> NearDuplicateIndex:
+        return NearDuplicateIndex(self._threshold, self._window)
+
+    async def match_many(self, items: Sequence[tuple[bytes, str, datetime]]) -> list[str | None]:
+        """``match`` for each (signature, channel, seen_at); shares its API with RedisNearDuplicateIndex."""
+        return [self.match(sig, channel, seen_at) for sig, channel, seen_at in items]
+
+    async def add_many(self, items: Iterable[tuple[str, str, bytes, datetime]]) -> int:
+        """``add`` each (event_id, channel, signature, seen_at); returns how many were added."""
+        count = 0
+        for event_id, channel, sig, seen_at in items:
+            self.add(event_id, channel, sig, seen_at)
+            count += 1
+        return count
+
+    def match(self, sig: bytes, channel: str, seen_at: datetime) -> str | None:
+        """Return the id of the most similar event from another channel, if any."""
+        best: tuple[float, str] | None = None
+        checked: set[_Entry] = set()
+        for band, key in zip(self._bands, _band_keys(sig)):
+            bucket = band.get(key)
+            if bucket is None:
+                continue
+            for entry in bucket if isinstance(bucket, list) else (bucket,):
+                if entry in checked:
+                    continue
+                checked.add(entry)
+                if entry.channel == channel or abs(entry.seen_at - seen_at) > self._window:
+                    continue
+                score = similarity(sig, entry.signature)
+                if score >= self._threshold and (best is None or score > best[0]):
+                    best = (score, entry.event_id)
+        return best[1] if best else None
+
+    def add(self, event_id: str, channel: str, sig: bytes, seen_at: datetime) -> None:
+        entry = _Entry(event_id, channel, seen_at, sig)
+        for band, key in zip(self._bands, _band_keys(sig)):
+            bucket = band.get(key)
+            if bucket is None:
+                band[key] = entry
+            elif isinstance(bucket, list):
+                bucket.append(entry)
+            else:
+                band[key] = [bucket, entry]
+        self._order.append(entry)
+        self.expire(seen_at - self._window)
+
+    def expire(self, before: datetime) -> None:
+        # Entries arrive roughly in time order, so the oldest sit at the left.
+        while self._order and self._order[0].seen_at < before:
+            entry = self._order.popleft()
+            for band, key in zip(self._bands, _band_keys(entry.signature)):
+                bucket = band.get(key)
+                if bucket is entry:
+                    del band[key]
+                elif isinstance(bucket, list) and entry in bucket:
+                    bucket.remove(entry)
+                    if len(bucket) == 1:
+                        band[key] = bucket[0]
+
+
+_SEEN_AT = struct.Struct("<d")
+
+
+def _timestamp(seen_at: datetime) -> float:
+    # Timestamps in the app are naive UTC.
+    return seen_at.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RedisNearDuplicateIndex:
+    """The NearDuplicateIndex kept in Redis, shared by every ingestion worker.
+
+    Channels are sharded between workers, so an index per process would only ever
+    see its own shard's posts. Each band bucket is a sorted set of event ids scored
+    by when the event was seen, and each event's channel, time and signature sit
+    under one key; both expire with ``window``. A batch costs two pipelined round
+    trips to match and one to add. Two workers indexing reposts of each other in
+    the same instant can still both miss; that is rare enough to leave.
+
+    Redis errors never fail ingestion: lookups then find nothing and adds are
+    dropped, so posts are stored without being folded.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        threshold: float = 0.5,
+        window: timedelta = timedelta(days=14),
+        prefix: str = "dedup",
+    ) -> None:
+        self._redis = redis
+        self._threshold = threshold
+        self._window = window
+        self._prefix = prefix
+
+    def empty_copy(self) -> NearDuplicateIndex:
+        return NearDuplicateIndex(self._threshold, self._window)
+
+    async def claim_warm(self) -> bool:
+        """True for the one process that should load the index from Postgres, False for the rest."""
+        try:
+            ttl = int(self._window.total_seconds())
+            return bool(await self._redis.set(f"{self._prefix}:warmed", "1", nx=True, ex=ttl))
+        except RedisError:
+            logger.warning("Near-duplicate index unavailable, not warming it", exc_info=True)
+            return False
+
+    async def match_many(self, items: Sequence[tuple[bytes, str, datetime]]) -> list[str | None]:
+        if not items:
+            return []
+        window = self._window.total_seconds()
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for sig, _, seen_at in items:
+                    at = _timestamp(seen_at)
+                    for band, key in enumerate(_band_keys(sig)):
+                        pipe.zrangebyscore(self._band_key(band, key), at - window, at + window)
+                buckets = await pipe.execute()
+            candidates: list[set[bytes]] = [
+                set().union(*buckets[offset : offset + BANDS]) for offset in range(0, len(buckets), BANDS)
+            ]
+            ids = sorted(set().union(*candidates))
+            entries: dict[bytes, bytes | None] = {}
+            if ids:
+                entries = dict(zip(ids, await self._redis.mget([self._entry_key(event_id) for event_id in ids])))
+        except RedisError:
+            logger.warning("Near-duplicate index unavailable, matching %s posts skipped", len(items), exc_info=True)
+            return [None] * len(items)
+        results: list[str | None] = []
+        for (sig, channel, _), found in zip(items, candidates):
+            best: tuple[float, str] | None = None
+            for event_id in found:
+                raw = entries.get(event_id)
+                if raw is None:
+                    continue
+                entry_sig = raw[: 4 * SIGNATURE_BINS]
+                entry_channel = raw[4 * SIGNATURE_BINS + _SEEN_AT.size :].decode()
+                if entry_channel == channel:
+                    continue
+                score = similarity(sig, entry_sig)
+                if score >= self._threshold and (best is None or score > best[0]):
+                    best = (score, event_id.decode())
+            results.append(best[1] if best else None)
+        return results
+
+    async def add_many(self, items: Iterable[tuple[str, str, bytes, datetime]], chunk_size: int = 500) -> int:
+        window = self._window.total_seconds()
+        now = time.time()
+        count = 0
+        pending = list(items)
+        try:
+            for start in range(0, len(pending), chunk_size):
+                async with self._redis.pipeline(transaction=False) as pipe:
+                    for event_id, channel, sig, seen_at in pending[start : start + chunk_size]:
+                        at = _timestamp(seen_at)
+                        ttl = int(window - (now - at))
+                        if ttl <= 0:
+                            continue
+                        pipe.set(self._entry_key(event_id), sig + _SEEN_AT.pack(at) + channel.encode(), ex=ttl)
+                        for band, key in enumerate(_band_keys(sig)):
+                            band_key = self._band_key(band, key)
+                            pipe.zadd(band_key, {event_id: at})
+                            pipe.zremrangebyscore(band_key, "-inf", now - window)
+                            pipe.expire(band_key, int(window))
+                        count += 1
+                    await pipe.execute()
+        except RedisError:
+            logger.warning("Near-duplicate index unavailable, %s posts not indexed", len(pending), exc_info=True)
+        return count
+
+    def _band_key(self, band: int, key: bytes) -> str:
+        return f"{self._prefix}:band:{band}:{key.hex()}"
+
+    def _entry_key(self, event_id: str | bytes) -> str:
+        if isinstance(event_id, bytes):
+            event_id = event_id.decode()
+        return f"{self._prefix}:event:{event_id}"
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from telethon import TelegramClient
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramClientManager:
+    """Owns one long-lived, authorized TelegramClient and keeps it healthy."""
+
+    def __init__(
+        self,
+        connect: Callable[[], Awaitable[TelegramClient]],
+        health_check_interval_seconds: float = 60.0,
+    ) -> None:
+        self._connect = connect
+        self._health_check_interval = health_check_interval_seconds
+        self._client: TelegramClient | None = None
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> TelegramClient:
+        async with self._lock:
+            if self._client is not None and not self._client.is_connected():
+                logger.warning("Telegram client disconnected, reconnecting")
+                try:
+                    await self._client.connect()
+                except Exception:  # noqa: BLE001
+                    logger.exception("Telegram reconnect failed, starting a new client")
+                    await self._drop()
+            if self._client is not None and time.monotonic() - self._checked_at >= self._health_check_interval:
+                try:
+                    await self._client.get_me()
+                    self._checked_at = time.monotonic()
+                except Exception:  # noqa: BLE001
+                    logger.exception("Telegram client health check failed, starting a new client")
+                    await self._drop()
+            if self._client is None:
+                self._client = await self._connect()
+                self._checked_at = time.monotonic()
+            return self._client
+
+    async def invalidate(self) -> None:
+        async with self._lock:
+            await self._drop()
+
+    async def close(self) -> None:
+        await self.invalidate()
+
+    async def _drop(self) -> None:
+        client, self._client = self._client, None
+        if client is None:
+            return
+        try:
+            await client.disconnect()
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to disconnect Telegram client")
@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import re
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Sequence
+
+from pydantic import HttpUrl, TypeAdapter, ValidationError
+
+from app.schemas import EventIngestRequest
+
+logger = logging.getLogger(__name__)
+
+TITLE_MAX_LEN = 120
+# EventCard.source_link is an HttpUrl; anything it would reject must not reach the store.
+_HTTP_URL = TypeAdapter(HttpUrl)
+
+_MONTHS = {
+    "январ": 1,
+    "феврал": 2,
+    "март": 3,
+    "апрел": 4,
+    "ма": 5,
+    "июн": 6,
+    "июл": 7,
+    "август": 8,
+    "сентябр": 9,
+    "октябр": 10,
+    "ноябр": 11,
+    "декабр": 12,
+}
+
+_URL_RE = re.compile(r"https?://[^\s<>\"')\]]+", re.IGNORECASE)
+_DATE_WORDS_RE = re.compile(
+    r"\b(?P<day>[0-3]?\d)\s+(?P<month>январ[яь]|феврал[яь]|марта?|апрел[яь]|ма[яй]|июн[яь]|июл[яь]|августа?|"
+    r"сентябр[яь]|октябр[яь]|ноябр[яь]|декабр[яь])(?:\s+(?P<year>20\d\d))?",
+    re.IGNORECASE,
+)
+_DATE_NUMERIC_RE = re.compile(r"\b(?P<day>[0-3]?\d)\.(?P<month>[01]?\d)(?:\.(?P<year>(?:20)?\d\d))?\b")
+_TIME_RE = re.compile(r"(?<![\d:.])(?P<hour>[01]?\d|2[0-3]):(?P<minute>[0-5]\d)(?![\d:])")
+_VENUE_LABEL = r"(?:место|где|адрес|площадка|локация)\s*[:\-—]?"
+_VENUE_LINE_RE = re.compile(
+    rf"^\s*(?:[📍🏠🏛]\s*(?:{_VENUE_LABEL})?|{_VENUE_LABEL})\s*(?P<venue>.+)$", re.IGNORECASE | re.MULTILINE
+)
+_VENUE_INLINE_RE = re.compile(
+    r"\b(?:в|во|на)\s+(?P<venue>(?:клуб[еа]?|бар[еа]?|кинотеатр[еа]?|зал[еа]?|пространств[еоа]|галере[еия]|музе[еяй]|театр[еа]?|"
+    r"лофт[еа]?|парк[еа]?|филармони[ия])\s+[«\"]?[^»\"\n,.!]{2,60}[»\"]?)",
+    re.IGNORECASE,
+)
+_PRICE_LABEL = r"(?:вход|билеты?|цена|стоимость)\s*[:\-—]?"
+_PRICE_LINE_RE = re.compile(
+    rf"^\s*(?:[💰💸🎟🎫]\s*(?:{_PRICE_LABEL})?|{_PRICE_LABEL})\s*(?P<price>[^\n]*\d[^\n]*)$",
+    re.IGNORECASE | re.MULTILINE,
+)
+_PRICE_INLINE_RE = re.compile(
+    r"(?:от\s+)?\d[\d\s]{0,7}(?:\s*[-–—]\s*\d[\d\s]{0,7})?\s*(?:₽|руб(?:\.|лей|ля)?|р\.)", re.IGNORECASE
+)
+_FREE_RE = re.compile(r"\b(?:бесплатно|вход\s+свободный|свободный\s+вход|free\s+entry|free)\b", re.IGNORECASE)
+# Matched against lowercased text: unicode IGNORECASE is several times slower.
+_CATEGORIES: tuple[tuple[str, re.Pattern[str]], ...] = tuple(
+    (name, re.compile(pattern))
+    for name, pattern in (
+        ("festival", r"фестивал|\bfest\b|\bфест\b"),
+        ("concert", r"концерт|\bgig\b|\blive\b|гастрол|тур\b|сольник"),
+        ("party", r"вечеринк|\bрейв|техно|\bdj\b|диджей|\bparty\b"),
+        ("standup", r"стендап|stand-?up|комеди"),
+        ("cinema", r"кинопоказ|кинотеатр|показ фильм|\bкино\b|премьер[аы] фильм"),
+        ("theatre", r"спектакл|театр|постановк|мюзикл"),
+        ("exhibition", r"выставк|экспозици"),
+        ("lecture", r"лекци|мастер-класс|воркшоп|workshop|дискусси"),
+    )
+)
+
+
+@dataclass
+class ExtractedFields:
+    title: str
+    event_time: datetime | None = None
+    location: str | None = None
+    price: str | None = None
+    category: str | None = None
+    source_link: str | None = None
+
+
+def _clean(value: str, max_len: int) -> str | None:
+    value = value.strip(" \t*_-—:;,.").strip()
+    return value[:max_len] if value else None
+
+
+def extract_title(text: str) -> str:
+    for line in text.splitlines():
+        line = _URL_RE.sub("", line).strip(" \t*_#")
+        if line:
+            return line[:TITLE_MAX_LEN]
+    return text[:TITLE_MAX_LEN] if text else "Untitled"
+
+
+def extract_event_time(text: str, published_at: datetime | None) -> datetime | None:
+    reference = published_at or datetime.utcnow()
+    year: int | None = None
+    match = _DATE_WORDS_RE.search(text)
+    if match:
+        word = match.group("month").lower()
+        month = next(number for stem, number in _MONTHS.items() if word.startswith(stem))
+        day = int(match.group("day"))
+        year = int(match.group("year")) if match.group("year") else None
+    else:
+        match = _DATE_NUMERIC_RE.search(text)
+        if not match:
+            return None
+        day, month = int(match.group("day")), int(match.group("month"))
+        if match.group("year"):
+            year = int(match.group("year"))
+            year = year + 2000 if year < 100 else year
+    time_match = _TIME_RE.search(text)
+    hour, minute = (int(time_match.group("hour")), int(time_match.group("minute"))) if time_match else (0, 0)
+    try:
+        candidate = datetime(year or reference.year, month, day, hour, minute)
+    except ValueError:
+        return None
+    # Posts announce upcoming events; a yearless date well in the past means next year.
+    if year is None and candidate < reference - timedelta(days=31):
+        try:
+            candidate = candidate.replace(year=candidate.year + 1)
+        except ValueError:
+            return None
+    return candidate
+
+
+def extract_location(text: str) -> str | None:
+    match = _VENUE_LINE_RE.search(text) or _VENUE_INLINE_RE.search(text)
+    return _clean(match.group("venue"), 255) if match else None
+
+
+def extract_price(text: str) -> str | None:
+    match = _PRICE_LINE_RE.search(text)
+    if match:
+        return _clean(_URL_RE.sub("", match.group("price")), 128)
+    match = _PRICE_INLINE_RE.search(text)
+    if match:
+        return _clean(" ".join(match.group(0).split()), 128)
+    if _FREE_RE.search(text):
+        return "Бесплатно"
+    return None
+
+
+def extract_category(text: str) -> str | None:
+    text = text.lower()
+    for name, pattern in _CATEGORIES:
+        if pattern.search(text):
+            return name
+    return None
+
+
+def extract_source_link(text: str) -> str | None:
+    for match in _URL_RE.finditer(text):
+        url = match.group(0).rstrip(".,;:!?»")
+        if len(url) > 512:
+            continue
+        try:
+            host = _HTTP_URL.validate_python(url).host or ""
+        except ValidationError:
+            # e.g. "https://[::1" or a port past 65535
+            continue
+        if "." in host:
+            return url
+    return None
+
+
+def extract_fields(text: str, published_at: datetime | None = None) -> ExtractedFields:
+    return ExtractedFields(
+        title=extract_title(text),
+        event_time=extract_event_time(text, published_at),
+        location=extract_location(text),
+        price=extract_price(text),
+        category=extract_category(text),
+        source_link=extract_source_link(text),
+    )
+
+
+def extract_batch(items: Sequence[tuple[str, datetime | None]]) -> list[ExtractedFields]:
+    return [extract_fields(text, published_at) for text, published_at in items]
+
+
+class ExtractionStage:
+    """Fills structured event fields for a batch of ingest requests.
+
+    Batches run on a process pool so regex work never blocks the event loop;
+    with ``workers=0`` they run inline, which is handy for tests and benchmarks.
+    If a pool worker dies, that batch is extracted inline and the next one gets
+    a fresh pool.
+    """
+
+    def __init__(self, workers: int = 2, chunk_size: int = 64) -> None:
+        self._workers = workers
+        self._chunk_size = max(1, chunk_size)
+        self._pool: ProcessPoolExecutor | None = None
+
+    async def enrich(self, requests: Sequence[EventIngestRequest]) -> list[EventIngestRequest]:
+        items = [(request.text, request.published_at) for request in requests]
+        if self._workers <= 0:
+            extracted = extract_batch(items)
+        else:
+            if self._pool is None:
+                # spawn, not fork: the parent holds live sockets and event-loop threads.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self._workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            loop = asyncio.get_running_loop()
+            chunks = [items[i : i + self._chunk_size] for i in range(0, len(items), self._chunk_size)]
+            try:
+                results = await asyncio.gather(
+                    *(loop.run_in_executor(self._pool, extract_batch, chunk) for chunk in chunks)
+                )
+            except BrokenProcessPool:
+                logger.exception("Extraction worker died; extracting %s messages inline and restarting", len(items))
+                self.close()
+                results = [extract_batch(items)]
+            extracted = [fields for chunk in results for fields in chunk]
+        return [
+            request.model_copy(
+                update={
+                    "title": fields.title,
+                    "event_time": fields.event_time,
+                    "location": fields.location,
+                    "price": fields.price,
+                    "category": fields.category,
+                    "source_link": fields.source_link,
+                }
+            )
+            for request, fields in zip(requests, extracted)
+        ]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import random
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Sequence
+
+from telethon.errors import FloodWaitError
+from telethon.tl.types import Message, MessageMediaPhoto, PeerChannel, PhotoEmpty
+
+# Telethon's iter_messages fetches history in pages of this many messages.
+_PAGE_SIZE = 100
+_EPOCH = datetime(2024, 1, 1, 12, 0, 0)
+_DEFAULT_TEXTS = (
+    "Концерт в клубе «Мумий Тролль». 12 марта в 20:00, вход от 1500 ₽. Билеты: https://example.ru/t/1",
+    "Лекция об истории архитектуры. 📍 Место: библиотека им. Маяковского. Вход свободный.",
+    "Стендап вечер, 5 апреля 19:30. Цена: 800 руб. Регистрация по ссылке.",
+    "Выставка современной фотографии открывается в субботу, 11:00, ул. Ленина, 5.",
+)
+
+
+class FakeTelegramClient:
+    """Offline stand-in for TelegramClient covering what the ingestor calls.
+
+    Every channel starts with ``messages_per_channel`` posts and ``post()`` appends
+    more. Each history page costs ``request_latency`` and each download costs
+    ``download_latency``; ``flood_wait_rate`` is the chance that a call raises
+    FloodWaitError instead. Downloads write ``media_bytes`` of filler to disk.
+    """
+
+    def __init__(
+        self,
+        channels: Sequence[str],
+        messages_per_channel: int = 100,
+        texts: Sequence[str] = _DEFAULT_TEXTS,
+        media_ratio: float = 0.3,
+        media_bytes: int = 65_536,
+        request_latency: float = 0.05,
+        download_latency: float = 0.2,
+        flood_wait_rate: float = 0.0,
+        flood_wait_seconds: int = 30,
+        seed: int = 0,
+    ) -> None:
+        self._texts = list(texts)
+        self._media_ratio = media_ratio
+        self._media_bytes = media_bytes
+        self._request_latency = request_latency
+        self._download_latency = download_latency
+        self._flood_wait_rate = flood_wait_rate
+        self._flood_wait_seconds = flood_wait_seconds
+        self._random = random.Random(seed)
+        self._channel_ids = {channel: 1_000_000 + index for index, channel in enumerate(channels)}
+        self._history: dict[str, list[Message]] = {channel: [] for channel in channels}
+        self._connected = False
+        self.requests = 0
+        self.downloads = 0
+        self.flood_waits = 0
+        for channel in channels:
+            self.post(channel, messages_per_channel)
+
+    def post(self, channel: str, count: int = 1) -> list[Message]:
+        """Append ``count`` new messages to a channel and return them."""
+        history = self._history[channel]
+        peer = PeerChannel(self._channel_ids[channel])
+        added = []
+        for _ in range(count):
+            message_id = len(history) + 1
+            media = None
+            if self._random.random() < self._media_ratio:
+                media = MessageMediaPhoto(photo=PhotoEmpty(id=message_id))
+            message = Message(
+                id=message_id,
+                peer_id=peer,
+                date=_EPOCH + timedelta(minutes=message_id),
+                message=self._texts[(message_id + peer.channel_id) % len(self._texts)],
+                media=media,
+            )
+            history.append(message)
+            added.append(message)
+        return added
+
+    async def start(self, *args: object, **kwargs: object) -> FakeTelegramClient:
+        self._connected = True
+        return self
+
+    async def connect(self) -> None:
+        self._connected = True
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def get_me(self) -> None:
+        await self._request()
+
+    async def iter_messages(
+        self,
+        entity: str,
+        limit: int | None = None,
+        offset_id: int = 0,
+        min_id: int = 0,
+        reverse: bool = False,
+    ) -> AsyncIterator[Message]:
+        history = self._history.get(entity)
+        if history is None:
+            raise ValueError(f"Cannot find any entity corresponding to {entity!r}")
+        # Ids are 1-based and contiguous, so slicing by id is slicing the list.
+        if reverse:
+            selected = history[max(min_id, offset_id) :]
+        else:
+            upper = offset_id - 1 if offset_id else len(history)
+            selected = history[min_id:upper][::-1]
+        if limit is not None:
+            selected = selected[:limit]
+        for index, message in enumerate(selected):
+            if index % _PAGE_SIZE == 0:
+                await self._request()
+            yield message
+
+    async def get_messages(self, entity: str, ids: Sequence[int]) -> list[Message | None]:
+        history = self._history.get(entity)
+        if history is None:
+            raise ValueError(f"Cannot find any entity corresponding to {entity!r}")
+        await self._request()
+        return [history[message_id - 1] if 0 < message_id <= len(history) else None for message_id in ids]
+
+    async def download_media(self, message: Message, file: str) -> str | None:
+        if message.media is None:
+            return None
+        await self._request(self._download_latency)
+        self.downloads += 1
+        path = Path(file)
+        path.write_bytes(b"\xff\xd8\xff\xe0" + bytes(max(0, self._media_bytes - 4)))
+        return str(path)
+
+    async def _request(self, latency: float | None = None) -> None:
+        self.requests += 1
+        if self._flood_wait_rate and self._random.random() < self._flood_wait_rate:
+            self.flood_waits += 1
+            raise FloodWaitError(request=None, capture=self._flood_wait_seconds)
+        await asyncio.sleep(self._request_latency if latency is None else latency)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Sequence
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.ingest.media import PARTIAL_SUFFIX, media_url
+from app.metrics import MEDIA_VARIANT_SECONDS
+from app.schemas import MediaVariant
+
+logger = logging.getLogger(__name__)
+
+
+def variant_filename(source: str, width: int) -> str:
+    return f"{Path(source).stem}_w{width}.webp"
+
+
+def render_variants(source: str, widths: Sequence[int], quality: int) -> list[tuple[str, int, int]]:
+    """Write WebP copies of an image scaled to ``widths``; returns (filename, width, height).
+
+    Widths at or above the original are skipped, so nothing is upscaled; an image
+    narrower than every width still gets one WebP copy at its own size. Files that
+    are not images yield nothing.
+    """
+    path = Path(source)
+    try:
+        with Image.open(path) as image:
+            largest = max(widths)
+            # JPEG can decode straight to a smaller scale; ask for a square so either orientation fits.
+            image.draft("RGB", (largest, largest))
+            frame = ImageOps.exif_transpose(image)
+            if frame.mode not in ("RGB", "RGBA"):
+                frame = frame.convert("RGBA" if "transparency" in frame.info or frame.mode.endswith("A") else "RGB")
+            targets = sorted({width for width in widths if width < frame.width}) or [frame.width]
+            variants: list[tuple[str, int, int]] = []
+            for width in targets:
+                height = max(1, round(frame.height * width / frame.width))
+                name = variant_filename(source, width)
+                dest = path.with_name(name)
+                if not dest.exists():
+                    scaled = frame
+                    if width != frame.width:
+                        scaled = frame.resize((width, height), Image.Resampling.LANCZOS, reducing_gap=3.0)
+                    partial = dest.with_name(name + PARTIAL_SUFFIX)
+                    scaled.save(partial, "WEBP", quality=quality, method=4)
+                    os.replace(partial, dest)
+                variants.append((name, width, height))
+            return variants
+    except (UnidentifiedImageError, Image.DecompressionBombError):
+        return []
+
+
+class ImageVariantStage:
+    """Renders responsive WebP variants of downloaded images.
+
+    Decoding and encoding run on a process pool so they never block the event
+    loop, and at most ``workers * 2`` files are queued for it at once; with
+    ``workers=0`` they run inline, which is handy for tests and benchmarks.
+    """
+
+    def __init__(self, widths: Sequence[int] = (320, 720), quality: int = 80, workers: int = 1) -> None:
+        self._widths = tuple(sorted(set(widths)))
+        self._quality = quality
+        self._workers = workers
+        self._slots = asyncio.Semaphore(max(1, workers) * 2)
+        self._pool: ProcessPoolExecutor | None = None
+
+    async def render(self, path: Path) -> list[MediaVariant]:
+        """Variants of ``path``, smallest first; empty when it is not an image or rendering fails."""
+        if not self._widths:
+            return []
+        async with self._slots:
+            started = time.perf_counter()
+            try:
+                if self._workers <= 0:
+                    rendered = render_variants(str(path), self._widths, self._quality)
+                else:
+                    if self._pool is None:
+                        # spawn, not fork: the parent holds live sockets and event-loop threads.
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self._workers, mp_context=multiprocessing.get_context("spawn")
+                        )
+                    loop = asyncio.get_running_loop()
+                    rendered = await loop.run_in_executor(
+                        self._pool, render_variants, str(path), self._widths, self._quality
+                    )
+            except BrokenProcessPool:
+                logger.exception("Image variant worker died rendering %s; restarting the pool", path.name)
+                self.close()
+                return []
+            except Exception:  # noqa: BLE001
+                # The original stays usable; clients just fetch it at full size.
+                logger.exception("Failed to render image variants for %s", path.name)
+                return []
+            if rendered:
+                MEDIA_VARIANT_SECONDS.observe(time.perf_counter() - started)
+        return [MediaVariant(url=media_url(name), width=width, height=height) for name, width, height in rendered]
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Sequence
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Take (or keep) every free or already-ours lease in KEYS; returns 1/0 per key.
+_CLAIM = """
+local claimed = {}
+for i, key in ipairs(KEYS) do
+    local holder = redis.call('get', key)
+    if not holder or holder == ARGV[1] then
+        redis.call('set', key, ARGV[1], 'PX', ARGV[2])
+        claimed[i] = 1
+    else
+        claimed[i] = 0
+    end
+end
+return claimed
+"""
+
+# Drop the leases in KEYS that we still hold.
+_RELEASE = """
+for _, key in ipairs(KEYS) do
+    if redis.call('get', key) == ARGV[1] then
+        redis.call('del', key)
+    end
+end
+return 0
+"""
+
+
+def _weight(worker_id: str, channel: str) -> int:
+    return int.from_bytes(hashlib.blake2b(f"{worker_id}\0{channel}".encode(), digest_size=8).digest(), "big")
+
+
+def assign(channels: Sequence[str], workers: Sequence[str]) -> dict[str, str]:
+    """Map each channel to a worker by rendezvous hashing with bounded load.
+
+    A channel goes to its highest-weighted worker that still has room under an even
+    share, so loads differ by at most one and a worker joining or leaving moves
+    little more than its own share. Every worker computes the same answer.
+    """
+    if not workers:
+        return {}
+    share, extra = divmod(len(channels), len(workers))
+    load = dict.fromkeys(workers, 0)
+    assignment: dict[str, str] = {}
+    for channel in channels:
+        ranked = sorted(workers, key=lambda worker: _weight(worker, channel), reverse=True)
+        # Only ``extra`` workers may go one over the share, or the last one can end up short.
+        owner = next(worker for worker in ranked if load[worker] < share or (load[worker] == share and extra))
+        if load[owner] == share:
+            extra -= 1
+        load[owner] += 1
+        assignment[channel] = owner
+    return assignment
+
+
+class ChannelLeases:
+    """Shards Telegram channels across ingestion workers through Redis leases.
+
+    Every heartbeat a worker records itself in a sorted set of live workers, works
+    out which channels rendezvous hashing gives it, claims or renews those leases
+    and releases any it no longer owns so their new owner can take them. A worker
+    that dies stops heartbeating; its membership and leases expire after
+    ``lease_ttl`` and the survivors pick its channels up. A lease only ever has one
+    holder, so two workers never poll a channel at once.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        worker_id: str,
+        channels: Sequence[str],
+        lease_ttl: float = 30.0,
+        heartbeat_seconds: float = 10.0,
+        prefix: str = "ingest",
+    ) -> None:
+        self._redis = redis
+        self.worker_id = worker_id
+        self._channels = list(channels)
+        self._lease_ttl = lease_ttl
+        self._heartbeat = heartbeat_seconds
+        self._members_key = f"{prefix}:workers"
+        self._lease_prefix = f"{prefix}:lease:"
+        self._claim = redis.register_script(_CLAIM)
+        self._release = redis.register_script(_RELEASE)
+        self._owned: set[str] = set()
+        self._renewed_at = 0.0
+        self._stopped = asyncio.Event()
+
+    def owned(self) -> list[str]:
+        """Channels this worker holds, in configured order; empty once leases may have lapsed."""
+        if time.monotonic() - self._renewed_at >= self._lease_ttl:
+            return []
+        return [channel for channel in self._channels if channel in self._owned]
+
+    async def heartbeat(self) -> None:
+        started = time.monotonic()
+        seconds, micros = await self._redis.time()
+        now = seconds + micros / 1e6
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.zadd(self._members_key, {self.worker_id: now})
+            pipe.zremrangebyscore(self._members_key, "-inf", now - self._lease_ttl)
+            pipe.zrange(self._members_key, 0, -1)
+            _, _, members = await pipe.execute()
+        workers = sorted(member.decode() if isinstance(member, bytes) else member for member in members)
+        assignment = assign(self._channels, workers)
+        mine = [channel for channel in self._channels if assignment.get(channel) == self.worker_id]
+        dropped = [channel for channel in self._owned if channel not in mine]
+        if dropped:
+            await self._release(keys=[self._lease_prefix + channel for channel in dropped], args=[self.worker_id])
+        claimed: list[int] = []
+        if mine:
+            claimed = await self._claim(
+                keys=[self._lease_prefix + channel for channel in mine],
+                args=[self.worker_id, int(self._lease_ttl * 1000)],
+            )
+        owned = {channel for channel, ok in zip(mine, claimed) if ok}
+        if owned != self._owned:
+            logger.info(
+                "Worker %s now owns %s/%s channels across %s workers",
+                self.worker_id,
+                len(owned),
+                len(self._channels),
+                len(workers),
+            )
+        self._owned = owned
+        self._renewed_at = started
+
+    async def run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                await self.heartbeat()
+            except RedisError:
+                logger.warning("Lease heartbeat failed for worker %s", self.worker_id, exc_info=True)
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=self._heartbeat)
+            except asyncio.TimeoutError:
+                continue
+
+    async def release(self) -> None:
+        self._stopped.set()
+        owned, self._owned = self._owned, set()
+        try:
+            if owned:
+                await self._release(keys=[self._lease_prefix + channel for channel in owned], args=[self.worker_id])
+            await self._redis.zrem(self._members_key, self.worker_id)
+        except RedisError:
+            logger.warning("Failed to release leases for worker %s; they expire on their own", self.worker_id)
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable
+
+from telethon import TelegramClient
+from telethon.errors import FileMigrateError, FloodWaitError
+from telethon.tl.types import Message
+
+from app.ingest.scheduler import FloodGate, RequestBudget
+from app.metrics import (
+    MEDIA_DOWNLOAD_BYTES,
+    MEDIA_DOWNLOAD_FAILURES,
+    MEDIA_DOWNLOAD_SECONDS,
+    TELEGRAM_FLOOD_WAIT_SECONDS,
+)
+from app.repositories.events import EventsRepository
+from app.schemas import MediaVariant
+
+if TYPE_CHECKING:
+    from app.ingest.images import ImageVariantStage
+
+logger = logging.getLogger(__name__)
+
+MEDIA_DOWNLOAD_GATE_KEY = "download_media"
+# Downloads land under this suffix and are renamed into place once complete, so a
+# media URL never serves (and caches as immutable) a half-written file.
+PARTIAL_SUFFIX = ".part"
+
+
+def media_filename(message: Message) -> str:
+    suffix = ""
+    try:
+        fname = getattr(message.file, "name", None) if hasattr(message, "file") else None
+        if fname:
+            suffix = Path(fname).suffix
+    except Exception:
+        suffix = ""
+    if not suffix:
+        suffix = ".jpg"
+    return f"{message.peer_id.channel_id if getattr(message.peer_id, 'channel_id', None) else 'ch'}_{message.id}{suffix}"
+
+
+def media_url(filename: str) -> str:
+    return f"/media/{filename}"
+
+
+@dataclass
+class MediaJob:
+    # Used unless the pipeline was given a client source (see use_clients).
+    client: TelegramClient
+    channel: str
+    message: Message
+    dest: Path
+
+
+class MediaDownloadPipeline:
+    """Downloads message media on a pool of workers and patches the stored events.
+
+    The queue is bounded, so a backlog of slow downloads pushes back on the ingestor
+    instead of growing without limit. With ``variants`` set, each downloaded image is
+    also rendered to smaller WebP copies before the event is patched.
+
+    A download that fails, or is skipped while downloads are parked after a
+    FloodWait, leaves the event's ``media_pending`` set so a later sweep
+    (``TelegramIngestor.requeue_pending_media``) can queue it again; after
+    ``max_failures`` failed jobs for the same message it is given up on.
+    """
+
+    def __init__(
+        self,
+        repo: EventsRepository,
+        request_budget: RequestBudget,
+        flood_gate: FloodGate,
+        workers: int = 4,
+        queue_size: int = 256,
+        max_attempts: int = 5,
+        base_sleep: float = 0.4,
+        variants: ImageVariantStage | None = None,
+        max_failures: int = 5,
+    ) -> None:
+        self._repo = repo
+        self._get_client: Callable[[], Awaitable[TelegramClient]] | None = None
+        self._max_failures = max(1, max_failures)
+        self._queued: set[tuple[str, int]] = set()
+        self._failures: dict[tuple[str, int], int] = {}
+        self._variants = variants
+        self._budget = request_budget
+        self._flood_gate = flood_gate
+        self._workers = max(1, workers)
+        self._queue: asyncio.Queue[MediaJob] = asyncio.Queue(maxsize=max(1, queue_size))
+        self._max_attempts = max_attempts
+        self._base_sleep = base_sleep
+        self._tasks: list[asyncio.Task] = []
+        self._started_at: float | None = None
+        self._downloaded = 0
+        self._downloaded_bytes = 0
+        self._skipped_existing = 0
+        self._failed = 0
+        self._retries = 0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._started_at = time.monotonic()
+        self._tasks = [asyncio.create_task(self._worker(), name=f"media-worker-{i}") for i in range(self._workers)]
+
+    def use_clients(self, get_client: Callable[[], Awaitable[TelegramClient]]) -> None:
+        """Download through ``get_client()``, e.g. TelegramClientManager.get, instead of the
+        client that fetched the message, which may have been replaced since."""
+        self._get_client = get_client
+
+    def is_queued(self, channel: str, message_id: int) -> bool:
+        return (channel, message_id) in self._queued
+
+    async def submit(self, job: MediaJob) -> None:
+        self.start()
+        key = (job.channel, job.message.id)
+        if key in self._queued:
+            return
+        self._queued.add(key)
+        await self._queue.put(job)
+
+    async def drain(self) -> None:
+        if self._tasks:
+            await self._queue.join()
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, object]:
+        uptime = time.monotonic() - self._started_at if self._started_at is not None else 0.0
+        return {
+            "workers": len(self._tasks),
+            "queue_depth": self._queue.qsize(),
+            "queue_capacity": self._queue.maxsize,
+            "downloaded": self._downloaded,
+            "downloaded_bytes": self._downloaded_bytes,
+            "skipped_existing": self._skipped_existing,
+            "failed": self._failed,
+            "retrying": len(self._failures),
+            "retries": self._retries,
+            "downloads_per_second": round(self._downloaded / uptime, 3) if uptime > 0 else 0.0,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception:  # noqa: BLE001
+                logger.exception("Media job failed for channel=%s message=%s", job.channel, job.message.id)
+            finally:
+                self._queued.discard((job.channel, job.message.id))
+                self._queue.task_done()
+
+    async def _process(self, job: MediaJob) -> None:
+        key = (job.channel, job.message.id)
+        if job.dest.exists():
+            self._skipped_existing += 1
+            urls: list[str] | None = [media_url(job.dest.name)]
+        elif self._flood_gate.remaining(MEDIA_DOWNLOAD_GATE_KEY) > 0:
+            # Not this file's fault; it stays pending for the next sweep.
+            return
+        else:
+            urls = await self._download(job)
+        if urls is None:
+            failures = self._failures[key] = self._failures.get(key, 0) + 1
+            if failures < self._max_failures:
+                return
+            logger.warning(
+                "Giving up on media for channel=%s message=%s after %s failed jobs",
+                job.channel,
+                job.message.id,
+                failures,
+            )
+            urls = []
+        self._failures.pop(key, None)
+        variants: dict[str, list[MediaVariant]] = {}
+        if urls and self._variants is not None:
+            rendered = await self._variants.render(job.dest)
+            if rendered:
+                variants[urls[0]] = rendered
+        await self._repo.set_media(job.channel, job.message.id, urls, variants)
+
+    async def _download(self, job: MediaJob) -> list[str] | None:
+        """Media URLs of the message, [] if it has nothing to download, None if the download failed."""
+        message = job.message
+        for attempt in range(1, self._max_attempts + 1):
+            try:
+                client = await self._get_client() if self._get_client is not None else job.client
+                await self._budget.acquire()
+                started = time.perf_counter()
+                partial = job.dest.with_name(job.dest.name + PARTIAL_SUFFIX)
+                downloaded = await client.download_media(message, file=str(partial))
+                if not downloaded:
+                    return []
+                path = job.dest
+                os.replace(downloaded, path)
+                MEDIA_DOWNLOAD_SECONDS.observe(time.perf_counter() - started)
+                self._downloaded += 1
+                try:
+                    size = Path(path).stat().st_size
+                except OSError:
+                    pass
+                else:
+                    self._downloaded_bytes += size
+                    MEDIA_DOWNLOAD_BYTES.observe(size)
+                return [media_url(path.name)]
+            except (FileMigrateError, TimeoutError) as exc:  # type: ignore[name-defined]
+                if attempt == self._max_attempts:
+                    logger.warning(
+                        "Media download failed after %s attempts for channel=%s message=%s: %s",
+                        attempt,
+                        message.peer_id,
+                        message.id,
+                        exc,
+                    )
+                    break
+                self._retries += 1
+                delay = self._base_sleep * (2 ** (attempt - 1))
+                logger.warning(
+                    "Retrying media download (attempt %s/%s) for channel=%s message=%s after %s",
+                    attempt + 1,
+                    self._max_attempts,
+                    message.peer_id,
+                    message.id,
+                    exc,
+                )
+                await asyncio.sleep(delay)
+            except FloodWaitError as exc:
+                wait_for = max(0, int(getattr(exc, "seconds", 0)))
+                logger.warning("FloodWait for %ss on download_media, skipping media downloads", wait_for)
+                TELEGRAM_FLOOD_WAIT_SECONDS.labels("media").observe(wait_for)
+                self._flood_gate.park(MEDIA_DOWNLOAD_GATE_KEY, wait_for)
+                break
+            except Exception:
+                logger.exception("Unexpected failure while downloading media for channel=%s message=%s", message.peer_id, message.id)
+                break
+        self._failed += 1
+        MEDIA_DOWNLOAD_FAILURES.inc()
+        return None
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import math
+import time
+from dataclasses import dataclass
+from typing import Iterable
+
+
+class RequestBudget:
+    """Token bucket shared by every Telegram request made during polling."""
+
+    def __init__(self, rate_per_second: float, burst: int | None = None) -> None:
+        self._rate = rate_per_second
+        self._capacity = max(1.0, float(burst if burst is not None else rate_per_second))
+        self._tokens = self._capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        if self._rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self._capacity, self._tokens + (now - self._updated) * self._rate)
+                self._updated = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self._rate)
+
+
+class FloodGate:
+    """Remembers FloodWait deadlines per channel or per API method."""
+
+    def __init__(self) -> None:
+        self._until: dict[str, float] = {}
+
+    def park(self, key: str, seconds: float) -> None:
+        deadline = time.monotonic() + max(0.0, seconds)
+        self._until[key] = max(deadline, self._until.get(key, 0.0))
+
+    def remaining(self, key: str) -> float:
+        deadline = self._until.get(key)
+        if deadline is None:
+            return 0.0
+        left = deadline - time.monotonic()
+        if left <= 0:
+            del self._until[key]
+            return 0.0
+        return left
+
+
+@dataclass
+class _ChannelSchedule:
+    due: float
+    page_size: int
+    rate: float | None = None  # messages per second, exponentially weighted
+    polled_at: float | None = None
+    carried: int = 0  # messages fetched by saturated polls since polled_at
+    failures: int = 0
+
+
+class AdaptivePollScheduler:
+    """Decides when to poll each channel and how many messages to ask for.
+
+    Each channel's posting rate is learned from how many messages its polls return.
+    Polling a channel every ``sqrt(poll_cost / rate)`` seconds minimises the total
+    delay of all messages for a given number of requests, ``poll_cost`` being the
+    message-seconds of delay one request is worth; intervals are kept between
+    ``min_interval`` and ``max_interval``. A full page means the
+    channel is ahead of us, so it is polled again at once with a bigger page.
+    Failures back off exponentially and FloodWaits park the channel for the
+    imposed time. Due channels are handed out most overdue first, at no more than
+    ``requests_per_second`` (0 disables the cap). Time is passed in, so the same
+    scheduler drives the polling service and the simulation harness.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 5.0,
+        max_interval: float = 300.0,
+        min_page: int = 5,
+        max_page: int = 100,
+        poll_cost: float = 10.0,
+        requests_per_second: float = 0.0,
+        smoothing: float = 0.3,
+    ) -> None:
+        self._min_interval = min_interval
+        self._max_interval = max(min_interval, max_interval)
+        self._min_page = max(1, min_page)
+        self._max_page = max(self._min_page, max_page)
+        self._poll_cost = poll_cost
+        self._rate_limit = requests_per_second
+        self._smoothing = smoothing
+        self._channels: dict[str, _ChannelSchedule] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._tokens = max(1.0, requests_per_second)
+        self._refilled_at: float | None = None
+
+    def __contains__(self, channel: str) -> bool:
+        return channel in self._channels
+
+    def sync(self, channels: Iterable[str], now: float) -> None:
+        """Track exactly ``channels``; new ones are due immediately."""
+        wanted = set(channels)
+        for channel in wanted - self._channels.keys():
+            self._channels[channel] = _ChannelSchedule(due=now, page_size=self._min_page)
+            heapq.heappush(self._heap, (now, channel))
+        for channel in self._channels.keys() - wanted:
+            del self._channels[channel]
+
+    def page_size(self, channel: str) -> int:
+        return self._channels[channel].page_size
+
+    def take(self, now: float) -> list[str]:
+        """Pop the channels due at ``now`` that fit in the request budget."""
+        allowance = self._refill(now)
+        taken: list[str] = []
+        while self._heap and len(taken) < allowance:
+            due, channel = self._heap[0]
+            schedule = self._channels.get(channel)
+            if schedule is None or schedule.due != due:
+                heapq.heappop(self._heap)  # dropped channel or superseded entry
+                continue
+            if due > now:
+                break
+            heapq.heappop(self._heap)
+            taken.append(channel)
+        if self._rate_limit > 0:
+            self._tokens -= len(taken)
+        return taken
+
+    def next_due(self) -> float | None:
+        while self._heap:
+            due, channel = self._heap[0]
+            schedule = self._channels.get(channel)
+            if schedule is not None and schedule.due == due:
+                return due
+            heapq.heappop(self._heap)
+        return None
+
+    def wait_time(self, now: float, idle: float) -> float:
+        """Seconds until a channel can next be taken, capped at ``idle``."""
+        due = self.next_due()
+        if due is None:
+            return idle
+        wait = due - now
+        if self._rate_limit > 0 and self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self._rate_limit)
+        return min(idle, max(0.0, wait))
+
+    def record_success(self, channel: str, fetched: int, now: float) -> None:
+        schedule = self._channels.get(channel)
+        if schedule is None:
+            return
+        schedule.failures = 0
+        if fetched >= schedule.page_size:
+            # Saturated page: more is waiting. Fetch it now with a bigger page, and
+            # count these messages towards the rate once the backlog is drained.
+            schedule.carried += fetched
+            schedule.page_size = min(self._max_page, schedule.page_size * 2)
+            self._reschedule(channel, now)
+            return
+        if schedule.polled_at is not None and now > schedule.polled_at:
+            observed = (schedule.carried + fetched) / (now - schedule.polled_at)
+            schedule.rate = (
+                observed
+                if schedule.rate is None
+                else self._smoothing * observed + (1 - self._smoothing) * schedule.rate
+            )
+        schedule.polled_at = now
+        schedule.carried = 0
+        interval = self._interval(schedule.rate)
+        expected = (schedule.rate or 0.0) * interval
+        schedule.page_size = min(self._max_page, max(self._min_page, math.ceil(3 * expected)))
+        self._reschedule(channel, now + interval)
+
+    def record_failure(self, channel: str, now: float, retry_after: float = 0.0) -> None:
+        schedule = self._channels.get(channel)
+        if schedule is None:
+            return
+        schedule.failures += 1
+        backoff = min(self._max_interval, self._min_interval * 2 ** schedule.failures)
+        self._reschedule(channel, now + max(backoff, retry_after))
+
+    def _interval(self, rate: float | None) -> float:
+        if rate is None:
+            return self._min_interval
+        if rate <= 0:
+            return self._max_interval
+        return min(self._max_interval, max(self._min_interval, math.sqrt(self._poll_cost / rate)))
+
+    def _reschedule(self, channel: str, due: float) -> None:
+        self._channels[channel].due = due
+        heapq.heappush(self._heap, (due, channel))
+
+    def _refill(self, now: float) -> float:
+        if self._rate_limit <= 0:
+            return math.inf
+        if self._refilled_at is not None:
+            self._tokens = min(
+                max(1.0, self._rate_limit), self._tokens + (now - self._refilled_at) * self._rate_limit
+            )
+        self._refilled_at = now
+        return math.floor(self._tokens)
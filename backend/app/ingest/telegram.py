@@ -2,29 +2,133 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from dataclasses import dataclass
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
 from pathlib import Path
-from typing import Iterable
+from typing import AsyncIterator, Callable, Mapping, Sequence
 
 from telethon import TelegramClient
-from telethon.errors import FloodWaitError, FileMigrateError
+from telethon.errors import FloodWaitError
 from telethon.sessions import StringSession
 from telethon.tl.types import Message
 
 from app.config import Settings
+from app.ingest.extract import ExtractionStage
+from app.ingest.images import ImageVariantStage
+from app.ingest.media import MEDIA_DOWNLOAD_GATE_KEY, MediaDownloadPipeline, MediaJob, media_filename, media_url
+from app.ingest.scheduler import FloodGate, RequestBudget
+from app.metrics import (
+    INGEST_FLUSH_SECONDS,
+    INGEST_MESSAGE_SECONDS,
+    INGESTED_MESSAGES,
+    TELEGRAM_FETCH_SECONDS,
+    TELEGRAM_FLOOD_WAIT_SECONDS,
+)
+from app.repositories.cursors import ChannelCursorsRepository, InMemoryChannelCursorsRepository
 from app.repositories.events import EventsRepository
-from app.schemas import EventIngestRequest
+from app.schemas import ChannelCursorState, EventIngestRequest
 
 logger = logging.getLogger(__name__)
 
+# History and messages-by-id requests return at most this many messages each.
+_HISTORY_PAGE_SIZE = 100
+
+
+@dataclass
+class _PollStats:
+    ingested: int = 0
+    downloaded_media: int = 0
+    ok_channels: list[str] = field(default_factory=list)
+    failed_channels: dict[str, str] = field(default_factory=dict)
+    channel_seconds: dict[str, float] = field(default_factory=dict)
+    buffer: list[EventIngestRequest] = field(default_factory=list)
+    buffered_at: list[float] = field(default_factory=list)
+    high_water: dict[str, int] = field(default_factory=dict)
+    low_water: dict[str, int] = field(default_factory=dict)
+    fetched: dict[str, int] = field(default_factory=dict)
+    media_jobs: dict[tuple[str, int], MediaJob] = field(default_factory=dict)
+    queued_media: int = 0
+
+    def buffer_message(self, payload: EventIngestRequest) -> None:
+        self.buffer.append(payload)
+        self.buffered_at.append(time.perf_counter())
+
+    def saw(self, channel: str, message_id: int) -> None:
+        self.fetched[channel] = self.fetched.get(channel, 0) + 1
+        self.high_water[channel] = max(message_id, self.high_water.get(channel, message_id))
+        self.low_water[channel] = min(message_id, self.low_water.get(channel, message_id))
+
+    def merge(self, other: _PollStats) -> None:
+        """Fold in the counters of a finished, fully flushed run."""
+        self.ingested += other.ingested
+        self.downloaded_media += other.downloaded_media
+        self.queued_media += other.queued_media
+        self.ok_channels.extend(other.ok_channels)
+        self.failed_channels.update(other.failed_channels)
+        self.channel_seconds.update(other.channel_seconds)
+        for channel, count in other.fetched.items():
+            self.fetched[channel] = self.fetched.get(channel, 0) + count
+
 
 @dataclass
 class TelegramIngestor:
     settings: Settings
     repo: EventsRepository
     media_root: Path = Path(__file__).resolve().parents[2] / "media"
+    cursors: ChannelCursorsRepository = field(default_factory=InMemoryChannelCursorsRepository)
+    flood_gate: FloodGate = field(default_factory=FloodGate)
+    # Overrides the Telethon client, e.g. with app.ingest.fake.FakeTelegramClient for offline runs.
+    client_factory: Callable[[], TelegramClient] | None = None
+    _request_budget: RequestBudget | None = field(default=None, init=False, repr=False)
+    _media: MediaDownloadPipeline | None = field(default=None, init=False, repr=False)
+    _extraction: ExtractionStage | None = field(default=None, init=False, repr=False)
+    _images: ImageVariantStage | None = field(default=None, init=False, repr=False)
+    _updates: _PollStats = field(default_factory=_PollStats, init=False, repr=False)
+    _cursor_cache: dict[str, ChannelCursorState] = field(default_factory=dict, init=False, repr=False)
+    _cursors_loaded: bool = field(default=False, init=False, repr=False)
+
+    @property
+    def request_budget(self) -> RequestBudget:
+        if self._request_budget is None:
+            self._request_budget = RequestBudget(self.settings.telegram_requests_per_second)
+        return self._request_budget
+
+    @property
+    def media(self) -> MediaDownloadPipeline:
+        if self._media is None:
+            self._media = MediaDownloadPipeline(
+                repo=self.repo,
+                request_budget=self.request_budget,
+                flood_gate=self.flood_gate,
+                workers=self.settings.media_download_workers,
+                queue_size=self.settings.media_download_queue_size,
+                variants=self.images,
+            )
+        return self._media
+
+    @property
+    def images(self) -> ImageVariantStage:
+        if self._images is None:
+            self._images = ImageVariantStage(
+                widths=self.settings.media_variant_widths,
+                quality=self.settings.media_variant_quality,
+                workers=self.settings.media_variant_workers,
+            )
+        return self._images
+
+    @property
+    def extraction(self) -> ExtractionStage:
+        if self._extraction is None:
+            self._extraction = ExtractionStage(
+                workers=self.settings.extraction_workers,
+                chunk_size=self.settings.extraction_chunk_size,
+            )
+        return self._extraction
 
     def create_client(self) -> TelegramClient:
+        if self.client_factory is not None:
+            return self.client_factory()
         session: StringSession | str = "tg_session"
         if self.settings.telegram_login_mode != "bot" and self.settings.telegram_session_string:
             session = StringSession(self.settings.telegram_session_string)
@@ -34,125 +138,440 @@ class TelegramIngestor:
             api_hash=self.settings.telegram_api_hash,
         )
 
+    async def connect(self) -> TelegramClient:
+        if self.settings.telegram_login_mode == "bot":
+            if not self.settings.telegram_bot_token:
+                raise ValueError("TELEGRAM_BOT_TOKEN is required in bot login mode")
+        elif not self.settings.telegram_session_string:
+            raise ValueError("TELEGRAM_SESSION_STRING is required in user login mode")
+        client = self.create_client()
+        try:
+            if self.settings.telegram_login_mode == "bot":
+                await client.start(bot_token=self.settings.telegram_bot_token)
+            else:
+                await client.start()
+        except BaseException:
+            # start() connects before it authorizes; don't leave that connection behind.
+            await client.disconnect()
+            raise
+        return client
+
     async def fetch_recent(
         self,
         per_channel_limit: int = 5,
         pause_between_channels_seconds: float = 1.0,
         pause_between_messages_seconds: float = 0.0,
+        flush_batch_size: int = 200,
+        concurrency: int | None = None,
+        client: TelegramClient | None = None,
+        channels: Sequence[str] | None = None,
+        limits: Mapping[str, int] | None = None,
     ) -> dict[str, object]:
         self.media_root.mkdir(parents=True, exist_ok=True)
-        client = self.create_client()
-        if self.settings.telegram_login_mode == "bot":
-            if not self.settings.telegram_bot_token:
-                raise ValueError("TELEGRAM_BOT_TOKEN is required in bot login mode")
-            await client.start(bot_token=self.settings.telegram_bot_token)
-        else:
-            if not self.settings.telegram_session_string:
-                raise ValueError("TELEGRAM_SESSION_STRING is required in user login mode")
-            await client.start()
-        ingested: int = 0
-        downloaded_media: int = 0
-        ok_channels: list[str] = []
-        failed_channels: dict[str, str] = {}
-        async with client:
-            for channel in self.settings.telegram_channel_ids:
-                channel_ingested = 0
-                try:
-                    async for message in client.iter_messages(entity=channel, limit=per_channel_limit):
-                        if not isinstance(message, Message):
-                            continue
-                        media_count = await self._ingest_message(client, channel, message)
-                        ingested += 1
-                        channel_ingested += 1
-                        downloaded_media += media_count
-                        if pause_between_messages_seconds > 0:
-                            await asyncio.sleep(pause_between_messages_seconds)
-                    ok_channels.append(channel)
-                except FloodWaitError as e:
-                    wait_for = max(0, int(getattr(e, "seconds", 0)))
-                    logger.warning("FloodWait for %ss on %s", wait_for, channel)
-                    if wait_for > 0:
-                        await asyncio.sleep(wait_for)
-                    failed_channels[channel] = f"FloodWait({wait_for}s)"
-                except Exception as e:  # noqa: BLE001
-                    logger.exception("Failed channel=%s after ingested=%s", channel, channel_ingested)
-                    failed_channels[channel] = str(e)[:500]
-                finally:
-                    if pause_between_channels_seconds > 0:
-                        await asyncio.sleep(pause_between_channels_seconds)
+        if client is None:
+            own_client = await self.connect()
+            try:
+                return await self.fetch_recent(
+                    per_channel_limit=per_channel_limit,
+                    pause_between_channels_seconds=pause_between_channels_seconds,
+                    pause_between_messages_seconds=pause_between_messages_seconds,
+                    flush_batch_size=flush_batch_size,
+                    concurrency=concurrency,
+                    client=own_client,
+                    channels=channels,
+                    limits=limits,
+                )
+            finally:
+                await self.media.drain()
+                await own_client.disconnect()
+        if concurrency is None:
+            concurrency = self.settings.telegram_fetch_concurrency
+        slots = asyncio.Semaphore(max(1, concurrency))
+        stats = _PollStats()
+        await self._load_cursors()
+
+        async def fetch_one(channel: str) -> None:
+            async with slots:
+                await self._fetch_channel(
+                    client,
+                    channel,
+                    stats,
+                    per_channel_limit=limits.get(channel, per_channel_limit) if limits else per_channel_limit,
+                    pause_between_messages_seconds=pause_between_messages_seconds,
+                )
+                if len(stats.buffer) >= flush_batch_size:
+                    await self._flush(stats)
+                if pause_between_channels_seconds > 0:
+                    await asyncio.sleep(pause_between_channels_seconds)
+
+        if channels is None:
+            channels = self.settings.telegram_channel_ids
+        await asyncio.gather(*(fetch_one(channel) for channel in channels))
+        await self._flush(stats)
+        await self._advance_cursors(stats)
 
         return {
-            "channels_total": len(self.settings.telegram_channel_ids),
-            "channels_ok": ok_channels,
-            "channels_failed": failed_channels,
-            "ingested_messages": ingested,
-            "downloaded_media": downloaded_media,
+            "channels_total": len(channels),
+            "channels_ok": stats.ok_channels,
+            "channels_failed": stats.failed_channels,
+            "channel_seconds": stats.channel_seconds,
+            "channel_messages": stats.fetched,
+            "ingested_messages": stats.ingested,
+            "downloaded_media": stats.downloaded_media,
+            "queued_media": stats.queued_media,
             "per_channel_limit": per_channel_limit,
+            "concurrency": concurrency,
         }
 
-    async def _ingest_message(self, client: TelegramClient, channel: str, message: Message) -> int:
-        if not message.message:
+    async def _fetch_channel(
+        self,
+        client: TelegramClient,
+        channel: str,
+        stats: _PollStats,
+        per_channel_limit: int,
+        pause_between_messages_seconds: float,
+    ) -> None:
+        parked_for = self.flood_gate.remaining(channel)
+        if parked_for > 0:
+            stats.failed_channels[channel] = f"FloodWait(parked, {parked_for:.0f}s left)"
+            return
+        started = time.perf_counter()
+        channel_buffered = 0
+        cursor = self._cursor(channel)
+        try:
+            # Oldest-first above the high-water mark, so a burst larger than one poll is
+            # picked up over the next polls instead of being skipped.
+            messages = self._history(client, channel, per_channel_limit, min_id=cursor.last_message_id)
+            async for message in messages:
+                stats.saw(channel, message.id)
+                if not isinstance(message, Message):
+                    continue
+                payload = await self._build_payload(client, channel, message, stats)
+                if payload is None:
+                    continue
+                stats.buffer_message(payload)
+                channel_buffered += 1
+                stats.downloaded_media += len(payload.media_urls)
+                if pause_between_messages_seconds > 0:
+                    await asyncio.sleep(pause_between_messages_seconds)
+            stats.ok_channels.append(channel)
+        except FloodWaitError as e:
+            wait_for = max(0, int(getattr(e, "seconds", 0)))
+            logger.warning("FloodWait for %ss on %s, parking channel", wait_for, channel)
+            TELEGRAM_FLOOD_WAIT_SECONDS.labels("fetch").observe(wait_for)
+            self.flood_gate.park(channel, wait_for)
+            stats.failed_channels[channel] = f"FloodWait({wait_for}s)"
+        except Exception as e:  # noqa: BLE001
+            logger.exception("Failed channel=%s after buffered=%s", channel, channel_buffered)
+            stats.failed_channels[channel] = str(e)[:500]
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.channel_seconds[channel] = round(elapsed, 3)
+            TELEGRAM_FETCH_SECONDS.labels(channel, "poll").observe(elapsed)
+
+    async def backfill(
+        self,
+        depth: int | None = None,
+        page_size: int | None = None,
+        concurrency: int | None = None,
+        client: TelegramClient | None = None,
+        channels: Sequence[str] | None = None,
+    ) -> dict[str, object]:
+        self.media_root.mkdir(parents=True, exist_ok=True)
+        if client is None:
+            own_client = await self.connect()
+            try:
+                return await self.backfill(
+                    depth=depth, page_size=page_size, concurrency=concurrency, client=own_client, channels=channels
+                )
+            finally:
+                await self.media.drain()
+                await own_client.disconnect()
+        if depth is None:
+            depth = self.settings.telegram_backfill_depth
+        if page_size is None:
+            page_size = self.settings.telegram_backfill_page_size
+        if concurrency is None:
+            concurrency = self.settings.telegram_fetch_concurrency
+        slots = asyncio.Semaphore(max(1, concurrency))
+        stats = _PollStats()
+        await self._load_cursors()
+
+        async def backfill_one(channel: str) -> None:
+            async with slots:
+                # Each channel flushes its own buffer, so a failed write is pinned on the right channel.
+                channel_stats = _PollStats()
+                await self._backfill_channel(client, channel, channel_stats, depth=depth, page_size=page_size)
+                stats.merge(channel_stats)
+
+        if channels is None:
+            channels = self.settings.telegram_channel_ids
+        await asyncio.gather(*(backfill_one(channel) for channel in channels))
+
+        return {
+            "channels_total": len(channels),
+            "channels_ok": stats.ok_channels,
+            "channels_failed": stats.failed_channels,
+            "channel_seconds": stats.channel_seconds,
+            "ingested_messages": stats.ingested,
+            "downloaded_media": stats.downloaded_media,
+            "queued_media": stats.queued_media,
+            "depth": depth,
+        }
+
+    async def _backfill_channel(
+        self,
+        client: TelegramClient,
+        channel: str,
+        stats: _PollStats,
+        depth: int,
+        page_size: int,
+    ) -> None:
+        started = time.perf_counter()
+        cursor = self._cursor(channel)
+        try:
+            while cursor.backfilled < depth:
+                parked_for = self.flood_gate.remaining(channel)
+                if parked_for > 0:
+                    stats.failed_channels[channel] = f"FloodWait(parked, {parked_for:.0f}s left)"
+                    return
+                # offset_id=0 starts from the newest message; otherwise page below the oldest one seen.
+                page = [
+                    message
+                    async for message in self._history(
+                        client,
+                        channel,
+                        min(page_size, depth - cursor.backfilled),
+                        offset_id=cursor.first_message_id,
+                    )
+                ]
+                if not page:
+                    cursor.backfilled = depth
+                    await self.cursors.save_many([cursor])
+                    break
+                for message in page:
+                    if not isinstance(message, Message):
+                        continue
+                    payload = await self._build_payload(client, channel, message, stats)
+                    if payload is not None:
+                        stats.buffer_message(payload)
+                        stats.downloaded_media += len(payload.media_urls)
+                await self._flush(stats)
+                if channel in stats.failed_channels:
+                    return
+                ids = [message.id for message in page]
+                cursor.first_message_id = min(ids)
+                cursor.last_message_id = max(cursor.last_message_id, max(ids))
+                cursor.backfilled += len(page)
+                await self.cursors.save_many([cursor])
+            stats.ok_channels.append(channel)
+        except FloodWaitError as e:
+            wait_for = max(0, int(getattr(e, "seconds", 0)))
+            logger.warning("FloodWait for %ss on %s during backfill, parking channel", wait_for, channel)
+            TELEGRAM_FLOOD_WAIT_SECONDS.labels("backfill").observe(wait_for)
+            self.flood_gate.park(channel, wait_for)
+            stats.failed_channels[channel] = f"FloodWait({wait_for}s)"
+        except Exception as e:  # noqa: BLE001
+            logger.exception("Backfill failed channel=%s at backfilled=%s", channel, cursor.backfilled)
+            stats.failed_channels[channel] = str(e)[:500]
+        finally:
+            elapsed = time.perf_counter() - started
+            stats.channel_seconds[channel] = round(elapsed, 3)
+            TELEGRAM_FETCH_SECONDS.labels(channel, "backfill").observe(elapsed)
+
+    async def _history(
+        self,
+        client: TelegramClient,
+        channel: str,
+        limit: int,
+        min_id: int = 0,
+        offset_id: int = 0,
+    ) -> AsyncIterator[Message]:
+        """Up to ``limit`` messages, spending one request from the budget per history page.
+
+        With ``min_id`` the pages run oldest-first above it, otherwise newest-first
+        below ``offset_id`` (0 meaning the latest post).
+        """
+        remaining = limit
+        while remaining > 0:
+            size = min(remaining, _HISTORY_PAGE_SIZE)
+            await self.request_budget.acquire()
+            if min_id:
+                messages = client.iter_messages(entity=channel, limit=size, min_id=min_id, reverse=True)
+            else:
+                messages = client.iter_messages(entity=channel, limit=size, offset_id=offset_id)
+            page = [message async for message in messages]
+            for message in page:
+                yield message
+            if len(page) < size:
+                return
+            remaining -= len(page)
+            if min_id:
+                min_id = max(message.id for message in page)
+            else:
+                offset_id = min(message.id for message in page)
+
+    async def requeue_pending_media(self, client: TelegramClient, channels: Sequence[str]) -> int:
+        """Queue downloads again for events in ``channels`` still marked media_pending.
+
+        Picks up downloads that failed or were skipped during a FloodWait, and jobs
+        lost when the worker stopped. Messages are fetched again by id so their file
+        references are fresh. Returns the number of downloads queued.
+        """
+        if self.flood_gate.remaining(MEDIA_DOWNLOAD_GATE_KEY) > 0:
             return 0
-        media_urls = await self._collect_media(client, message)
-        published_at = (
-            message.date.replace(tzinfo=None) if getattr(message.date, "tzinfo", None) else message.date
-        )
-        payload = EventIngestRequest(
+        pending = await self.repo.pending_media(channels, limit=self.settings.media_download_queue_size)
+        by_channel: dict[str, list[int]] = {}
+        for channel, message_id in pending:
+            if not self.media.is_queued(channel, message_id):
+                by_channel.setdefault(channel, []).append(message_id)
+        queued = 0
+        for channel, message_ids in by_channel.items():
+            for start in range(0, len(message_ids), _HISTORY_PAGE_SIZE):
+                if self.flood_gate.remaining(channel) > 0:
+                    break
+                ids = message_ids[start : start + _HISTORY_PAGE_SIZE]
+                try:
+                    await self.request_budget.acquire()
+                    messages = await client.get_messages(channel, ids=ids)
+                except FloodWaitError as e:
+                    wait_for = max(0, int(getattr(e, "seconds", 0)))
+                    logger.warning("FloodWait for %ss on %s re-reading media, parking channel", wait_for, channel)
+                    TELEGRAM_FLOOD_WAIT_SECONDS.labels("media").observe(wait_for)
+                    self.flood_gate.park(channel, wait_for)
+                    break
+                except Exception:  # noqa: BLE001
+                    logger.exception("Failed to re-read %s messages with pending media from %s", len(ids), channel)
+                    break
+                for message_id, message in zip(ids, messages):
+                    if not isinstance(message, Message) or not message.media:
+                        # Deleted, or the media was edited away: nothing is left to fetch.
+                        await self.repo.set_media(channel, message_id, [])
+                        continue
+                    dest = self.media_root / media_filename(message)
+                    await self.media.submit(MediaJob(client, channel, message, dest))
+                    queued += 1
+        return queued
+
+    async def handle_update(
+        self, client: TelegramClient, channel: str, message: Message, edited: bool = False
+    ) -> None:
+        """Buffer a pushed message until the next ``flush_updates``."""
+        if not isinstance(message, Message):
+            return
+        # Edits can reach far below the cursor; only new posts move the high-water mark.
+        if not edited:
+            self._updates.saw(channel, message.id)
+        payload = await self._build_payload(client, channel, message, self._updates)
+        if payload is not None:
+            self._updates.buffer_message(payload)
+
+    async def flush_updates(self) -> list[str]:
+        """Store buffered updates; returns channels whose messages could not be written."""
+        stats, self._updates = self._updates, _PollStats()
+        if not stats.buffer and not stats.high_water:
+            return []
+        await self._load_cursors()
+        await self._flush(stats)
+        await self._advance_cursors(stats)
+        return list(stats.failed_channels)
+
+    def reload_cursors(self) -> None:
+        """Re-read cursors on the next poll, e.g. after taking over channels from another worker."""
+        self._cursors_loaded = False
+
+    async def _load_cursors(self) -> None:
+        if not self._cursors_loaded:
+            self._cursor_cache = await self.cursors.get_all()
+            self._cursors_loaded = True
+
+    def _cursor(self, channel: str) -> ChannelCursorState:
+        cursor = self._cursor_cache.get(channel)
+        if cursor is None:
+            cursor = self._cursor_cache[channel] = ChannelCursorState(channel=channel)
+        return cursor
+
+    async def _advance_cursors(self, stats: _PollStats) -> None:
+        updated: list[ChannelCursorState] = []
+        for channel, high in stats.high_water.items():
+            # Failed channels keep their old mark; re-reading them is harmless since upserts are idempotent.
+            if channel in stats.failed_channels:
+                continue
+            cursor = self._cursor(channel)
+            low = stats.low_water[channel]
+            cursor.last_message_id = max(cursor.last_message_id, high)
+            cursor.first_message_id = min(cursor.first_message_id, low) if cursor.first_message_id else low
+            updated.append(cursor)
+        if not updated:
+            return
+        try:
+            await self.cursors.save_many(updated)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to persist high-water marks for %s channels", len(updated))
+
+    async def _flush(self, stats: _PollStats) -> None:
+        if not stats.buffer:
+            return
+        batch = list(stats.buffer)
+        buffered_at = list(stats.buffered_at)
+        stats.buffer.clear()
+        stats.buffered_at.clear()
+        started = time.perf_counter()
+        jobs = [stats.media_jobs.pop((item.channel, item.message_id), None) for item in batch]
+        try:
+            batch = await self.extraction.enrich(batch)
+        except Exception:  # noqa: BLE001
+            # Extraction only adds detail; store the raw messages rather than drop them.
+            logger.exception("Field extraction failed for %s messages", len(batch))
+        try:
+            cards = await self.repo.upsert_many(batch)
+        except Exception as e:  # noqa: BLE001
+            channels = {item.channel for item in batch}
+            logger.exception("Failed to flush %s messages from %s channels", len(batch), len(channels))
+            for channel in channels:
+                if channel in stats.ok_channels:
+                    stats.ok_channels.remove(channel)
+                stats.failed_channels[channel] = str(e)[:500]
+            return
+        finished = time.perf_counter()
+        INGEST_FLUSH_SECONDS.observe(finished - started)
+        for fetched_at in buffered_at:
+            INGEST_MESSAGE_SECONDS.observe(finished - fetched_at)
+        INGESTED_MESSAGES.inc(len(cards))
+        stats.ingested += len(cards)
+        logger.info("Ingested %s messages", len(cards))
+        # Rows exist now, so downloads can patch them; skip events that already carry media.
+        for item, card, job in zip(batch, cards, jobs):
+            # A repost folded into another channel's event has no row of its own to patch.
+            merged = (card.channel, card.message_id) != (item.channel, item.message_id)
+            if job is not None and card.media_pending and not merged:
+                await self.media.submit(job)
+                stats.queued_media += 1
+
+    async def _build_payload(
+        self, client: TelegramClient, channel: str, message: Message, stats: _PollStats
+    ) -> EventIngestRequest | None:
+        if not message.message:
+            return None
+        media_urls: list[str] = []
+        media_pending = False
+        if message.media:
+            dest = self.media_root / media_filename(message)
+            if dest.exists():
+                media_urls = [media_url(dest.name)]
+            else:
+                media_pending = True
+                stats.media_jobs[(channel, message.id)] = MediaJob(client, channel, message, dest)
+        return EventIngestRequest(
             channel=channel,
             message_id=message.id,
             text=message.message,
             media_urls=media_urls,
-            published_at=published_at,
+            media_pending=media_pending,
+            published_at=_naive(message.date),
+            edited_at=_naive(getattr(message, "edit_date", None)),
         )
-        card = await self.repo.upsert(payload)
-        logger.info("Ingested %s %s", channel, card.id)
-        return len(media_urls)
 
-    async def _collect_media(self, client: TelegramClient, message: Message) -> list[str]:
-        if not message.media:
-            return []
-        urls: list[str] = []
-        suffix = ""
-        try:
-            fname = getattr(message.file, "name", None) if hasattr(message, "file") else None
-            if fname:
-                suffix = Path(fname).suffix
-        except Exception:
-            suffix = ""
-        if not suffix:
-            suffix = ".jpg"
-        filename = f"{message.peer_id.channel_id if getattr(message.peer_id, 'channel_id', None) else 'ch'}_{message.id}{suffix}"
-        dest = self.media_root / filename
-        max_attempts = 5
-        base_sleep = 0.4
-        for attempt in range(1, max_attempts + 1):
-            try:
-                path = await client.download_media(message, file=str(dest))
-                if path:
-                    urls.append(f"/media/{Path(path).name}")
-                break
-            except (FileMigrateError, TimeoutError) as exc:  # type: ignore[name-defined]
-                if attempt == max_attempts:
-                    logger.warning(
-                        "Media download failed after %s attempts for channel=%s message=%s: %s",
-                        attempt,
-                        message.peer_id,
-                        message.id,
-                        exc,
-                    )
-                    break
-                delay = base_sleep * (2 ** (attempt - 1))
-                logger.warning(
-                    "Retrying media download (attempt %s/%s) for channel=%s message=%s after %s",
-                    attempt + 1,
-                    max_attempts,
-                    message.peer_id,
-                    message.id,
-                    exc,
-                )
-                await asyncio.sleep(delay)
-            except Exception:
-                logger.exception("Unexpected failure while downloading media for channel=%s message=%s", message.peer_id, message.id)
-                break
-        return urls
 
+def _naive(value: datetime | None) -> datetime | None:
+    return value.replace(tzinfo=None) if value is not None and value.tzinfo else value
@@ -6,20 +6,19 @@ from pathlib import Path
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
 
+from app.auth import InitDataVerifier
 from app.config import Settings
-from app.db import create_engine, create_session_maker
-from app.ingest.telegram import TelegramIngestor
-from app.models import Base
-from app.repositories.events import EventsRepository, InMemoryEventsRepository
-from app.repositories.postgres import PostgresEventsRepository
-from app.repositories.users import InMemoryUsersRepository, UsersRepository
-from app.routers import debug, events, health, users
+from app.metrics import MetricsMiddleware
+from app.routers import debug, events, health, media, users
+from app.routers.events import NEXT_CURSOR_HEADER
+from app.storage import Storage, open_storage
 from app.tasks.polling import TelegramPollingService
+from app.tasks.updates import TelegramUpdatesService
+from app.worker import create_service, ingest_config_error
 
 logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger("app.main")
 
 settings = Settings()
 app = FastAPI(title="tg-miniapp-backend")
@@ -31,61 +30,64 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag", "Last-Modified"],
 )
+app.add_middleware(MetricsMiddleware)
 
-events_repo: EventsRepository
-users_repo: UsersRepository
-engine: AsyncEngine | None = None
-session_factory: async_sessionmaker[AsyncSession] | None = None
-polling_service: TelegramPollingService | None = None
-polling_task: asyncio.Task | None = None
+storage: Storage | None = None
+ingest_service: TelegramPollingService | TelegramUpdatesService | None = None
+ingest_task: asyncio.Task | None = None
 
 
 @app.on_event("startup")
 async def startup_event() -> None:
-    global events_repo, users_repo, engine, session_factory, polling_service, polling_task
-    if settings.postgres_dsn:
-        engine = create_engine(settings.postgres_dsn)
-        session_factory = create_session_maker(engine)
-        async with engine.begin() as conn:  # type: ignore[union-attr]
-            await conn.run_sync(Base.metadata.create_all)
-        events_repo = PostgresEventsRepository(session_factory)
-        from app.repositories.users import PostgresUsersRepository
-
-        users_repo = PostgresUsersRepository(session_factory)
-    else:
-        events_repo = InMemoryEventsRepository()
-        users_repo = InMemoryUsersRepository()
-    app.state.events_repo = events_repo
-    app.state.users_repo = users_repo
-
-    if (
-        settings.telegram_polling_enabled
-        and settings.telegram_channel_ids
-        and (settings.telegram_bot_token or settings.telegram_session_string)
-    ):
-        ingestor = TelegramIngestor(settings=settings, repo=events_repo)
-        service = TelegramPollingService(ingestor=ingestor, interval_seconds=settings.bot_polling_interval)
-        polling_service = service
-        polling_task = asyncio.create_task(service.run())
+    global storage, ingest_service, ingest_task
+    # With Postgres, Telegram ingestion runs in python -m app.worker and API processes skip
+    # near-duplicate folding; posts sent to POST /events/ingest are stored as is. The in-memory
+    # store cannot be shared with a worker, so the API ingests itself, as a single process.
+    in_process = settings.telegram_polling_enabled and not settings.postgres_dsn
+    storage = await open_storage(settings, dedup=in_process)
+    storage.broadcaster.start()
+    app.state.settings = settings
+    app.state.media_root = MEDIA_ROOT
+    app.state.db_engines = storage.engines
+    app.state.redis = storage.redis
+    app.state.event_broadcaster = storage.broadcaster
+    app.state.events_repo = storage.events
+    app.state.users_repo = storage.users
+    app.state.cursors_repo = storage.cursors
+    app.state.init_data_verifier = (
+        InitDataVerifier(
+            settings.telegram_bot_token,
+            max_age_seconds=settings.telegram_auth_max_age,
+            cache_size=settings.telegram_auth_cache_size,
+            cache_ttl_seconds=settings.telegram_auth_cache_ttl,
+        )
+        if settings.telegram_bot_token
+        else None
+    )
+    if in_process:
+        error = ingest_config_error(settings)
+        if error is not None:
+            raise RuntimeError(f"TELEGRAM_POLLING_ENABLED without POSTGRES_DSN ingests in the API: {error}")
+        ingest_service = create_service(settings, storage)
+        ingest_task = asyncio.create_task(ingest_service.run())
+    elif settings.telegram_polling_enabled:
+        logger.info("Telegram ingestion runs in python -m app.worker, not in API processes")
 
 
 @app.on_event("shutdown")
 async def shutdown_event() -> None:
-    if polling_service is not None:
-        polling_service.stop()
-    if polling_task is not None:
-        await polling_task
-    if engine is not None:
-        await engine.dispose()  # type: ignore[union-attr]
+    if ingest_service is not None:
+        ingest_service.stop()
+    if ingest_task is not None:
+        await ingest_task
+    if storage is not None:
+        await storage.close()
 
 
 app.include_router(health.router)
 app.include_router(debug.router)
 app.include_router(events.router)
 app.include_router(users.router)
-
-app.mount("/media", StaticFiles(directory=MEDIA_ROOT, html=False), name="media")
-
-
-
+app.include_router(media.router)
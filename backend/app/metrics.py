@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+import functools
+import os
+import time
+import weakref
+from typing import Any, Awaitable, Callable, Iterator, TypeVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+T = TypeVar("T")
+
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_SLOW_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+TELEGRAM_FETCH_SECONDS = Histogram(
+    "telegram_fetch_seconds", "Time to fetch one channel's new messages", ["channel", "mode"], buckets=_SLOW_BUCKETS
+)
+TELEGRAM_FLOOD_WAIT_SECONDS = Histogram(
+    "telegram_flood_wait_seconds",
+    "FloodWait durations imposed by Telegram",
+    ["operation"],
+    buckets=(1, 5, 15, 30, 60, 300, 900, 3600, 86400),
+)
+INGEST_MESSAGE_SECONDS = Histogram(
+    "ingest_message_seconds", "Time from a message being fetched to its row being written", buckets=_SLOW_BUCKETS
+)
+INGEST_FLUSH_SECONDS = Histogram(
+    "ingest_flush_seconds", "Extraction plus upsert time for one flushed batch", buckets=_FAST_BUCKETS
+)
+INGESTED_MESSAGES = Counter("ingested_messages", "Messages written by the Telegram ingestor")
+MEDIA_DOWNLOAD_SECONDS = Histogram(
+    "media_download_seconds", "Duration of successful media downloads", buckets=_SLOW_BUCKETS
+)
+MEDIA_DOWNLOAD_BYTES = Histogram(
+    "media_download_bytes",
+    "Size of downloaded media files",
+    buckets=(16_384, 65_536, 262_144, 1_048_576, 4_194_304, 16_777_216, 67_108_864),
+)
+MEDIA_DOWNLOAD_FAILURES = Counter("media_download_failures", "Media jobs that ended without a file")
+MEDIA_VARIANT_SECONDS = Histogram(
+    "media_variant_seconds", "Time to render the WebP variants of one image", buckets=_SLOW_BUCKETS
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "HTTP request latency", ["method", "route", "status"], buckets=_FAST_BUCKETS
+)
+REPOSITORY_CALL_SECONDS = Histogram(
+    "repository_call_seconds", "Latency of repository calls", ["repository", "method"], buckets=_FAST_BUCKETS
+)
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_seconds", "Time spent waiting for a pooled database connection", buckets=_FAST_BUCKETS
+)
+
+
+def timed_repository(repository: str) -> Callable[[Callable[..., Awaitable[T]]], Callable[..., Awaitable[T]]]:
+    """Decorate an async repository method to record its latency."""
+
+    def decorate(method: Callable[..., Awaitable[T]]) -> Callable[..., Awaitable[T]]:
+        # Resolve the labelled child once instead of on every call.
+        histogram = REPOSITORY_CALL_SECONDS.labels(repository, method.__name__)
+
+        @functools.wraps(method)
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - started)
+
+        return wrapper
+
+    return decorate
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
+
+    def _do_get(self) -> Any:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+class _PoolCollector:
+    def __init__(self) -> None:
+        self._engines: weakref.WeakValueDictionary[str, AsyncEngine] = weakref.WeakValueDictionary()
+
+    def track(self, name: str, engine: AsyncEngine) -> None:
+        self._engines[name] = engine
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        # Pools live in process memory, so with several workers each scrape reports the
+        # pools of whichever worker served it; the pid label keeps their series apart.
+        pid = str(os.getpid()) if os.environ.get("PROMETHEUS_MULTIPROC_DIR") else None
+        labels = ["engine"] if pid is None else ["engine", "pid"]
+        families = {
+            "size": GaugeMetricFamily("db_pool_size", "Configured pool size", labels=labels),
+            "checkedout": GaugeMetricFamily("db_pool_checked_out", "Connections in use", labels=labels),
+            "checkedin": GaugeMetricFamily("db_pool_checked_in", "Idle pooled connections", labels=labels),
+            "overflow": GaugeMetricFamily("db_pool_overflow", "Connections above pool size", labels=labels),
+        }
+        for name, engine in list(self._engines.items()):
+            pool = engine.pool
+            for attribute, family in families.items():
+                reader = getattr(pool, attribute, None)
+                if reader is not None:
+                    family.add_metric([name] if pid is None else [name, pid], float(reader()))
+        yield from families.values()
+
+
+_POOLS = _PoolCollector()
+REGISTRY.register(_POOLS)  # type: ignore[arg-type]
+
+
+def track_engine(name: str, engine: AsyncEngine) -> None:
+    _POOLS.track(name, engine)
+
+
+def render_latest() -> tuple[bytes, str]:
+    """Exposition for /metrics; aggregates all workers when PROMETHEUS_MULTIPROC_DIR is set."""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+        registry.register(_POOLS)  # type: ignore[arg-type]
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency per route template."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope; use its template so
+            # path parameters do not explode label cardinality.
+            route = scope.get("route")
+            path = getattr(route, "path", None) or scope.get("root_path") or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope["method"], path, str(status)).observe(time.perf_counter() - started)
@@ -0,0 +1,144 @@
+"""One-off schema migrations too heavy for start-up.
+
+Run ``python -m app.migrate`` once per database before (or while) the new API
+version rolls out; every step is idempotent, so re-running it is harmless. The
+API only applies cheap ``SCHEMA_PATCHES`` at start-up: anything here would hold
+an exclusive lock on ``events`` for as long as it takes to rewrite the table.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import Settings
+from app.db import create_engine
+from app.models import SCHEMA_PATCHES, Base
+
+logger = logging.getLogger("app.migrate")
+
+# Rows rewritten per transaction while backfilling, so locks and WAL bursts stay short.
+BACKFILL_BATCH_SIZE = 5_000
+
+# Full-text search: stemmed Russian plus unstemmed 'simple' tokens. The column is
+# left out of the ORM model so listings and RETURNING never ship it.
+SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('russian', coalesce({row}title, '')), 'A')"
+    " || setweight(to_tsvector('russian', coalesce({row}description, '')), 'B')"
+    " || setweight(to_tsvector('simple', coalesce({row}description, '')), 'C')"
+)
+
+
+async def _is_generated(conn: AsyncConnection, table: str, column: str) -> bool:
+    result = await conn.execute(
+        text(
+            "SELECT is_generated FROM information_schema.columns"
+            " WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column"
+        ),
+        {"table": table, "column": column},
+    )
+    return result.scalar_one_or_none() == "ALWAYS"
+
+
+async def search_vector_ready(conn: AsyncConnection) -> bool:
+    """Whether ``migrate_search_vector`` has run against this database."""
+    result = await conn.execute(
+        text(
+            "SELECT 1 FROM information_schema.columns"
+            " WHERE table_schema = current_schema() AND table_name = 'events' AND column_name = 'search_vector'"
+        )
+    )
+    return result.first() is not None
+
+
+async def _create_index_concurrently(engine: AsyncEngine, name: str, definition: str) -> None:
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        # An interrupted concurrent build leaves an invalid index that IF NOT EXISTS would keep.
+        invalid = await conn.execute(
+            text(
+                "SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid"
+                " WHERE pg_class.relname = :name AND NOT pg_index.indisvalid"
+            ),
+            {"name": name},
+        )
+        if invalid.first() is not None:
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+        await conn.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} {definition}"))
+    logger.info("Index %s is in place", name)
+
+
+async def migrate_search_vector(engine: AsyncEngine) -> None:
+    """Add ``events.search_vector``, kept current by a trigger, and its GIN index.
+
+    A nullable column without a default is a catalog-only change; the backfill then
+    rewrites rows in small batches instead of the whole table under one lock.
+    Databases that already carry the old STORED generated column keep it.
+    """
+    async with engine.begin() as conn:
+        generated = await _is_generated(conn, "events", "search_vector")
+        if not generated:
+            await conn.execute(text("ALTER TABLE events ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+            await conn.execute(
+                text(
+                    "CREATE OR REPLACE FUNCTION events_search_vector_update() RETURNS trigger AS $$"
+                    f" BEGIN NEW.search_vector := {SEARCH_VECTOR_SQL.format(row='NEW.')}; RETURN NEW; END"
+                    " $$ LANGUAGE plpgsql"
+                )
+            )
+            await conn.execute(text("DROP TRIGGER IF EXISTS events_search_vector ON events"))
+            await conn.execute(
+                text(
+                    "CREATE TRIGGER events_search_vector BEFORE INSERT OR UPDATE OF title, description"
+                    " ON events FOR EACH ROW EXECUTE FUNCTION events_search_vector_update()"
+                )
+            )
+    if not generated:
+        # New rows are covered by the trigger from here on; fill in the old ones.
+        backfilled = 0
+        while True:
+            async with engine.begin() as conn:
+                result = await conn.execute(
+                    text(
+                        f"UPDATE events SET search_vector = {SEARCH_VECTOR_SQL.format(row='')}"
+                        " WHERE id IN (SELECT id FROM events WHERE search_vector IS NULL LIMIT :batch)"
+                    ),
+                    {"batch": BACKFILL_BATCH_SIZE},
+                )
+            if not result.rowcount:
+                break
+            backfilled += result.rowcount
+            logger.info("Backfilled search_vector for %s events", backfilled)
+    await _create_index_concurrently(engine, "ix_events_search_vector", "ON events USING gin (search_vector)")
+
+
+async def run_migrations(settings: Settings) -> None:
+    engine = create_engine(settings.postgres_dsn or "", pool_size=1, max_overflow=0)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for statement in SCHEMA_PATCHES:
+                await conn.execute(text(statement))
+        await migrate_search_vector(engine)
+        await _create_index_concurrently(
+            engine, "ix_events_media_pending", "ON events (channel) WHERE media_pending"
+        )
+    finally:
+        await engine.dispose()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    settings = Settings()
+    if not settings.postgres_dsn:
+        logger.error("POSTGRES_DSN is required; the in-memory store has nothing to migrate")
+        sys.exit(1)
+    asyncio.run(run_migrations(settings))
+    logger.info("Migrations complete")
+
+
+if __name__ == "__main__":
+    main()
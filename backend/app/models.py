@@ -4,7 +4,7 @@ from datetime import datetime
 from typing import Optional
 from uuid import uuid4
 
-from sqlalchemy import BigInteger, DateTime, String, Text, UniqueConstraint, JSON
+from sqlalchemy import BigInteger, Boolean, DateTime, Index, LargeBinary, String, Text, UniqueConstraint, JSON, false, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
@@ -13,9 +13,28 @@ class Base(DeclarativeBase):
     pass
 
 
+# create_all() only creates missing tables; columns added to existing tables go here.
+SCHEMA_PATCHES: list[str] = [
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS media_pending BOOLEAN NOT NULL DEFAULT false",
+    "CREATE INDEX IF NOT EXISTS ix_events_created_at_id ON events (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_events_channel_created_at_id ON events (channel, created_at, id)",
+    # events.search_vector rewrites the whole table, so it ships as a one-off: python -m app.migrate.
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS alternate_sources JSON NOT NULL DEFAULT '[]'",
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS dedup_signature BYTEA",
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS edited_at TIMESTAMP WITHOUT TIME ZONE",
+    "ALTER TABLE events ADD COLUMN IF NOT EXISTS media_variants JSON NOT NULL DEFAULT '{}'",
+]
+
+
 class Event(Base):
     __tablename__ = "events"
-    __table_args__ = (UniqueConstraint("channel", "message_id", name="uq_channel_message"),)
+    __table_args__ = (
+        UniqueConstraint("channel", "message_id", name="uq_channel_message"),
+        Index("ix_events_created_at_id", "created_at", "id"),
+        Index("ix_events_channel_created_at_id", "channel", "created_at", "id"),
+        # Only the handful of rows still waiting for a download; python -m app.migrate adds it to old tables.
+        Index("ix_events_media_pending", "channel", postgresql_where=text("media_pending")),
+    )
 
     id: Mapped[str] = mapped_column(UUID(as_uuid=False), primary_key=True, default=lambda: uuid4().hex)
     title: Mapped[str] = mapped_column(String(255))
@@ -24,13 +43,31 @@ class Event(Base):
     message_id: Mapped[int] = mapped_column(index=True)
     event_time: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=False), nullable=True)
     media_urls: Mapped[list[str]] = mapped_column(JSON, nullable=False, default=list)
+    media_pending: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False, server_default=false())
+    media_variants: Mapped[dict] = mapped_column(JSON, nullable=False, default=dict, server_default=text("'{}'"))
     location: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     price: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
     category: Mapped[Optional[str]] = mapped_column(String(128), nullable=True)
     source_link: Mapped[Optional[str]] = mapped_column(String(512), nullable=True)
+    alternate_sources: Mapped[list[dict]] = mapped_column(
+        JSON, nullable=False, default=list, server_default=text("'[]'")
+    )
+    # Only read when the near-duplicate index is warmed at startup.
+    dedup_signature: Mapped[Optional[bytes]] = mapped_column(LargeBinary, nullable=True, deferred=True)
+    edited_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=False), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), default=datetime.utcnow)
 
 
+class ChannelCursor(Base):
+    __tablename__ = "channel_cursors"
+
+    channel: Mapped[str] = mapped_column(String(128), primary_key=True)
+    last_message_id: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    first_message_id: Mapped[int] = mapped_column(BigInteger, default=0, nullable=False)
+    backfilled: Mapped[int] = mapped_column(default=0, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=False), default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class User(Base):
     __tablename__ = "users"
     __table_args__ = (UniqueConstraint("telegram_id", name="uq_users_telegram_id"),)
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import base64
+import binascii
+from datetime import datetime
+
+from app.schemas import EventCard
+
+# Keyset position in the (created_at, id) ordering used by every event listing.
+EventCursor = tuple[datetime, str]
+# Search results are ordered by (rank, created_at, id) instead.
+SearchCursor = tuple[float, datetime, str]
+
+
+def _encode(raw: str) -> str:
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode(value: str) -> list[str]:
+    pad = "=" * ((4 - (len(value) % 4)) % 4)
+    return base64.urlsafe_b64decode(value + pad).decode().split("|")
+
+
+def encode_cursor(card: EventCard) -> str:
+    return _encode(f"{card.created_at.isoformat()}|{card.id}")
+
+
+def decode_cursor(value: str) -> EventCursor:
+    try:
+        created_at, event_id = _decode(value)
+        return datetime.fromisoformat(created_at), event_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def encode_search_cursor(rank: float, card: EventCard) -> str:
+    return _encode(f"{rank!r}|{card.created_at.isoformat()}|{card.id}")
+
+
+def decode_search_cursor(value: str) -> SearchCursor:
+    try:
+        rank, created_at, event_id = _decode(value)
+        return float(rank), datetime.fromisoformat(created_at), event_id
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def next_cursor(cards: list[EventCard], limit: int) -> str | None:
+    if len(cards) < limit or not cards:
+        return None
+    return encode_cursor(cards[-1])
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Awaitable, Callable, Sequence
+
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.pagination import EventCursor, SearchCursor
+from app.repositories.events import EventsRepository, ListingVersion
+from app.schemas import EventCard, EventIngestRequest, EventSource, MediaVariant
+from app.serialization import dump_cards
+
+logger = logging.getLogger(__name__)
+
+_CARDS = TypeAdapter(list[EventCard])
+GLOBAL_SCOPE = "all"
+
+
+class _LRU:
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._items: OrderedDict[str, list[EventCard]] = OrderedDict()
+
+    def get(self, key: str) -> list[EventCard] | None:
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def clear(self) -> None:
+        self._items.clear()
+
+    def put(self, key: str, value: list[EventCard]) -> None:
+        if self._max_size <= 0:
+            return
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while len(self._items) > self._max_size:
+            self._items.popitem(last=False)
+
+
+class CachedEventsRepository(EventsRepository):
+    """Read-through cache for event listings: in-process LRU in front of Redis.
+
+    Every listing scope (the global feed and each channel) has a version counter in
+    Redis. Writes bump the counters of the scopes they touch, which orphans the old
+    pages instead of deleting them; they expire through the Redis TTL. Workers re-read
+    a scope's version at most every ``version_ttl_seconds``. Counters are bumped after
+    the write commits, which also makes them safe to hand out as listing ETags.
+
+    After a Redis error, reads go straight to the repository for
+    ``retry_after_seconds`` rather than waiting out a socket timeout per request.
+    Media downloads finish one at a time, so their bumps are batched over
+    ``media_invalidation_delay`` seconds instead of emptying the cache each time.
+    Pages of a scope written less than ``replica_lag_seconds`` ago are loaded from
+    the primary, so a lagging replica never fills the new version.
+    """
+
+    def __init__(
+        self,
+        inner: EventsRepository,
+        redis: Redis,
+        ttl_seconds: int = 60,
+        local_max_size: int = 256,
+        version_ttl_seconds: float = 1.0,
+        prefix: str = "events",
+        retry_after_seconds: float = 5.0,
+        media_invalidation_delay: float = 1.0,
+        replica_lag_seconds: float = 5.0,
+    ) -> None:
+        self._inner = inner
+        self._redis = redis
+        self._ttl = ttl_seconds
+        self._local = _LRU(local_max_size)
+        self._version_ttl = version_ttl_seconds
+        self._prefix = prefix
+        self._versions: dict[str, tuple[int, float | None, float]] = {}
+        self._retry_after = retry_after_seconds
+        self._replica_lag = replica_lag_seconds
+        self._down_until = 0.0
+        self._media_delay = media_invalidation_delay
+        self._media_channels: set[str] = set()
+        self._media_flush: asyncio.Task[None] | None = None
+
+    async def upsert(self, request: EventIngestRequest) -> EventCard:
+        card = await self._inner.upsert(request)
+        await self._invalidate([request.channel])
+        return card
+
+    async def upsert_many(self, requests: Sequence[EventIngestRequest]) -> list[EventCard]:
+        cards = await self._inner.upsert_many(requests)
+        await self._invalidate({request.channel for request in requests})
+        return cards
+
+    async def set_media(
+        self,
+        channel: str,
+        message_id: int,
+        media_urls: list[str],
+        media_variants: dict[str, list[MediaVariant]] | None = None,
+    ) -> EventCard | None:
+        card = await self._inner.set_media(channel, message_id, media_urls, media_variants)
+        if self._media_delay <= 0:
+            await self._invalidate([channel])
+            return card
+        self._media_channels.add(channel)
+        if self._media_flush is None or self._media_flush.done():
+            self._media_flush = asyncio.create_task(self._flush_media_invalidations())
+        return card
+
+    async def pending_media(self, channels: Sequence[str], limit: int = 100) -> list[tuple[str, int]]:
+        return await self._inner.pending_media(channels, limit)
+
+    async def existing(self, keys: Sequence[tuple[str, int]]) -> set[tuple[str, int]]:
+        return await self._inner.existing(keys)
+
+    async def add_sources(self, event_id: str, sources: Sequence[EventSource]) -> EventCard | None:
+        card = await self._inner.add_sources(event_id, sources)
+        if card is not None:
+            await self._invalidate([card.channel])
+        return card
+
+    async def list_recent(
+        self, limit: int = 50, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        return await self._cached(
+            GLOBAL_SCOPE,
+            limit,
+            before,
+            lambda fresh: self._inner.list_recent(limit=limit, before=before, primary=primary or fresh),
+        )
+
+    async def list_by_channel(
+        self, channel: str, limit: int = 20, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        return await self._cached(
+            f"ch:{channel}",
+            limit,
+            before,
+            lambda fresh: self._inner.list_by_channel(
+                channel=channel, limit=limit, before=before, primary=primary or fresh
+            ),
+        )
+
+    async def search(
+        self, query: str, limit: int = 20, before: SearchCursor | None = None
+    ) -> list[tuple[EventCard, float]]:
+        return await self._inner.search(query, limit=limit, before=before)
+
+    async def version(self, channel: str | None = None) -> ListingVersion | None:
+        scope = GLOBAL_SCOPE if channel is None else f"ch:{channel}"
+        if self._redis_down():
+            return await self._inner.version(channel)
+        try:
+            version, modified = await self._scope_version(scope)
+        except RedisError:
+            self._trip("no version for %s", scope)
+            return await self._inner.version(channel)
+        if modified is None:
+            # Never written since Redis was last flushed; a bare counter could repeat.
+            return await self._inner.version(channel)
+        return ListingVersion(f"{version}.{modified:.6f}", datetime.utcfromtimestamp(modified))
+
+    async def _cached(
+        self,
+        scope: str,
+        limit: int,
+        before: EventCursor | None,
+        load: Callable[[bool], Awaitable[list[EventCard]]],
+    ) -> list[EventCard]:
+        if self._redis_down():
+            return await load(False)
+        try:
+            version, modified = await self._scope_version(scope)
+        except RedisError:
+            self._trip("reading %s from the repository", scope)
+            return await load(False)
+        key = self._page_key(scope, version, limit, before)
+        cards = self._local.get(key)
+        if cards is not None:
+            return cards
+        try:
+            raw = await self._redis.get(key)
+        except RedisError:
+            self._trip("page read failed for %s", key)
+            raw = None
+        if raw is not None:
+            cards = _CARDS.validate_json(raw)
+        else:
+            # Right after a write a replica may not have it yet, and its page would be
+            # cached under the new version; read those from the primary instead.
+            fresh = modified is not None and time.time() - modified < self._replica_lag
+            cards = await load(fresh)
+            if not self._redis_down():
+                try:
+                    await self._redis.set(key, dump_cards(cards), ex=self._ttl)
+                except RedisError:
+                    self._trip("page write failed for %s", key)
+        self._local.put(key, cards)
+        return cards
+
+    async def _scope_version(self, scope: str) -> tuple[int, float | None]:
+        cached = self._versions.get(scope)
+        now = time.monotonic()
+        if cached is not None and now - cached[2] < self._version_ttl:
+            return cached[0], cached[1]
+        raw_version, raw_modified = await self._redis.mget(self._version_key(scope), self._modified_key(scope))
+        version = int(raw_version) if raw_version is not None else 0
+        modified = float(raw_modified) if raw_modified is not None else None
+        self._versions[scope] = (version, modified, now)
+        return version, modified
+
+    def _redis_down(self) -> bool:
+        return time.monotonic() < self._down_until
+
+    def _trip(self, message: str, *args: object) -> None:
+        logger.warning(
+            "Events cache unavailable, bypassing it for %ss: " + message, self._retry_after, *args, exc_info=True
+        )
+        self._down_until = time.monotonic() + self._retry_after
+
+    async def _flush_media_invalidations(self) -> None:
+        await asyncio.sleep(self._media_delay)
+        channels, self._media_channels = self._media_channels, set()
+        self._media_flush = None
+        await self._invalidate(channels)
+
+    async def _invalidate(self, channels: Sequence[str] | set[str]) -> None:
+        scopes = [GLOBAL_SCOPE, *(f"ch:{channel}" for channel in channels)]
+        modified = time.time()
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for scope in scopes:
+                    pipe.incr(self._version_key(scope))
+                    pipe.set(self._modified_key(scope), repr(modified))
+                versions = (await pipe.execute())[::2]
+        except RedisError:
+            self._trip("invalidation failed for %s scopes", len(scopes))
+            # Drop this worker's view so it at least sees its own writes.
+            self._versions.clear()
+            self._local.clear()
+            return
+        now = time.monotonic()
+        for scope, version in zip(scopes, versions):
+            self._versions[scope] = (int(version), modified, now)
+
+    def _version_key(self, scope: str) -> str:
+        return f"{self._prefix}:ver:{scope}"
+
+    def _modified_key(self, scope: str) -> str:
+        return f"{self._prefix}:mod:{scope}"
+
+    def _page_key(self, scope: str, version: int, limit: int, before: EventCursor | None) -> str:
+        position = "head" if before is None else f"{before[0].isoformat()}|{before[1]}"
+        return f"{self._prefix}:page:{scope}:{version}:{limit}:{position}"
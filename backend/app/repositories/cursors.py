@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Protocol, Sequence
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.metrics import timed_repository
+from app.models import ChannelCursor
+from app.schemas import ChannelCursorState
+
+
+class ChannelCursorsRepository(Protocol):
+    async def get_all(self) -> dict[str, ChannelCursorState]: ...
+
+    async def save_many(self, cursors: Sequence[ChannelCursorState]) -> None: ...
+
+
+class InMemoryChannelCursorsRepository(ChannelCursorsRepository):
+    def __init__(self) -> None:
+        self._store: dict[str, ChannelCursorState] = {}
+
+    async def get_all(self) -> dict[str, ChannelCursorState]:
+        return {channel: cursor.model_copy() for channel, cursor in self._store.items()}
+
+    async def save_many(self, cursors: Sequence[ChannelCursorState]) -> None:
+        for cursor in cursors:
+            self._store[cursor.channel] = cursor.model_copy()
+
+
+class PostgresChannelCursorsRepository(ChannelCursorsRepository):
+    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+        self._session_factory = session_factory
+
+    @timed_repository("cursors")
+    async def get_all(self) -> dict[str, ChannelCursorState]:
+        async with self._session_factory() as session:
+            result = await session.scalars(select(ChannelCursor))
+            return {row.channel: self._to_state(row) for row in result.all()}
+
+    @timed_repository("cursors")
+    async def save_many(self, cursors: Sequence[ChannelCursorState]) -> None:
+        if not cursors:
+            return
+        table = ChannelCursor.__table__
+        now = datetime.utcnow()
+        stmt = pg_insert(table).values(
+            [
+                {
+                    "channel": cursor.channel,
+                    "last_message_id": cursor.last_message_id,
+                    "first_message_id": cursor.first_message_id,
+                    "backfilled": cursor.backfilled,
+                    "updated_at": now,
+                }
+                for cursor in cursors
+            ]
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.channel],
+            set_={
+                # Never move the high-water mark backwards, even if two writers race.
+                "last_message_id": func.greatest(table.c.last_message_id, stmt.excluded.last_message_id),
+                "first_message_id": stmt.excluded.first_message_id,
+                "backfilled": stmt.excluded.backfilled,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        async with self._session_factory() as session:
+            await session.execute(stmt)
+            await session.commit()
+
+    @staticmethod
+    def _to_state(row: ChannelCursor) -> ChannelCursorState:
+        return ChannelCursorState(
+            channel=row.channel,
+            last_message_id=row.last_message_id,
+            first_message_id=row.first_message_id,
+            backfilled=row.backfilled,
+        )
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Iterable, Sequence
+
+from app.dedup import NearDuplicateIndex, RedisNearDuplicateIndex, signature
+from app.pagination import EventCursor, SearchCursor
+from app.repositories.events import EventsRepository, ListingVersion
+from app.schemas import EventCard, EventIngestRequest, EventSource, MediaVariant
+
+logger = logging.getLogger(__name__)
+
+
+class DedupingEventsRepository(EventsRepository):
+    """Folds cross-channel reposts into the first event seen instead of new rows.
+
+    Each upserted message is signed and looked up in a NearDuplicateIndex, or in the
+    RedisNearDuplicateIndex that sharded ingestion workers share; a match
+    from another channel is recorded as an alternate source of that canonical event
+    and its card is returned in place of a new one. Same-channel matches are kept
+    apart, since channels repeat their own templates for recurring events. Messages
+    already stored as events of their own are never folded, so their re-polls and
+    edits keep updating that row.
+    """
+
+    def __init__(
+        self,
+        inner: EventsRepository,
+        index: NearDuplicateIndex | RedisNearDuplicateIndex,
+        min_tokens: int = 10,
+    ) -> None:
+        self._inner = inner
+        self._index = index
+        self._min_tokens = min_tokens
+
+    async def warm(self, entries: Iterable[tuple[str, str, datetime, bytes]]) -> None:
+        count = await self._index.add_many(
+            (event_id, channel, sig, seen_at) for event_id, channel, seen_at, sig in entries
+        )
+        logger.info("Near-duplicate index warmed with %s events", count)
+
+    async def upsert(self, request: EventIngestRequest) -> EventCard:
+        return (await self.upsert_many([request]))[0]
+
+    async def upsert_many(self, requests: Sequence[EventIngestRequest]) -> list[EventCard]:
+        now = datetime.utcnow()
+        # Reposts can arrive in the same batch as their original, so batch members are
+        # matched against each other too, keyed by position until they have ids.
+        batch_index = self._index.empty_copy()
+        signed = [request.dedup_signature or signature(request.text, self._min_tokens) for request in requests]
+        # Messages stored as events of their own (re-polls, edits) update that row and are never folded.
+        stored = await self._inner.existing(
+            [(request.channel, request.message_id) for request, sig in zip(requests, signed) if sig is not None]
+        )
+        lookups = [
+            (position, (sig, request.channel, request.published_at or now))
+            for position, (request, sig) in enumerate(zip(requests, signed))
+            if sig is not None and (request.channel, request.message_id) not in stored
+        ]
+        # One round trip for the whole batch when the index lives in Redis.
+        matched = dict(
+            zip((position for position, _ in lookups), await self._index.match_many([item for _, item in lookups]))
+        )
+        fresh: list[EventIngestRequest] = []
+        fresh_positions: list[int] = []
+        targets: list[str | None] = []
+        for position, (request, sig) in enumerate(zip(requests, signed)):
+            target = None
+            if sig is not None:
+                if position in matched:
+                    target = matched[position] or batch_index.match(sig, request.channel, request.published_at or now)
+                request = request.signed(sig)
+            targets.append(target)
+            if target is None:
+                if sig is not None:
+                    batch_index.add(f"#{position}", request.channel, sig, request.published_at or now)
+                fresh.append(request)
+                fresh_positions.append(position)
+
+        created = await self._inner.upsert_many(fresh)
+        card_at = dict(zip(fresh_positions, created))
+        # Re-ingested messages return their existing row, which is indexed already unless this edited it.
+        await self._index.add_many(
+            (card.id, card.channel, request.dedup_signature, request.published_at or now)
+            for request, card in zip(fresh, created)
+            if request.dedup_signature is not None
+            and (card.created_at >= now or (request.edited_at is not None and card.edited_at == request.edited_at))
+        )
+
+        merges: dict[str, list[EventSource]] = {}
+        for position, target in enumerate(targets):
+            if target is None:
+                continue
+            event_id = card_at[int(target[1:])].id if target.startswith("#") else target
+            targets[position] = event_id
+            request = requests[position]
+            merges.setdefault(event_id, []).append(EventSource(channel=request.channel, message_id=request.message_id))
+        merged = {event_id: await self._inner.add_sources(event_id, sources) for event_id, sources in merges.items()}
+
+        results: list[EventCard] = []
+        for position, (request, target) in enumerate(zip(requests, targets)):
+            if target is None:
+                results.append(card_at[position])
+            elif merged.get(target) is not None:
+                results.append(merged[target])  # type: ignore[arg-type]
+            else:
+                # The canonical row is gone, e.g. written by another store; keep the post itself.
+                results.append(await self._inner.upsert(request))
+        return results
+
+    async def set_media(
+        self,
+        channel: str,
+        message_id: int,
+        media_urls: list[str],
+        media_variants: dict[str, list[MediaVariant]] | None = None,
+    ) -> EventCard | None:
+        return await self._inner.set_media(channel, message_id, media_urls, media_variants)
+
+    async def pending_media(self, channels: Sequence[str], limit: int = 100) -> list[tuple[str, int]]:
+        return await self._inner.pending_media(channels, limit)
+
+    async def existing(self, keys: Sequence[tuple[str, int]]) -> set[tuple[str, int]]:
+        return await self._inner.existing(keys)
+
+    async def add_sources(self, event_id: str, sources: Sequence[EventSource]) -> EventCard | None:
+        return await self._inner.add_sources(event_id, sources)
+
+    async def list_recent(
+        self, limit: int = 50, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        return await self._inner.list_recent(limit=limit, before=before, primary=primary)
+
+    async def list_by_channel(
+        self, channel: str, limit: int = 20, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        return await self._inner.list_by_channel(channel=channel, limit=limit, before=before, primary=primary)
+
+    async def search(
+        self, query: str, limit: int = 20, before: SearchCursor | None = None
+    ) -> list[tuple[EventCard, float]]:
+        return await self._inner.search(query, limit=limit, before=before)
+
+    async def version(self, channel: str | None = None) -> ListingVersion | None:
+        return await self._inner.version(channel)
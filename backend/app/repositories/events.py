@@ -1,63 +1,232 @@
 from __future__ import annotations
 
+from bisect import bisect_left, insort
 from datetime import datetime
-from typing import Protocol
+from typing import NamedTuple, Protocol, Sequence
 from uuid import uuid4
 
-from app.schemas import EventCard, EventIngestRequest
+from app.pagination import EventCursor, SearchCursor
+from app.schemas import EventCard, EventIngestRequest, EventSource, MediaVariant
+from app.search import SEARCH_MAX_CANDIDATES, InvertedIndex
+
+
+class ListingVersion(NamedTuple):
+    """Identifies the state of a listing scope; changes whenever a write touches it."""
+
+    token: str
+    modified_at: datetime
 
 
 class EventsRepository(Protocol):
     async def upsert(self, request: EventIngestRequest) -> EventCard: ...
 
-    async def list_recent(self, limit: int = 50) -> list[EventCard]: ...
+    async def upsert_many(self, requests: Sequence[EventIngestRequest]) -> list[EventCard]: ...
+
+    async def set_media(
+        self,
+        channel: str,
+        message_id: int,
+        media_urls: list[str],
+        media_variants: dict[str, list[MediaVariant]] | None = None,
+    ) -> EventCard | None:
+        """Attach downloaded media to an event; returns the patched card, or None if it does not exist."""
+        ...
+
+    async def pending_media(self, channels: Sequence[str], limit: int = 100) -> list[tuple[str, int]]:
+        """(channel, message_id) of events in ``channels`` still waiting for media, newest first."""
+        ...
+
+    async def existing(self, keys: Sequence[tuple[str, int]]) -> set[tuple[str, int]]:
+        """The (channel, message_id) pairs among ``keys`` stored as events of their own."""
+        ...
+
+    async def add_sources(self, event_id: str, sources: Sequence[EventSource]) -> EventCard | None:
+        """Record reposts of an event; returns the updated card, or None if it does not exist."""
+        ...
+
+    async def list_recent(
+        self, limit: int = 50, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        """Newest events first; ``primary`` skips any read replica, for reads that must see the latest writes."""
+        ...
 
-    async def list_by_channel(self, channel: str, limit: int = 20) -> list[EventCard]: ...
+    async def list_by_channel(
+        self, channel: str, limit: int = 20, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]: ...
+
+    async def search(
+        self, query: str, limit: int = 20, before: SearchCursor | None = None
+    ) -> list[tuple[EventCard, float]]: ...
+
+    async def version(self, channel: str | None = None) -> ListingVersion | None:
+        """Version of the global feed, or of one channel; None if it cannot be had cheaply."""
+        ...
+
+
+def _recency_key(card: EventCard) -> tuple[datetime, str]:
+    return card.created_at, card.id
+
+
+def merge_sources(existing: Sequence[dict | EventSource], new: Sequence[EventSource]) -> list[dict]:
+    merged = [source if isinstance(source, dict) else source.model_dump() for source in existing]
+    seen = {(source["channel"], source["message_id"]) for source in merged}
+    for source in new:
+        if (source.channel, source.message_id) not in seen:
+            seen.add((source.channel, source.message_id))
+            merged.append(source.model_dump())
+    return merged
 
 
 class InMemoryEventsRepository(EventsRepository):
-    def __init__(self) -> None:
+    """Event store indexed for O(1) dedupe and O(k) top-k reads.
+
+    Cards are kept in ascending ``(created_at, id)`` order, both globally and per
+    channel, so the newest ``k`` are always the tail of a list and a keyset page
+    is one binary search away.
+    """
+
+    def __init__(self, search_max_candidates: int = SEARCH_MAX_CANDIDATES) -> None:
+        self._search_max_candidates = search_max_candidates
         self._store: dict[str, EventCard] = {}
+        self._by_channel_msg: dict[tuple[str, int], EventCard] = {}
+        self._recent: list[EventCard] = []
+        self._by_channel: dict[str, list[EventCard]] = {}
+        self._search_index = InvertedIndex()
+        self._changes: dict[str | None, tuple[int, datetime]] = {}
 
     async def upsert(self, request: EventIngestRequest) -> EventCard:
         existing = self._find_by_channel_msg(request.channel, request.message_id)
         if existing:
+            if not existing.media_urls:
+                if request.media_urls or request.media_pending != existing.media_pending:
+                    self._touch(existing.channel)
+                existing.media_urls = request.media_urls
+                existing.media_pending = request.media_pending
+            if request.edited_at is not None and (existing.edited_at is None or request.edited_at > existing.edited_at):
+                self._apply_edit(existing, request)
             return existing
         event_id = uuid4().hex
         card = EventCard(
             id=event_id,
-            title=request.text[:120] if request.text else "Untitled",
-            description=request.text,
-            channel=request.channel,
-            message_id=request.message_id,
-            event_time=request.published_at,
-            location=None,
-            price=None,
-            category=None,
-            source_link=None,
+            media_urls=request.media_urls,
+            media_pending=request.media_pending,
             created_at=datetime.utcnow(),
+            edited_at=request.edited_at,
+            **self._edited_fields(request),
         )
-        self._store[event_id] = card
+        self._index(card)
         return card
 
-    async def list_recent(self, limit: int = 50) -> list[EventCard]:
-        return sorted(self._store.values(), key=lambda item: item.created_at, reverse=True)[:limit]
+    @staticmethod
+    def _edited_fields(request: EventIngestRequest) -> dict[str, object]:
+        return {
+            "title": request.title or (request.text[:120] if request.text else "Untitled"),
+            "description": request.text,
+            "channel": request.channel,
+            "message_id": request.message_id,
+            "event_time": request.event_time or request.published_at,
+            "location": request.location,
+            "price": request.price,
+            "category": request.category,
+            "source_link": request.source_link,
+        }
 
-    async def list_by_channel(self, channel: str, limit: int = 20) -> list[EventCard]:
-        filtered = [card for card in self._store.values() if card.channel == channel]
-        sorted_cards = sorted(filtered, key=lambda item: item.created_at, reverse=True)
-        return sorted_cards[:limit]
+    def _apply_edit(self, card: EventCard, request: EventIngestRequest) -> None:
+        self._search_index.remove(card.id)
+        for name, value in self._edited_fields(request).items():
+            setattr(card, name, value)
+        card.edited_at = request.edited_at
+        self._search_index.add(card)
+        self._touch(card.channel)
 
-    def _find_by_channel_msg(self, channel: str, message_id: int) -> EventCard | None:
-        for card in self._store.values():
-            if card.channel == channel and card.message_id == message_id:
-                return card
-        return None
+    async def upsert_many(self, requests: Sequence[EventIngestRequest]) -> list[EventCard]:
+        return [await self.upsert(request) for request in requests]
+
+    async def set_media(
+        self,
+        channel: str,
+        message_id: int,
+        media_urls: list[str],
+        media_variants: dict[str, list[MediaVariant]] | None = None,
+    ) -> EventCard | None:
+        card = self._find_by_channel_msg(channel, message_id)
+        if card is not None:
+            card.media_urls = media_urls
+            card.media_variants = media_variants or {}
+            card.media_pending = False
+            self._touch(channel)
+        return card
+
+    async def pending_media(self, channels: Sequence[str], limit: int = 100) -> list[tuple[str, int]]:
+        pending = [card for channel in channels for card in self._by_channel.get(channel, []) if card.media_pending]
+        pending.sort(key=_recency_key, reverse=True)
+        return [(card.channel, card.message_id) for card in pending[:limit]]
+
+    async def existing(self, keys: Sequence[tuple[str, int]]) -> set[tuple[str, int]]:
+        return {key for key in keys if key in self._by_channel_msg}
+
+    async def add_sources(self, event_id: str, sources: Sequence[EventSource]) -> EventCard | None:
+        card = self._store.get(event_id)
+        if card is None:
+            return None
+        merged = merge_sources(card.alternate_sources, sources)
+        if len(merged) != len(card.alternate_sources):
+            card.alternate_sources = [EventSource(**source) for source in merged]
+            self._touch(card.channel)
+        return card
+
+    async def list_recent(
+        self, limit: int = 50, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        return self._page(self._recent, limit, before)
+
+    async def list_by_channel(
+        self, channel: str, limit: int = 20, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        return self._page(self._by_channel.get(channel, []), limit, before)
+
+    async def search(
+        self, query: str, limit: int = 20, before: SearchCursor | None = None
+    ) -> list[tuple[EventCard, float]]:
+        return self._search_index.search(query, self._store, limit, before, self._search_max_candidates)
 
+    async def version(self, channel: str | None = None) -> ListingVersion | None:
+        change = self._changes.get(channel)
+        if change is None:
+            return None
+        counter, modified_at = change
+        return ListingVersion(f"{counter}.{modified_at.timestamp():.6f}", modified_at)
+
+    def _touch(self, channel: str) -> None:
+        now = datetime.utcnow()
+        for scope in (None, channel):
+            counter = self._changes.get(scope, (0, now))[0]
+            self._changes[scope] = (counter + 1, now)
 
     def _find_by_channel_msg(self, channel: str, message_id: int) -> EventCard | None:
-        for card in self._store.values():
-            if card.channel == channel and card.message_id == message_id:
-                return card
-        return None
+        return self._by_channel_msg.get((channel, message_id))
+
+    def _index(self, card: EventCard) -> None:
+        self._store[card.id] = card
+        self._by_channel_msg[(card.channel, card.message_id)] = card
+        self._append_ordered(self._recent, card)
+        self._append_ordered(self._by_channel.setdefault(card.channel, []), card)
+        self._search_index.add(card)
+        self._touch(card.channel)
+
+    @staticmethod
+    def _append_ordered(cards: list[EventCard], card: EventCard) -> None:
+        # created_at comes from utcnow(), so new cards almost always belong at the tail;
+        # fall back to a binary insert if the wall clock stepped backwards.
+        if not cards or _recency_key(cards[-1]) <= _recency_key(card):
+            cards.append(card)
+        else:
+            insort(cards, card, key=_recency_key)
 
+    @staticmethod
+    def _page(cards: list[EventCard], limit: int, before: EventCursor | None) -> list[EventCard]:
+        end = len(cards) if before is None else bisect_left(cards, before, key=_recency_key)
+        if limit <= 0 or end == 0:
+            return []
+        start = max(0, end - limit)
+        return cards[start:end][::-1]
@@ -1,80 +1,282 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Sequence
+from typing import Any, Sequence
 from uuid import uuid4
 
-from sqlalchemy import select
+from sqlalchemy import Float, Select, and_, case, func, literal, literal_column, or_, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.metrics import timed_repository
 from app.models import Event
-from app.schemas import EventCard, EventIngestRequest
+from app.pagination import EventCursor, SearchCursor
+from app.repositories.events import ListingVersion, merge_sources
+from app.schemas import EventCard, EventIngestRequest, EventSource, MediaVariant
+from app.search import SEARCH_MAX_CANDIDATES
+from app.serialization import CARD_FIELDS, trusted_card
+
+
+# Every column but the bookkeeping one cards never carry.
+_CARD_COLUMNS = [column for column in Event.__table__.c if column.key != "dedup_signature"]
+# Columns a newer edit of the message overwrites.
+_EDITABLE_COLUMNS = (
+    "title",
+    "description",
+    "event_time",
+    "location",
+    "price",
+    "category",
+    "source_link",
+    "dedup_signature",
+    "edited_at",
+)
 
 
 class PostgresEventsRepository:
-    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        read_session_factory: async_sessionmaker[AsyncSession] | None = None,
+        search_max_candidates: int = SEARCH_MAX_CANDIDATES,
+    ) -> None:
         self._session_factory = session_factory
+        self._search_max_candidates = search_max_candidates
+        # Listings tolerate replica lag; writes and read-modify-write paths stay on the primary.
+        self._read_session_factory = read_session_factory or session_factory
 
     async def upsert(self, request: EventIngestRequest) -> EventCard:
+        cards = await self.upsert_many([request])
+        return cards[0]
+
+    @timed_repository("events")
+    async def upsert_many(self, requests: Sequence[EventIngestRequest]) -> list[EventCard]:
+        if not requests:
+            return []
+        rows = self._dedupe_rows(requests)
+        table = Event.__table__
+        stmt = pg_insert(table).values(list(rows.values()))
+        media_missing = func.json_array_length(table.c.media_urls) == 0
+        media_changed = and_(
+            media_missing,
+            or_(
+                func.json_array_length(stmt.excluded.media_urls) > 0,
+                stmt.excluded.media_pending != table.c.media_pending,
+            ),
+        )
+        newer_edit = and_(
+            stmt.excluded.edited_at.is_not(None),
+            or_(table.c.edited_at.is_(None), stmt.excluded.edited_at > table.c.edited_at),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.channel, table.c.message_id],
+            set_={
+                "media_urls": case((media_missing, stmt.excluded.media_urls), else_=table.c.media_urls),
+                "media_pending": case((media_missing, stmt.excluded.media_pending), else_=table.c.media_pending),
+                **{
+                    name: case((newer_edit, stmt.excluded[name]), else_=table.c[name])
+                    for name in _EDITABLE_COLUMNS
+                },
+            },
+            # Re-polled rows that would not change are left alone: no dead tuple, no WAL.
+            where=or_(media_changed, newer_edit),
+        ).returning(*_CARD_COLUMNS)
+        async with self._session_factory() as session:
+            result = await session.execute(stmt)
+            by_key = {(row.channel, row.message_id): self._to_card(row) for row in result}
+            # RETURNING skips the rows the WHERE left untouched; read those as they are.
+            unchanged = [key for key in rows if key not in by_key]
+            if unchanged:
+                existing = await session.execute(
+                    select(*_CARD_COLUMNS).where(tuple_(table.c.channel, table.c.message_id).in_(unchanged))
+                )
+                by_key.update({(row.channel, row.message_id): self._to_card(row) for row in existing})
+            await session.commit()
+        return [by_key[(request.channel, request.message_id)] for request in requests]
+
+    @staticmethod
+    def _dedupe_rows(requests: Sequence[EventIngestRequest]) -> dict[tuple[str, int], dict[str, Any]]:
+        # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement.
+        rows: dict[tuple[str, int], dict[str, Any]] = {}
+        now = datetime.utcnow()
+        for request in requests:
+            key = (request.channel, request.message_id)
+            previous = rows.get(key)
+            if previous is not None and (previous["edited_at"] or datetime.min) > (request.edited_at or datetime.min):
+                continue
+            rows[key] = {
+                "id": previous["id"] if previous else uuid4().hex,
+                "title": request.title or (request.text[:120] if request.text else "Untitled"),
+                "description": request.text,
+                "channel": request.channel,
+                "message_id": request.message_id,
+                "event_time": request.event_time or request.published_at,
+                "media_urls": request.media_urls or (previous["media_urls"] if previous else []),
+                "media_pending": request.media_pending and not (previous and previous["media_urls"]),
+                "location": request.location,
+                "price": request.price,
+                "category": request.category,
+                "source_link": str(request.source_link) if request.source_link else None,
+                "alternate_sources": [],
+                "dedup_signature": request.dedup_signature,
+                "edited_at": request.edited_at,
+                "created_at": now,
+            }
+        return rows
+
+    @timed_repository("events")
+    async def set_media(
+        self,
+        channel: str,
+        message_id: int,
+        media_urls: list[str],
+        media_variants: dict[str, list[MediaVariant]] | None = None,
+    ) -> EventCard | None:
+        table = Event.__table__
         async with self._session_factory() as session:
-            existing = await self._find_by_channel_msg(session, request.channel, request.message_id)
-            if existing:
-                if not existing.media_urls and request.media_urls:
-                    existing.media_urls = request.media_urls
-                    await session.commit()
-                return self._to_card(existing)
-            event = Event(
-                id=uuid4().hex,
-                title=request.text[:120] if request.text else "Untitled",
-                description=request.text,
-                channel=request.channel,
-                message_id=request.message_id,
-                event_time=request.published_at,
-                media_urls=request.media_urls,
-                location=None,
-                price=None,
-                category=None,
-                source_link=None,
-                created_at=datetime.utcnow(),
+            result = await session.execute(
+                update(table)
+                .where(table.c.channel == channel)
+                .where(table.c.message_id == message_id)
+                .values(
+                    media_urls=media_urls,
+                    media_variants={
+                        url: [variant.model_dump() for variant in variants]
+                        for url, variants in (media_variants or {}).items()
+                    },
+                    media_pending=False,
+                )
+                .returning(*_CARD_COLUMNS)
             )
-            session.add(event)
+            row = result.first()
             await session.commit()
-            await session.refresh(event)
-            return self._to_card(event)
+        return self._to_card(row) if row is not None else None
+
+    @timed_repository("events")
+    async def pending_media(self, channels: Sequence[str], limit: int = 100) -> list[tuple[str, int]]:
+        if not channels:
+            return []
+        stmt = (
+            select(Event.channel, Event.message_id)
+            .where(Event.media_pending.is_(True))
+            .where(Event.channel.in_(channels))
+            .order_by(Event.created_at.desc())
+            .limit(limit)
+        )
+        async with self._session_factory() as session:
+            result = await session.execute(stmt)
+            return [(row.channel, row.message_id) for row in result]
+
+    @timed_repository("events")
+    async def existing(self, keys: Sequence[tuple[str, int]]) -> set[tuple[str, int]]:
+        if not keys:
+            return set()
+        stmt = select(Event.channel, Event.message_id).where(tuple_(Event.channel, Event.message_id).in_(keys))
+        async with self._session_factory() as session:
+            result = await session.execute(stmt)
+            return {(row.channel, row.message_id) for row in result}
 
-    async def list_recent(self, limit: int = 50) -> list[EventCard]:
+    @timed_repository("events")
+    async def add_sources(self, event_id: str, sources: Sequence[EventSource]) -> EventCard | None:
         async with self._session_factory() as session:
-            result = await session.scalars(select(Event).order_by(Event.created_at.desc()).limit(limit))
+            event = await session.get(Event, event_id, with_for_update=True)
+            if event is None:
+                return None
+            merged = merge_sources(event.alternate_sources, sources)
+            if len(merged) != len(event.alternate_sources):
+                event.alternate_sources = merged
+            card = self._to_card(event)
+            await session.commit()
+        return card
+
+    async def recent_signatures(self, since: datetime) -> list[tuple[str, str, datetime, bytes]]:
+        """(id, channel, created_at, signature) of events created after ``since``, oldest first."""
+        stmt = (
+            select(Event.id, Event.channel, Event.created_at, Event.dedup_signature)
+            .where(Event.created_at > since)
+            .where(Event.dedup_signature.is_not(None))
+            .order_by(Event.created_at)
+        )
+        async with self._session_factory() as session:
+            result = await session.execute(stmt)
+            return [tuple(row) for row in result.all()]
+
+    @timed_repository("events")
+    async def list_recent(
+        self, limit: int = 50, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        async with self._listing_session(primary) as session:
+            result = await session.scalars(self._page_query(select(Event), limit, before))
             records: Sequence[Event] = result.all()
             return [self._to_card(item) for item in records]
 
-    async def list_by_channel(self, channel: str, limit: int = 20) -> list[EventCard]:
-        async with self._session_factory() as session:
-            result = await session.scalars(
-                select(Event).where(Event.channel == channel).order_by(Event.created_at.desc()).limit(limit)
-            )
+    @timed_repository("events")
+    async def list_by_channel(
+        self, channel: str, limit: int = 20, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        query = select(Event).where(Event.channel == channel)
+        async with self._listing_session(primary) as session:
+            result = await session.scalars(self._page_query(query, limit, before))
             records: Sequence[Event] = result.all()
             return [self._to_card(item) for item in records]
 
-    async def _find_by_channel_msg(self, session: AsyncSession, channel: str, message_id: int) -> Event | None:
-        return await session.scalar(
-            select(Event).where(Event.channel == channel).where(Event.message_id == message_id).limit(1)
+    async def version(self, channel: str | None = None) -> ListingVersion | None:
+        # Any token derived from row timestamps could be read before a slower, earlier
+        # transaction commits; CachedEventsRepository versions scopes after commit instead.
+        return None
+
+    @timed_repository("events")
+    async def search(
+        self, query: str, limit: int = 20, before: SearchCursor | None = None
+    ) -> list[tuple[EventCard, float]]:
+        # Maintained by python -m app.migrate; not mapped, so listings never load it.
+        vector = literal_column("events.search_vector")
+        tsquery = func.websearch_to_tsquery(literal_column("'russian'::regconfig"), query).op("||")(
+            func.websearch_to_tsquery(literal_column("'simple'::regconfig"), query)
+        )
+        # Matching is cheap with the GIN index, ranking is not: cut the matches down to the
+        # newest few first, materialized so the planner cannot rank before the LIMIT.
+        candidates = (
+            select(Event.id, vector.label("search_vector"))
+            .where(vector.op("@@")(tsquery))
+            .order_by(Event.created_at.desc())
+            .limit(self._search_max_candidates)
+            .cte("candidates")
+            .prefix_with("MATERIALIZED")
         )
+        rank = func.ts_rank(candidates.c.search_vector, tsquery)
+        stmt = select(Event, rank.label("rank")).join(candidates, candidates.c.id == Event.id)
+        if before is not None:
+            before_rank, created_at, event_id = before
+            stmt = stmt.where(
+                tuple_(rank, Event.created_at, Event.id)
+                < tuple_(
+                    literal(before_rank, Float()),
+                    literal(created_at, Event.created_at.type),
+                    literal(event_id, Event.id.type),
+                )
+            )
+        stmt = stmt.order_by(rank.desc(), Event.created_at.desc(), Event.id.desc()).limit(limit)
+        async with self._session_factory() as session:
+            result = await session.execute(stmt)
+            return [(self._to_card(event), float(score)) for event, score in result.all()]
+
+    def _listing_session(self, primary: bool) -> AsyncSession:
+        return self._session_factory() if primary else self._read_session_factory()
 
     @staticmethod
-    def _to_card(event: Event) -> EventCard:
-        return EventCard(
-            id=event.id,
-            title=event.title,
-            description=event.description,
-            channel=event.channel,
-            message_id=event.message_id,
-            event_time=event.event_time,
-            media_urls=event.media_urls,
-            location=event.location,
-            price=event.price,
-            category=event.category,
-            source_link=event.source_link,
-            created_at=event.created_at,
-        )
+    def _page_query(query: Select[tuple[Event]], limit: int, before: EventCursor | None) -> Select[tuple[Event]]:
+        if before is not None:
+            created_at, event_id = before
+            query = query.where(
+                tuple_(Event.created_at, Event.id)
+                < tuple_(literal(created_at, Event.created_at.type), literal(event_id, Event.id.type))
+            )
+        return query.order_by(Event.created_at.desc(), Event.id.desc()).limit(limit)
+
+    @staticmethod
+    def _to_card(event: Event | Row[Any]) -> EventCard:
+        # Columns already have the card's types; re-validating every row is pure overhead.
+        return trusted_card({name: getattr(event, name) for name in CARD_FIELDS})
 
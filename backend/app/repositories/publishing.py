@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Sequence
+
+from app.pagination import EventCursor, SearchCursor
+from app.repositories.events import EventsRepository, ListingVersion
+from app.schemas import EventCard, EventIngestRequest, EventSource, MediaVariant
+from app.streaming import EventBroadcaster
+
+
+class PublishingEventsRepository(EventsRepository):
+    """Publishes cards created or edited by upserts to the event stream.
+
+    Re-ingesting a known message returns the existing card, whose ``created_at``
+    predates the call, so it is only published again, as an ``edited`` event, when
+    the request carried the edit the card now holds. Cards whose media finished
+    downloading are published as ``edited`` too.
+    """
+
+    def __init__(self, inner: EventsRepository, broadcaster: EventBroadcaster) -> None:
+        self._inner = inner
+        self._broadcaster = broadcaster
+
+    async def upsert(self, request: EventIngestRequest) -> EventCard:
+        return (await self.upsert_many([request]))[0]
+
+    async def upsert_many(self, requests: Sequence[EventIngestRequest]) -> list[EventCard]:
+        started = datetime.utcnow()
+        cards = await self._inner.upsert_many(requests)
+        seen: set[str] = set()
+        created = []
+        edited = []
+        for request, card in zip(requests, cards):
+            if card.id in seen:
+                continue
+            if card.created_at >= started:
+                seen.add(card.id)
+                created.append(card)
+            elif request.edited_at is not None and card.edited_at == request.edited_at:
+                seen.add(card.id)
+                edited.append(card)
+        await self._broadcaster.publish(created)
+        await self._broadcaster.publish(edited, kind="edited")
+        return cards
+
+    async def set_media(
+        self,
+        channel: str,
+        message_id: int,
+        media_urls: list[str],
+        media_variants: dict[str, list[MediaVariant]] | None = None,
+    ) -> EventCard | None:
+        card = await self._inner.set_media(channel, message_id, media_urls, media_variants)
+        if card is not None:
+            # Subscribers may have the card already, streamed before its media was downloaded.
+            await self._broadcaster.publish([card], kind="edited")
+        return card
+
+    async def pending_media(self, channels: Sequence[str], limit: int = 100) -> list[tuple[str, int]]:
+        return await self._inner.pending_media(channels, limit)
+
+    async def existing(self, keys: Sequence[tuple[str, int]]) -> set[tuple[str, int]]:
+        return await self._inner.existing(keys)
+
+    async def add_sources(self, event_id: str, sources: Sequence[EventSource]) -> EventCard | None:
+        return await self._inner.add_sources(event_id, sources)
+
+    async def list_recent(
+        self, limit: int = 50, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        return await self._inner.list_recent(limit=limit, before=before, primary=primary)
+
+    async def list_by_channel(
+        self, channel: str, limit: int = 20, before: EventCursor | None = None, primary: bool = False
+    ) -> list[EventCard]:
+        return await self._inner.list_by_channel(channel=channel, limit=limit, before=before, primary=primary)
+
+    async def search(
+        self, query: str, limit: int = 20, before: SearchCursor | None = None
+    ) -> list[tuple[EventCard, float]]:
+        return await self._inner.search(query, limit=limit, before=before)
+
+    async def version(self, channel: str | None = None) -> ListingVersion | None:
+        return await self._inner.version(channel)
@@ -1,21 +1,33 @@
 from __future__ import annotations
 
+import time
+from collections import OrderedDict
 from datetime import datetime
-from typing import Protocol
+from typing import Any, Protocol
 
-from sqlalchemy import select
+from sqlalchemy import exists, or_, select, union_all
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+from app.metrics import timed_repository
 from app.models import User
 from app.schemas import UserProfile, UserProfileUpdate, TelegramAuthUser
 
 
+AUTH_FIELDS = ("username", "first_name", "last_name", "photo_url", "language_code")
+
+
+def _auth_fingerprint(source: TelegramAuthUser | UserProfile) -> tuple[str | None, ...]:
+    return tuple(getattr(source, name) for name in AUTH_FIELDS)
+
+
 class UsersRepository(Protocol):
     async def upsert_from_auth(self, payload: TelegramAuthUser) -> UserProfile: ...
 
     async def get(self, telegram_id: int) -> UserProfile | None: ...
 
-    async def update_profile(self, telegram_id: int, update: UserProfileUpdate) -> UserProfile: ...
+    async def upsert_with_profile(self, payload: TelegramAuthUser, update: UserProfileUpdate) -> UserProfile: ...
 
 
 class InMemoryUsersRepository(UsersRepository):
@@ -24,6 +36,8 @@ class InMemoryUsersRepository(UsersRepository):
 
     async def upsert_from_auth(self, payload: TelegramAuthUser) -> UserProfile:
         existing = self._store.get(payload.telegram_id)
+        if existing is not None and _auth_fingerprint(existing) == _auth_fingerprint(payload):
+            return existing
         profile = UserProfile(
             telegram_id=payload.telegram_id,
             username=payload.username,
@@ -42,79 +56,153 @@ class InMemoryUsersRepository(UsersRepository):
     async def get(self, telegram_id: int) -> UserProfile | None:
         return self._store.get(telegram_id)
 
-    async def update_profile(self, telegram_id: int, update: UserProfileUpdate) -> UserProfile:
-        current = await self.get(telegram_id)
-        if current is None:
-            raise ValueError("User not found")
-        merged = current.model_copy(
-            update={
-                "city": update.city if update.city is not None else current.city,
-                "interests": update.interests if update.interests is not None else current.interests,
-                "updated_at": datetime.utcnow(),
-            }
+    async def upsert_with_profile(self, payload: TelegramAuthUser, update: UserProfileUpdate) -> UserProfile:
+        existing = self._store.get(payload.telegram_id)
+        now = datetime.utcnow()
+        profile = UserProfile(
+            telegram_id=payload.telegram_id,
+            username=payload.username,
+            first_name=payload.first_name,
+            last_name=payload.last_name,
+            photo_url=payload.photo_url,
+            language_code=payload.language_code,
+            city=update.city if update.city is not None else (existing.city if existing else None),
+            interests=update.interests if update.interests is not None else (existing.interests if existing else []),
+            created_at=existing.created_at if existing else now,
+            updated_at=now,
         )
-        self._store[telegram_id] = merged
-        return merged
+        self._store[payload.telegram_id] = profile
+        return profile
 
 
 class PostgresUsersRepository(UsersRepository):
-    def __init__(self, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        auth_cache_ttl_seconds: float = 30.0,
+        auth_cache_size: int = 10_000,
+        read_session_factory: async_sessionmaker[AsyncSession] | None = None,
+    ) -> None:
         self._session_factory = session_factory
-
+        self._read_session_factory = read_session_factory or session_factory
+        self._auth_cache_ttl = auth_cache_ttl_seconds
+        self._auth_cache_size = auth_cache_size
+        # telegram_id -> (expires_at, auth fingerprint) last written by this worker. Only the
+        # fingerprint is kept: profiles change through other workers, so they are always read.
+        self._written: OrderedDict[int, tuple[float, tuple[str | None, ...]]] = OrderedDict()
+
+    @timed_repository("users")
     async def upsert_from_auth(self, payload: TelegramAuthUser) -> UserProfile:
-        async with self._session_factory() as session:
-            existing = await self._get_user(session, payload.telegram_id)
-            if existing:
-                existing.username = payload.username
-                existing.first_name = payload.first_name
-                existing.last_name = payload.last_name
-                existing.photo_url = payload.photo_url
-                existing.language_code = payload.language_code
-                await session.commit()
-                await session.refresh(existing)
-                return self._to_profile(existing)
-
-            user = User(
-                telegram_id=payload.telegram_id,
-                username=payload.username,
-                first_name=payload.first_name,
-                last_name=payload.last_name,
-                photo_url=payload.photo_url,
-                language_code=payload.language_code,
-                city=None,
-                interests=[],
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow(),
+        fingerprint = _auth_fingerprint(payload)
+        if self._recently_written(payload.telegram_id, fingerprint):
+            # Unchanged login: a plain primary-key read, no write and no row lock.
+            async with self._session_factory() as session:
+                user = await self._get_user(session, payload.telegram_id)
+            if user is not None:
+                return self._to_profile(user)
+        table = User.__table__
+        now = datetime.utcnow()
+        insert = pg_insert(table).values(
+            telegram_id=payload.telegram_id,
+            username=payload.username,
+            first_name=payload.first_name,
+            last_name=payload.last_name,
+            photo_url=payload.photo_url,
+            language_code=payload.language_code,
+            city=None,
+            interests=[],
+            created_at=now,
+            updated_at=now,
+        )
+        auth_columns = [table.c[name] for name in AUTH_FIELDS]
+        # Only touch the row when the Telegram profile actually changed; otherwise RETURNING is
+        # empty and the second branch reads the current row in the same statement.
+        upserted = (
+            insert.on_conflict_do_update(
+                index_elements=[table.c.telegram_id],
+                set_={**{name: insert.excluded[name] for name in AUTH_FIELDS}, "updated_at": now},
+                where=or_(*(column.is_distinct_from(insert.excluded[column.name]) for column in auth_columns)),
             )
-            session.add(user)
+            .returning(*table.c)
+            .cte("upserted")
+        )
+        stmt = union_all(
+            select(*upserted.c),
+            select(*table.c)
+            .where(table.c.telegram_id == payload.telegram_id)
+            .where(~exists(select(upserted.c.telegram_id))),
+        )
+        async with self._session_factory() as session:
+            row = (await session.execute(stmt)).one_or_none()
+            if row is None:
+                # A concurrent first login committed while this INSERT waited on it: the upsert
+                # saw the conflict but the statement's snapshot predates the row. A new
+                # statement gets a new snapshot.
+                row = (await session.execute(select(*table.c).where(table.c.telegram_id == payload.telegram_id))).one()
             await session.commit()
-            await session.refresh(user)
-            return self._to_profile(user)
+        self._remember(payload.telegram_id, fingerprint)
+        return self._to_profile(row)
 
+    @timed_repository("users")
     async def get(self, telegram_id: int) -> UserProfile | None:
-        async with self._session_factory() as session:
+        async with self._read_session_factory() as session:
             user = await self._get_user(session, telegram_id)
             return self._to_profile(user) if user else None
 
-    async def update_profile(self, telegram_id: int, update: UserProfileUpdate) -> UserProfile:
+    @timed_repository("users")
+    async def upsert_with_profile(self, payload: TelegramAuthUser, update: UserProfileUpdate) -> UserProfile:
+        table = User.__table__
+        now = datetime.utcnow()
+        insert = pg_insert(table).values(
+            telegram_id=payload.telegram_id,
+            username=payload.username,
+            first_name=payload.first_name,
+            last_name=payload.last_name,
+            photo_url=payload.photo_url,
+            language_code=payload.language_code,
+            city=update.city,
+            interests=update.interests if update.interests is not None else [],
+            created_at=now,
+            updated_at=now,
+        )
+        changes = {name: insert.excluded[name] for name in AUTH_FIELDS}
+        if update.city is not None:
+            changes["city"] = insert.excluded.city
+        if update.interests is not None:
+            changes["interests"] = insert.excluded.interests
+        stmt = insert.on_conflict_do_update(
+            index_elements=[table.c.telegram_id],
+            set_={**changes, "updated_at": now},
+        ).returning(*table.c)
         async with self._session_factory() as session:
-            user = await self._get_user(session, telegram_id)
-            if user is None:
-                raise ValueError("User not found")
-            if update.city is not None:
-                user.city = update.city
-            if update.interests is not None:
-                user.interests = update.interests
-            user.updated_at = datetime.utcnow()
+            row = (await session.execute(stmt)).one()
             await session.commit()
-            await session.refresh(user)
-            return self._to_profile(user)
+        self._remember(payload.telegram_id, _auth_fingerprint(payload))
+        return self._to_profile(row)
 
     async def _get_user(self, session: AsyncSession, telegram_id: int) -> User | None:
         return await session.scalar(select(User).where(User.telegram_id == telegram_id).limit(1))
 
+    def _recently_written(self, telegram_id: int, fingerprint: tuple[str | None, ...]) -> bool:
+        entry = self._written.get(telegram_id)
+        if entry is None:
+            return False
+        expires_at, written = entry
+        if expires_at <= time.monotonic() or written != fingerprint:
+            del self._written[telegram_id]
+            return False
+        return True
+
+    def _remember(self, telegram_id: int, fingerprint: tuple[str | None, ...]) -> None:
+        if self._auth_cache_ttl <= 0 or self._auth_cache_size <= 0:
+            return
+        self._written[telegram_id] = (time.monotonic() + self._auth_cache_ttl, fingerprint)
+        self._written.move_to_end(telegram_id)
+        while len(self._written) > self._auth_cache_size:
+            self._written.popitem(last=False)
+
     @staticmethod
-    def _to_profile(user: User) -> UserProfile:
+    def _to_profile(user: User | Row[Any]) -> UserProfile:
         return UserProfile(
             telegram_id=user.telegram_id,
             username=user.username,
@@ -127,6 +215,3 @@ class PostgresUsersRepository(UsersRepository):
             created_at=user.created_at,
             updated_at=user.updated_at,
         )
-
-
-
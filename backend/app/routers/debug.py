@@ -5,6 +5,7 @@ import logging
 from fastapi import APIRouter, HTTPException, Query, Request
 
 from app.config import Settings
+from app.db import pool_stats
 from app.ingest.telegram import TelegramIngestor
 from app.repositories.events import EventsRepository
 from app.schemas import ClientErrorReport
@@ -50,28 +51,45 @@ def _get_events_repo(request: Request) -> EventsRepository:
     return request.app.state.events_repo  # type: ignore[attr-defined]
 
 
+@router.get("/db-pool")
+def db_pool(request: Request) -> dict[str, object]:
+    engines = getattr(request.app.state, "db_engines", {})
+    if not engines:
+        raise HTTPException(status_code=404, detail="Postgres is not configured")
+    return {name: pool_stats(engine) for name, engine in engines.items()}
+
+
 @router.post("/telegram-fetch-recent")
 async def telegram_fetch_recent(
     request: Request,
     per_channel_limit: int = Query(5, ge=1, le=50),
     pause_between_channels_seconds: float = Query(1.0, ge=0.0, le=10.0),
     pause_between_messages_seconds: float = Query(0.0, ge=0.0, le=2.0),
+    concurrency: int | None = Query(default=None, ge=1, le=64),
     login_mode: str | None = Query(default=None, description="Override: bot | user"),
 ) -> dict[str, object]:
     settings = Settings()
     if login_mode in {"bot", "user"}:
         settings.telegram_login_mode = login_mode
-    repo = _get_events_repo(request)
-    ingestor = TelegramIngestor(settings=settings, repo=repo)
+    # Polling lives in the ingestion worker, so this connects and tears down an ingestor of its own.
+    ingestor = TelegramIngestor(
+        settings=settings, repo=_get_events_repo(request), cursors=request.app.state.cursors_repo
+    )
     try:
         result = await ingestor.fetch_recent(
             per_channel_limit=per_channel_limit,
             pause_between_channels_seconds=pause_between_channels_seconds,
             pause_between_messages_seconds=pause_between_messages_seconds,
+            concurrency=concurrency,
         )
     except Exception as e:
         logger.exception("telegram_fetch_recent failed")
         raise HTTPException(status_code=500, detail=str(e)) from e
+    finally:
+        # Downloads still queued stay media_pending; the worker's retry sweep picks them up.
+        await ingestor.media.stop()
+        ingestor.extraction.close()
+        ingestor.images.close()
     return {
         "status": "ok",
         "result": result,
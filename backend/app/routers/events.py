@@ -1,41 +1,190 @@
 from __future__ import annotations
 
-from fastapi import APIRouter, Depends, Query, Request
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
-from app.repositories.events import EventsRepository
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+
+from app.pagination import EventCursor, decode_cursor, decode_search_cursor, encode_search_cursor, next_cursor
+from app.repositories.events import EventsRepository, ListingVersion
 from app.schemas import EventCard, EventIngestRequest
+from app.serialization import dump_card, dump_cards
+from app.streaming import EventBroadcaster, sse_frame
 
 router = APIRouter(prefix="/events", tags=["events"])
 
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
 
 def get_repo(request: Request) -> EventsRepository:
     return request.app.state.events_repo  # type: ignore[attr-defined]
 
 
+def get_broadcaster(request: Request) -> EventBroadcaster:
+    return request.app.state.event_broadcaster  # type: ignore[attr-defined]
+
+
+def _parse_cursor(cursor: str | None) -> EventCursor | None:
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+
+
+def _not_modified(request: Request, response: Response, version: ListingVersion | None) -> Response | None:
+    """Set validators for a listing and return a 304 if the client's copy is current."""
+    if version is None:
+        return None
+    modified_at = version.modified_at.replace(tzinfo=timezone.utc)
+    headers = {
+        "ETag": f'"{version.token}"',
+        "Last-Modified": format_datetime(modified_at, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    response.headers.update(headers)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # RFC 9110: If-Modified-Since is ignored whenever If-None-Match is sent.
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        fresh = "*" in tags or headers["ETag"] in tags
+    else:
+        try:
+            since = parsedate_to_datetime(request.headers.get("if-modified-since", ""))
+        except (TypeError, ValueError):
+            since = None
+        # HTTP dates stop at whole seconds, so a second write within the second the client
+        # saw would look unmodified; only a strictly later date proves the copy is current.
+        fresh = since is not None and since.tzinfo is not None and modified_at.replace(microsecond=0) < since
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers) if fresh else None
+
+
+def _cards_response(cards: list[EventCard], response: Response) -> Response:
+    # Repository cards are already typed, so skip FastAPI's response_model re-validation
+    # and the stdlib encoder; response_model stays on the routes for the schema.
+    fast = Response(content=dump_cards(cards), media_type="application/json")
+    fast.headers.raw.extend(response.headers.raw)
+    return fast
+
+
+def _set_next_cursor(response: Response, cards: list[EventCard], limit: int) -> None:
+    cursor = next_cursor(cards, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
+
+
 @router.get("", response_model=list[EventCard])
-async def list_events(repo: EventsRepository = Depends(get_repo), limit: int = Query(50, ge=1, le=200)) -> list[EventCard]:
-    return await repo.list_recent(limit=limit)
+async def list_events(
+    request: Request,
+    response: Response,
+    repo: EventsRepository = Depends(get_repo),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: str | None = Query(default=None, description=f"Value of {NEXT_CURSOR_HEADER} from the previous page"),
+) -> Response:
+    before = _parse_cursor(cursor)
+    not_modified = _not_modified(request, response, await repo.version())
+    if not_modified is not None:
+        return not_modified
+    cards = await repo.list_recent(limit=limit, before=before)
+    _set_next_cursor(response, cards, limit)
+    return _cards_response(cards, response)
 
 
-@router.post("/ingest", response_model=EventCard)
-async def ingest_event(payload: EventIngestRequest, repo: EventsRepository = Depends(get_repo)) -> EventCard:
-    return await repo.upsert(payload)
+@router.get("/search", response_model=list[EventCard])
+async def search_events(
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=256),
+    repo: EventsRepository = Depends(get_repo),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(default=None, description=f"Value of {NEXT_CURSOR_HEADER} from the previous page"),
+) -> Response:
+    """Events matching every word of ``q``, best match first.
 
+    Only the newest SEARCH_MAX_CANDIDATES matches (1000 by default) are ranked, so
+    older matches are never returned, on this page or any later one.
+    """
+    before = None
+    if cursor:
+        try:
+            before = decode_search_cursor(cursor)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor") from exc
+    hits = await repo.search(q, limit=limit, before=before)
+    if len(hits) == limit:
+        card, rank = hits[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_search_cursor(rank, card)
+    return _cards_response([card for card, _ in hits], response)
 
-@router.get("/channel/{channel}", response_model=list[EventCard])
-async def list_channel_events(
-    channel: str,
+
+@router.get("/stream", response_class=StreamingResponse)
+async def stream_events(
     repo: EventsRepository = Depends(get_repo),
-    limit: int = Query(20, ge=1, le=200),
-) -> list[EventCard]:
-    return await repo.list_by_channel(channel=channel, limit=limit)
+    broadcaster: EventBroadcaster = Depends(get_broadcaster),
+    channel: str | None = Query(default=None),
+    cursor: str | None = Query(default=None, description="Resume after this event id"),
+    last_event_id: str | None = Header(default=None),
+) -> StreamingResponse:
+    """Server-Sent Events feed of newly ingested cards.
+
+    Each event's id is a listing cursor, so a reconnecting EventSource (which sends
+    ``Last-Event-ID``) first receives up to ``resume_limit`` cards it missed.
+    Later changes to cards already sent (edits, finished media downloads) arrive as
+    ``edited`` events without an id; those missed while disconnected are not replayed.
+    """
+    after = _parse_cursor(last_event_id or cursor)
+    # Subscribe before reading the backlog so nothing published in between is lost.
+    subscription = broadcaster.subscribe(channel)
+    try:
+        backlog: list[EventCard] = []
+        if after is not None:
+            if channel is None:
+                recent = await repo.list_recent(limit=broadcaster.resume_limit)
+            else:
+                recent = await repo.list_by_channel(channel=channel, limit=broadcaster.resume_limit)
+            backlog = [card for card in reversed(recent) if (card.created_at, card.id) > after]
+    except BaseException:
+        broadcaster.unsubscribe(subscription)
+        raise
+
+    async def body():
+        try:
+            yield b"retry: 3000\n\n"
+            for card in backlog:
+                yield sse_frame(card)
+            skip = {card.id for card in backlog}
+            async for frame in subscription.frames(broadcaster.heartbeat_seconds, after, skip):
+                yield frame
+        finally:
+            broadcaster.unsubscribe(subscription)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/ingest", response_model=EventCard)
+async def ingest_event(payload: EventIngestRequest, repo: EventsRepository = Depends(get_repo)) -> Response:
+    card = await repo.upsert(payload)
+    return Response(content=dump_card(card), media_type="application/json")
 
 
 @router.get("/channel/{channel}", response_model=list[EventCard])
 async def list_channel_events(
     channel: str,
+    request: Request,
+    response: Response,
     repo: EventsRepository = Depends(get_repo),
     limit: int = Query(20, ge=1, le=200),
-) -> list[EventCard]:
-    return await repo.list_by_channel(channel=channel, limit=limit)
-
+    cursor: str | None = Query(default=None, description=f"Value of {NEXT_CURSOR_HEADER} from the previous page"),
+) -> Response:
+    before = _parse_cursor(cursor)
+    not_modified = _not_modified(request, response, await repo.version(channel))
+    if not_modified is not None:
+        return not_modified
+    cards = await repo.list_by_channel(channel=channel, limit=limit, before=before)
+    _set_next_cursor(response, cards, limit)
+    return _cards_response(cards, response)
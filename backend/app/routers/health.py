@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+
+from app.metrics import render_latest
 
 router = APIRouter(tags=["health"])
 
@@ -9,3 +11,9 @@ router = APIRouter(tags=["health"])
 def health() -> dict[str, str]:
     return {"status": "ok"}
 
+
+@router.get("/metrics", include_in_schema=False)
+def metrics() -> Response:
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import os
+import re
+from email.utils import formatdate
+from pathlib import Path
+from stat import S_ISREG
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+
+from app.ingest.media import PARTIAL_SUFFIX
+
+router = APIRouter(prefix="/media", tags=["media"])
+
+# Names the media pipeline writes: "{channel_id}_{message_id}.ext".
+_MEDIA_NAME = re.compile(r"[A-Za-z0-9_-]+\.[A-Za-z0-9]{1,8}")
+
+
+def _media_root(request: Request) -> Path:
+    return request.app.state.media_root  # type: ignore[attr-defined]
+
+
+def _etag(stat: os.stat_result) -> str:
+    # nginx's format, so the tag is the same whether the API or X-Accel-Redirect serves the file.
+    return f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+
+
+class _MediaFileResponse(FileResponse):
+    @classmethod
+    def _should_use_range(cls, http_if_range: str, stat_result: os.stat_result) -> bool:
+        # Starlette checks If-Range against its own ETag format; use ours.
+        return http_if_range in (_etag(stat_result), formatdate(stat_result.st_mtime, usegmt=True))
+
+
+def _resolve(request: Request, name: str) -> tuple[Path, os.stat_result]:
+    if not _MEDIA_NAME.fullmatch(name) or name.endswith(PARTIAL_SUFFIX):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    path = _media_root(request) / name
+    try:
+        stat = path.stat()
+    except OSError:
+        stat = None
+    if stat is None or not S_ISREG(stat.st_mode):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    return path, stat
+
+
+@router.api_route("/{name}", methods=["GET", "HEAD"], include_in_schema=False)
+def media_file(request: Request, name: str) -> Response:
+    """Serve a downloaded media file.
+
+    Files are written once under a name that never changes, so responses carry a
+    strong ETag and a year-long immutable Cache-Control. With MEDIA_ACCEL_REDIRECT
+    set the body is left to nginx: the API only validates the name and answers
+    with an ``X-Accel-Redirect`` to the internal location holding the files.
+    """
+    path, stat = _resolve(request, name)
+    settings = request.app.state.settings  # type: ignore[attr-defined]
+    headers = {
+        "ETag": _etag(stat),
+        "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+        "Cache-Control": f"public, max-age={settings.media_cache_max_age}, immutable",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        if "*" in tags or headers["ETag"] in tags:
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    if settings.media_accel_redirect:
+        # nginx handles ranges and conditionals itself and keeps Cache-Control from this response.
+        headers["X-Accel-Redirect"] = settings.media_accel_redirect.rstrip("/") + "/" + name
+        return Response(headers=headers)
+    return _MediaFileResponse(path, stat_result=stat, headers=headers)
@@ -1,9 +1,24 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Annotated, Optional
 
-from pydantic import BaseModel, HttpUrl, Field
+from pydantic import BaseModel, HttpUrl, Field, PrivateAttr, UrlConstraints
+from pydantic_core import Url
+
+# An HttpUrl that also fits events.source_link (VARCHAR(512)).
+SourceLink = Annotated[Url, UrlConstraints(max_length=512, allowed_schemes=["http", "https"])]
+
+
+class MediaVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+
+
+class EventSource(BaseModel):
+    channel: str
+    message_id: int
 
 
 class EventCard(BaseModel):
@@ -14,11 +29,19 @@ class EventCard(BaseModel):
     message_id: int
     event_time: Optional[datetime] = None
     media_urls: list[str] = []
+    media_pending: bool = False
+    # WebP renditions of each image in media_urls, keyed by its URL and smallest first,
+    # so clients can build a srcset instead of downloading the original.
+    media_variants: dict[str, list[MediaVariant]] = {}
     location: Optional[str] = None
     price: Optional[str] = None
     category: Optional[str] = None
     source_link: Optional[HttpUrl] = None
+    # Near-duplicate reposts from other channels, merged into this canonical event.
+    alternate_sources: list[EventSource] = []
     created_at: datetime
+    # When the post was last edited in Telegram; edits reach the stream as "update" events.
+    edited_at: Optional[datetime] = None
 
 
 class EventIngestRequest(BaseModel):
@@ -26,7 +49,38 @@ class EventIngestRequest(BaseModel):
     message_id: int
     text: str
     media_urls: list[str] = []
+    media_pending: bool = False
     published_at: Optional[datetime] = None
+    # Telegram's edit date; a later edit replaces the stored text and fields, an older one is ignored.
+    edited_at: Optional[datetime] = None
+    # Structured fields filled by the extraction stage; the repositories fall back to
+    # the raw text / publish date when they are missing.
+    title: Optional[str] = None
+    event_time: Optional[datetime] = None
+    location: Optional[str] = None
+    price: Optional[str] = None
+    category: Optional[str] = None
+    source_link: Optional[SourceLink] = None
+    # MinHash of the text, set by DedupingEventsRepository and persisted with the row.
+    # Private so clients of POST /events/ingest cannot plant signatures in the index.
+    _dedup_signature: Optional[bytes] = PrivateAttr(default=None)
+
+    @property
+    def dedup_signature(self) -> Optional[bytes]:
+        return self._dedup_signature
+
+    def signed(self, signature: bytes) -> EventIngestRequest:
+        """A copy of this request carrying ``signature``."""
+        request = self.model_copy()
+        request._dedup_signature = signature
+        return request
+
+
+class ChannelCursorState(BaseModel):
+    channel: str
+    last_message_id: int = 0
+    first_message_id: int = 0
+    backfilled: int = 0
 
 
 class TelegramAuthUser(BaseModel):
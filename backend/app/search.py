@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import heapq
+import math
+import re
+from collections import Counter
+
+from app.pagination import SearchCursor
+from app.schemas import EventCard
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+# Longest-first inflection endings; a light stand-in for the Postgres 'russian' stemmer.
+_RU_ENDINGS = tuple(
+    sorted(
+        (
+            "ами", "ями", "ого", "его", "ому", "ему", "ыми", "ими", "ых", "их", "ах", "ях", "ом", "ем",
+            "ой", "ей", "ий", "ый", "ая", "яя", "ое", "ее", "ую", "юю", "ов", "ев", "ам", "ям", "ы", "и",
+            "а", "я", "о", "е", "у", "ю", "ь",
+        ),
+        key=len,
+        reverse=True,
+    )
+)
+_MIN_STEM = 4
+# Only the newest matches are ranked, which bounds the cost of very common terms;
+# older matches are never returned, on any page.
+SEARCH_MAX_CANDIDATES = 1_000
+
+
+def _stem(token: str) -> str:
+    if len(token) <= _MIN_STEM:
+        return token
+    for ending in _RU_ENDINGS:
+        if token.endswith(ending) and len(token) - len(ending) >= _MIN_STEM:
+            return token[: -len(ending)]
+    return token
+
+
+def tokenize(text: str | None) -> list[str]:
+    if not text:
+        return []
+    return [_stem(token) for token in _TOKEN_RE.findall(text.lower().replace("ё", "е"))]
+
+
+class InvertedIndex:
+    """Incremental token -> {event id: term weight} index with AND queries.
+
+    Weights are log-scaled term frequencies divided by a log document-length norm,
+    similar in spirit to ts_rank, so a hit's rank is just the sum of its weights.
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[str, float]] = {}
+        self._terms: dict[str, list[str]] = {}
+
+    def add(self, card: EventCard) -> None:
+        self.remove(card.id)
+        tokens = tokenize(card.description or card.title)
+        counts = Counter(tokens)
+        norm = 1.0 + math.log(1 + len(tokens))
+        for token, count in counts.items():
+            self._postings.setdefault(token, {})[card.id] = (1.0 + math.log(count)) / norm
+        self._terms[card.id] = list(counts)
+
+    def remove(self, event_id: str) -> None:
+        for token in self._terms.pop(event_id, []):
+            postings = self._postings[token]
+            del postings[event_id]
+            if not postings:
+                del self._postings[token]
+
+    def search(
+        self,
+        query: str,
+        cards: dict[str, EventCard],
+        limit: int,
+        before: SearchCursor | None = None,
+        max_candidates: int = SEARCH_MAX_CANDIDATES,
+    ) -> list[tuple[EventCard, float]]:
+        terms = set(tokenize(query))
+        if not terms or limit <= 0:
+            return []
+        postings: list[dict[str, float]] = []
+        for term in terms:
+            term_postings = self._postings.get(term)
+            if term_postings is None:
+                return []
+            postings.append(term_postings)
+        postings.sort(key=len)
+        smallest, rest = postings[0], postings[1:]
+        matches = (cards[event_id] for event_id in smallest if all(event_id in other for other in rest))
+        # Posting order is not recency (edits re-index a card), so pick the newest matches explicitly.
+        newest = heapq.nlargest(max_candidates, matches, key=lambda card: (card.created_at, card.id))
+        hits: list[tuple[SearchCursor, EventCard]] = []
+        for card in newest:
+            key = (round(sum(p[card.id] for p in postings), 6), card.created_at, card.id)
+            if before is not None and key >= before:
+                continue
+            hits.append((key, card))
+        top = heapq.nlargest(limit, hits, key=lambda hit: hit[0])
+        return [(card, key[0]) for key, card in top]
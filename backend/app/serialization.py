@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+from typing import Any, Sequence
+
+import orjson
+from pydantic import BaseModel
+from pydantic_core import Url, ValidationError
+
+from app.schemas import EventCard, EventSource, MediaVariant
+
+CARD_FIELDS = tuple(EventCard.model_fields)
+_CARD_FIELD_SET = frozenset(CARD_FIELDS)
+
+
+def trusted_card(values: dict[str, Any]) -> EventCard:
+    """Build a card from values the app wrote itself, skipping validation.
+
+    ``values`` must hold every field. This is ``model_construct`` without its
+    per-field default handling, which costs more than the row fetch itself. JSON
+    and string columns are turned into the nested models and URL the card
+    declares, so these cards match validated ones; ``values`` is updated in place.
+    """
+    sources = values["alternate_sources"]
+    if sources and isinstance(sources[0], dict):
+        values["alternate_sources"] = [EventSource.model_construct(**source) for source in sources]
+    variants = values["media_variants"]
+    if variants:
+        values["media_variants"] = {
+            url: [
+                MediaVariant.model_construct(**variant) if isinstance(variant, dict) else variant
+                for variant in rendered
+            ]
+            for url, rendered in variants.items()
+        }
+    link = values["source_link"]
+    if isinstance(link, str):
+        try:
+            values["source_link"] = Url(link)
+        except ValidationError:
+            # Written before links were validated at extraction; serve none rather than a broken one.
+            values["source_link"] = None
+    card = EventCard.__new__(EventCard)
+    object.__setattr__(card, "__dict__", values)
+    object.__setattr__(card, "__pydantic_fields_set__", set(_CARD_FIELD_SET))
+    object.__setattr__(card, "__pydantic_extra__", None)
+    object.__setattr__(card, "__pydantic_private__", None)
+    return card
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Url):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.__dict__
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def dump_card(card: EventCard) -> bytes:
+    return orjson.dumps(card.__dict__, default=_default)
+
+
+def dump_cards(cards: Sequence[EventCard]) -> bytes:
+    """Serialize cards to the same JSON as ``list[EventCard]``, without re-validating them.
+
+    orjson writes naive datetimes exactly like pydantic, validated ``HttpUrl`` values
+    fall back to ``str`` and nested models to their fields.
+    """
+    return orjson.dumps([card.__dict__ for card in cards], default=_default)
@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.config import Settings
+from app.db import create_engine, create_session_maker
+from app.dedup import NearDuplicateIndex, RedisNearDuplicateIndex
+from app.metrics import track_engine
+from app.migrate import search_vector_ready
+from app.models import SCHEMA_PATCHES, Base
+from app.repositories.cache import CachedEventsRepository
+from app.repositories.cursors import (
+    ChannelCursorsRepository,
+    InMemoryChannelCursorsRepository,
+    PostgresChannelCursorsRepository,
+)
+from app.repositories.dedup import DedupingEventsRepository
+from app.repositories.events import EventsRepository, InMemoryEventsRepository
+from app.repositories.postgres import PostgresEventsRepository
+from app.repositories.publishing import PublishingEventsRepository
+from app.repositories.users import InMemoryUsersRepository, PostgresUsersRepository, UsersRepository
+from app.streaming import EventBroadcaster
+
+
+@dataclass
+class Storage:
+    """Repositories and connections shared by the API and the ingestion worker."""
+
+    events: EventsRepository
+    users: UsersRepository
+    cursors: ChannelCursorsRepository
+    redis: Redis
+    broadcaster: EventBroadcaster
+    engines: dict[str, AsyncEngine] = field(default_factory=dict)
+
+    async def close(self) -> None:
+        await self.broadcaster.stop()
+        for engine in self.engines.values():
+            await engine.dispose()
+        await self.redis.aclose()
+
+
+def _create_engine(settings: Settings, dsn: str) -> AsyncEngine:
+    return create_engine(
+        dsn,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        statement_cache_size=settings.db_statement_cache_size,
+    )
+
+
+async def open_storage(settings: Settings, dedup: bool = True) -> Storage:
+    """Build the repository stack; the broadcaster is returned unstarted (publish-only).
+
+    ``dedup=False`` leaves out the near-duplicate folding, for processes that do not ingest.
+    """
+    engines: dict[str, AsyncEngine] = {}
+    postgres_events_repo: PostgresEventsRepository | None = None
+    events_repo: EventsRepository
+    users_repo: UsersRepository
+    cursors_repo: ChannelCursorsRepository
+    if settings.postgres_dsn:
+        engine = _create_engine(settings, settings.postgres_dsn)
+        session_factory = create_session_maker(engine)
+        read_session_factory = session_factory
+        engines["primary"] = engine
+        if settings.postgres_replica_dsn:
+            replica_engine = _create_engine(settings, settings.postgres_replica_dsn)
+            read_session_factory = create_session_maker(replica_engine)
+            engines["replica"] = replica_engine
+        for name, pooled in engines.items():
+            track_engine(name, pooled)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for statement in SCHEMA_PATCHES:
+                await conn.execute(text(statement))
+            if not await search_vector_ready(conn):
+                # Search would fail on every request; say why once, up front.
+                raise RuntimeError("events.search_vector is missing: run python -m app.migrate against this database")
+        postgres_events_repo = PostgresEventsRepository(
+            session_factory, read_session_factory, search_max_candidates=settings.search_max_candidates
+        )
+        events_repo = postgres_events_repo
+        users_repo = PostgresUsersRepository(
+            session_factory,
+            auth_cache_ttl_seconds=settings.users_profile_cache_ttl,
+            read_session_factory=read_session_factory,
+        )
+        cursors_repo = PostgresChannelCursorsRepository(session_factory)
+    else:
+        events_repo = InMemoryEventsRepository(search_max_candidates=settings.search_max_candidates)
+        users_repo = InMemoryUsersRepository()
+        cursors_repo = InMemoryChannelCursorsRepository()
+    redis = Redis.from_url(settings.redis_url, socket_connect_timeout=1.0, socket_timeout=1.0)
+    if settings.events_cache_enabled:
+        events_repo = CachedEventsRepository(
+            events_repo,
+            redis,
+            ttl_seconds=settings.events_cache_ttl,
+            local_max_size=settings.events_cache_local_size,
+            version_ttl_seconds=settings.events_cache_version_ttl,
+            retry_after_seconds=settings.events_cache_retry_after,
+            media_invalidation_delay=settings.events_cache_media_delay,
+            replica_lag_seconds=settings.postgres_replica_max_lag if settings.postgres_replica_dsn else 0.0,
+        )
+    if dedup and settings.dedup_enabled:
+        window = timedelta(days=settings.dedup_window_days)
+        if postgres_events_repo is not None:
+            # Workers own different channel shards, so the index has to be shared to see reposts across them.
+            index = RedisNearDuplicateIndex(redis, threshold=settings.dedup_threshold, window=window)
+            dedup_repo = DedupingEventsRepository(events_repo, index, min_tokens=settings.dedup_min_tokens)
+            if await index.claim_warm():
+                await dedup_repo.warm(await postgres_events_repo.recent_signatures(datetime.utcnow() - window))
+        else:
+            dedup_repo = DedupingEventsRepository(
+                events_repo,
+                NearDuplicateIndex(threshold=settings.dedup_threshold, window=window),
+                min_tokens=settings.dedup_min_tokens,
+            )
+        events_repo = dedup_repo
+    broadcaster = EventBroadcaster(
+        redis,
+        queue_size=settings.events_stream_queue_size,
+        heartbeat_seconds=settings.events_stream_heartbeat,
+        resume_limit=settings.events_stream_resume_limit,
+    )
+    return Storage(
+        events=PublishingEventsRepository(events_repo, broadcaster),
+        users=users_repo,
+        cursors=cursors_repo,
+        redis=redis,
+        broadcaster=broadcaster,
+        engines=engines,
+    )
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Sequence
+
+from pydantic import TypeAdapter
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from app.pagination import EventCursor, encode_cursor
+from app.schemas import EventCard
+from app.serialization import dump_card, dump_cards
+
+logger = logging.getLogger(__name__)
+
+_CARDS = TypeAdapter(list[EventCard])
+STREAM_CHANNEL = "events:stream"
+HEARTBEAT_FRAME = b": ping\n\n"
+# Frame kinds: "event" for a new card, "edited" for a later change (text or media) to one.
+KINDS = ("event", "edited")
+
+
+def sse_frame(card: EventCard, kind: str = "event") -> bytes:
+    if kind == "edited":
+        # No id: the card's cursor is old, and moving Last-Event-ID back would replay everything since.
+        return b"event: edited\ndata: %s\n\n" % dump_card(card)
+    return b"id: %s\nevent: event\ndata: %s\n\n" % (encode_cursor(card).encode(), dump_card(card))
+
+
+@dataclass(eq=False)
+class Subscription:
+    channel: str | None
+    # Edited frames carry no cursor: they are never filtered against the resume position.
+    queue: asyncio.Queue[tuple[EventCursor | None, bytes] | None]
+    overflowed: bool = False
+
+    async def frames(
+        self, heartbeat_seconds: float, after: EventCursor | None = None, skip: set[str] | None = None
+    ) -> AsyncIterator[bytes]:
+        """Yield queued frames, or a heartbeat comment after ``heartbeat_seconds`` of quiet.
+
+        Cards at or before the resume cursor ``after``, or whose id is in ``skip``
+        (already sent from the resume backlog), are dropped.
+        """
+        while True:
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield HEARTBEAT_FRAME
+                continue
+            if item is None:
+                return
+            key, frame = item
+            if key is not None and ((after is not None and key <= after) or (skip and key[1] in skip)):
+                continue
+            yield frame
+
+
+@dataclass
+class EventBroadcaster:
+    """Fans newly upserted and edited cards out to this worker's stream subscribers.
+
+    Cards are published once to a Redis pub/sub channel (changes to its ``:edited``
+    sibling) and every worker runs a single listener that forwards them to its
+    local subscribers, so idle clients cost one queue each and no Redis
+    connection. Subscribers are indexed by their
+    channel filter and each card is serialized once per worker. A subscriber that
+    falls ``queue_size`` frames behind is disconnected instead of buffering without
+    bound; it reconnects with ``Last-Event-ID`` and resumes from the repository.
+    If Redis is unreachable, cards are delivered to local subscribers only.
+    """
+
+    redis: Redis | None
+    queue_size: int = 100
+    heartbeat_seconds: float = 15.0
+    resume_limit: int = 200
+    channel_name: str = STREAM_CHANNEL
+    _subscribers: dict[str | None, set[Subscription]] = field(default_factory=dict, init=False, repr=False)
+    _listener: asyncio.Task | None = field(default=None, init=False, repr=False)
+
+    @property
+    def subscriber_count(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    def subscribe(self, channel: str | None = None) -> Subscription:
+        subscription = Subscription(channel=channel, queue=asyncio.Queue(maxsize=self.queue_size))
+        self._subscribers.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subs = self._subscribers.get(subscription.channel)
+        if subs is None:
+            return
+        subs.discard(subscription)
+        if not subs:
+            del self._subscribers[subscription.channel]
+
+    async def publish(self, cards: Sequence[EventCard], kind: str = "event") -> None:
+        if not cards:
+            return
+        if self.redis is not None:
+            try:
+                await self.redis.publish(self._pubsub_channel(kind), dump_cards(cards))
+                return
+            except RedisError:
+                logger.warning("Event stream publish failed, delivering locally only", exc_info=True)
+        self.dispatch(cards, kind)
+
+    def dispatch(self, cards: Sequence[EventCard], kind: str = "event") -> None:
+        if not self._subscribers:
+            return
+        everyone = self._subscribers.get(None, ())
+        for card in cards:
+            targets = [*everyone, *self._subscribers.get(card.channel, ())]
+            if not targets:
+                continue
+            key = (card.created_at, card.id) if kind == "event" else None
+            item = (key, sse_frame(card, kind))
+            for subscription in targets:
+                self._offer(subscription, item)
+
+    def _pubsub_channel(self, kind: str) -> str:
+        return self.channel_name if kind == "event" else f"{self.channel_name}:{kind}"
+
+    def _offer(self, subscription: Subscription, item: tuple[EventCursor | None, bytes]) -> None:
+        if subscription.overflowed:
+            return
+        try:
+            subscription.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Slow consumer: drop its backlog and end the stream; the client resumes by cursor.
+            subscription.overflowed = True
+            self._close(subscription)
+
+    def _close(self, subscription: Subscription) -> None:
+        while not subscription.queue.empty():
+            subscription.queue.get_nowait()
+        subscription.queue.put_nowait(None)
+        self.unsubscribe(subscription)
+
+    def start(self) -> None:
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for subs in list(self._subscribers.values()):
+            for subscription in list(subs):
+                self._close(subscription)
+
+    async def _listen(self) -> None:
+        assert self.redis is not None
+        backoff = 1.0
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            kinds = {self._pubsub_channel(kind).encode(): kind for kind in KINDS}
+            try:
+                await pubsub.subscribe(*kinds)
+                backoff = 1.0
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    try:
+                        cards = _CARDS.validate_json(message["data"])
+                    except ValueError:
+                        logger.warning("Dropping malformed event stream message")
+                        continue
+                    self.dispatch(cards, kinds.get(message["channel"], "event"))
+            except asyncio.CancelledError:
+                raise
+            except (RedisError, OSError):
+                logger.warning("Event stream listener lost Redis, retrying in %.0fs", backoff, exc_info=True)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except (RedisError, OSError):
+                    pass
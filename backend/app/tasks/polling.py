@@ -2,28 +2,92 @@ from __future__ import annotations
 
 import asyncio
 import logging
+import time
 
+from telethon import TelegramClient
 from telethon.errors import AccessTokenInvalidError
 
+from app.ingest.client import TelegramClientManager
+from app.ingest.leases import ChannelLeases
+from app.ingest.scheduler import AdaptivePollScheduler
 from app.ingest.telegram import TelegramIngestor
 
 logger = logging.getLogger(__name__)
 
 
 class TelegramPollingService:
-    def __init__(self, ingestor: TelegramIngestor, interval_seconds: int) -> None:
+    def __init__(
+        self,
+        ingestor: TelegramIngestor,
+        interval_seconds: int,
+        health_check_interval_seconds: float = 60.0,
+        leases: ChannelLeases | None = None,
+        scheduler: AdaptivePollScheduler | None = None,
+    ) -> None:
         self._ingestor = ingestor
+        # Longest sleep between scheduler checks; per-channel timing comes from the scheduler.
         self._interval = interval_seconds
+        settings = ingestor.settings
+        self.scheduler = scheduler or AdaptivePollScheduler(
+            min_interval=settings.telegram_poll_min_interval,
+            max_interval=settings.telegram_poll_max_interval,
+            max_page=settings.telegram_poll_max_page,
+            poll_cost=settings.telegram_poll_cost,
+            requests_per_second=settings.telegram_requests_per_second,
+        )
         self._stopped = asyncio.Event()
+        self._backfill_enabled = ingestor.settings.telegram_backfill_depth > 0
+        self._backfilled: set[str] = set()
+        self._leases = leases
+        self._owned: list[str] | None = None
+        self.clients = TelegramClientManager(
+            ingestor.connect,
+            health_check_interval_seconds=health_check_interval_seconds,
+        )
+        # Downloads outlive the poll that queued them; fetch through whatever client is current.
+        ingestor.media.use_clients(self.clients.get)
+        self._media_retry_interval = settings.media_retry_interval
+        self._media_swept_at: float | None = None
 
     async def run(self) -> None:
+        heartbeat = asyncio.create_task(self._leases.run()) if self._leases is not None else None
+        try:
+            await self._loop()
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+                await self._leases.release()  # type: ignore[union-attr]
+            await self._ingestor.media.stop()
+            self._ingestor.extraction.close()
+            self._ingestor.images.close()
+            await self.clients.close()
+
+    async def _loop(self) -> None:
         while not self._stopped.is_set():
+            channels = self._channels()
+            self.scheduler.sync(channels, time.monotonic())
+            batch = self.scheduler.take(time.monotonic())
             try:
-                await self._ingestor.fetch_recent(
-                    per_channel_limit=5,
-                    pause_between_channels_seconds=max(0.5, float(self._interval) / 10.0),
-                    pause_between_messages_seconds=0.05,
-                )
+                if batch:
+                    client = await self.clients.get()
+                    pending = [channel for channel in channels if channel not in self._backfilled]
+                    if self._backfill_enabled and pending:
+                        result = await self._ingestor.backfill(client=client, channels=pending)
+                        logger.info("Backfill finished: %s", result)
+                        # Failed channels are retried on the next iteration.
+                        failed = result["channels_failed"]
+                        pending = [channel for channel in pending if channel not in failed]
+                    self._backfilled.update(pending)
+                    report = await self._ingestor.fetch_recent(
+                        pause_between_channels_seconds=0.0,
+                        pause_between_messages_seconds=0.05,
+                        client=client,
+                        channels=batch,
+                        limits={channel: self.scheduler.page_size(channel) for channel in batch},
+                    )
+                    self._record(batch, report)
+                    await self._requeue_media(client, channels)
             except AccessTokenInvalidError:
                 logger.error("Polling stopped: invalid bot token")
                 break
@@ -32,11 +96,49 @@ class TelegramPollingService:
                 break
             except Exception as exc:  # noqa: BLE001
                 logger.exception("Polling iteration failed: %s", exc)
+                for channel in batch:
+                    self.scheduler.record_failure(channel, time.monotonic())
+                await self.clients.invalidate()
+            wait = self.scheduler.wait_time(time.monotonic(), idle=float(self._interval))
             try:
-                await asyncio.wait_for(self._stopped.wait(), timeout=self._interval)
+                await asyncio.wait_for(self._stopped.wait(), timeout=wait)
             except asyncio.TimeoutError:
                 continue
 
+    async def _requeue_media(self, client: TelegramClient, channels: list[str]) -> None:
+        # Runs on the first poll too, which picks up downloads lost at the last shutdown.
+        now = time.monotonic()
+        if self._media_swept_at is not None and now - self._media_swept_at < self._media_retry_interval:
+            return
+        self._media_swept_at = now
+        try:
+            queued = await self._ingestor.requeue_pending_media(client, channels)
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to re-queue pending media")
+            return
+        if queued:
+            logger.info("Re-queued %s pending media downloads", queued)
+
+    def _record(self, batch: list[str], report: dict[str, object]) -> None:
+        now = time.monotonic()
+        failed: dict[str, str] = report["channels_failed"]  # type: ignore[assignment]
+        fetched: dict[str, int] = report["channel_messages"]  # type: ignore[assignment]
+        for channel in batch:
+            if channel in failed:
+                retry_after = self._ingestor.flood_gate.remaining(channel)
+                self.scheduler.record_failure(channel, now, retry_after=retry_after)
+            else:
+                self.scheduler.record_success(channel, fetched.get(channel, 0), now)
+
+    def _channels(self) -> list[str]:
+        if self._leases is None:
+            return self._ingestor.settings.telegram_channel_ids
+        owned = self._leases.owned()
+        if owned != self._owned:
+            # Channels taken over from another worker carry cursors it advanced.
+            self._ingestor.reload_cursors()
+            self._owned = owned
+        return owned
+
     def stop(self) -> None:
         self._stopped.set()
-
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from typing import Collection
+
+from telethon import TelegramClient, events
+from telethon.errors import AccessTokenInvalidError
+
+from app.ingest.client import TelegramClientManager
+from app.ingest.leases import ChannelLeases
+from app.ingest.telegram import TelegramIngestor
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramUpdatesService:
+    """Ingests posts as Telegram pushes them instead of polling for them.
+
+    NewMessage and MessageEdited handlers buffer messages from the owned channels
+    and the buffer is flushed every ``flush_interval`` seconds, so a post is stored
+    about a second after it is published. History is only read to fill gaps: at
+    start-up, when the client is replaced, when channels are taken over from another
+    worker, when a flush fails and every ``safety_poll_interval`` seconds. Telethon
+    reconnects dropped connections by itself without telling us, and updates pushed
+    while it was down are lost, so the periodic pass is what catches those. Telegram
+    allows one connection per session, so run a single worker in this mode.
+    """
+
+    def __init__(
+        self,
+        ingestor: TelegramIngestor,
+        health_check_interval_seconds: float = 60.0,
+        leases: ChannelLeases | None = None,
+        flush_interval: float = 0.5,
+        gap_page_size: int = 100,
+        safety_poll_interval: float = 300.0,
+    ) -> None:
+        self._ingestor = ingestor
+        self._leases = leases
+        self._flush_interval = flush_interval
+        self._gap_page_size = gap_page_size
+        self._safety_poll_interval = safety_poll_interval
+        self._gaps_filled_at = 0.0
+        self._stopped = asyncio.Event()
+        self._owned: set[str] = set()
+        self._peers: dict[int, str] = {}
+        self.clients = TelegramClientManager(
+            ingestor.connect,
+            health_check_interval_seconds=health_check_interval_seconds,
+        )
+        ingestor.media.use_clients(self.clients.get)
+        self._media_retry_interval = ingestor.settings.media_retry_interval
+        self._media_swept_at: float | None = None
+
+    async def run(self) -> None:
+        heartbeat = asyncio.create_task(self._leases.run()) if self._leases is not None else None
+        try:
+            await self._loop()
+        finally:
+            if heartbeat is not None:
+                heartbeat.cancel()
+                await asyncio.gather(heartbeat, return_exceptions=True)
+                await self._leases.release()  # type: ignore[union-attr]
+            await self._ingestor.media.stop()
+            self._ingestor.extraction.close()
+            self._ingestor.images.close()
+            await self.clients.close()
+
+    async def _loop(self) -> None:
+        client: TelegramClient | None = None
+        while not self._stopped.is_set():
+            try:
+                current = await self.clients.get()
+                owned = set(self._channels())
+                gaps = owned - self._owned
+                if current is not client:
+                    client = current
+                    await self._subscribe(client)
+                    gaps = owned
+                elif self._safety_poll_due():
+                    gaps = owned
+                if gaps == owned:
+                    self._gaps_filled_at = time.monotonic()
+                self._owned = owned
+                if gaps:
+                    await self._fill_gaps(client, gaps)
+                failed = await self._ingestor.flush_updates()
+                if failed:
+                    # Their messages were dropped with the batch; re-read them from history.
+                    self._owned -= set(failed)
+                await self._requeue_media(client, owned)
+            except AccessTokenInvalidError:
+                logger.error("Update ingestion stopped: invalid bot token")
+                break
+            except ValueError as exc:
+                logger.error("Update ingestion stopped: %s", exc)
+                break
+            except Exception as exc:  # noqa: BLE001
+                logger.exception("Update ingestion iteration failed: %s", exc)
+                await self.clients.invalidate()
+            try:
+                await asyncio.wait_for(self._stopped.wait(), timeout=self._flush_interval)
+            except asyncio.TimeoutError:
+                continue
+
+    async def _subscribe(self, client: TelegramClient) -> None:
+        channels = self._ingestor.settings.telegram_channel_ids
+        self._peers = {}
+        for channel in channels:
+            await self._ingestor.request_budget.acquire()
+            self._peers[await client.get_peer_id(channel)] = channel
+        chats = list(self._peers)
+        client.add_event_handler(self._on_message, events.NewMessage(chats=chats))
+        client.add_event_handler(self._on_message, events.MessageEdited(chats=chats))
+        logger.info("Listening for updates from %s channels", len(chats))
+
+    async def _on_message(self, event: events.NewMessage.Event) -> None:
+        channel = self._peers.get(event.chat_id)
+        if channel is None or channel not in self._owned:
+            return
+        edited = isinstance(event, events.MessageEdited.Event)
+        await self._ingestor.handle_update(event.client, channel, event.message, edited=edited)
+
+    async def _fill_gaps(self, client: TelegramClient, channels: Collection[str]) -> None:
+        pending = [channel for channel in self._ingestor.settings.telegram_channel_ids if channel in channels]
+        while pending:
+            report = await self._ingestor.fetch_recent(
+                per_channel_limit=self._gap_page_size,
+                pause_between_channels_seconds=0.0,
+                client=client,
+                channels=pending,
+            )
+            fetched: dict[str, int] = report["channel_messages"]  # type: ignore[assignment]
+            failed: dict[str, str] = report["channels_failed"]  # type: ignore[assignment]
+            # A full page means more is waiting above the cursor.
+            pending = [
+                channel
+                for channel in pending
+                if channel not in failed and fetched.get(channel, 0) >= self._gap_page_size
+            ]
+        logger.info("Filled update gaps for %s channels", len(channels))
+
+    def _safety_poll_due(self) -> bool:
+        if self._safety_poll_interval <= 0:
+            return False
+        return time.monotonic() - self._gaps_filled_at >= self._safety_poll_interval
+
+    async def _requeue_media(self, client: TelegramClient, channels: Collection[str]) -> None:
+        # Runs right after start-up too, which picks up downloads lost at the last shutdown.
+        now = time.monotonic()
+        if self._media_swept_at is not None and now - self._media_swept_at < self._media_retry_interval:
+            return
+        self._media_swept_at = now
+        try:
+            queued = await self._ingestor.requeue_pending_media(client, list(channels))
+        except Exception:  # noqa: BLE001
+            logger.exception("Failed to re-queue pending media")
+            return
+        if queued:
+            logger.info("Re-queued %s pending media downloads", queued)
+
+    def _channels(self) -> list[str]:
+        if self._leases is None:
+            return self._ingestor.settings.telegram_channel_ids
+        owned = self._leases.owned()
+        if set(owned) - self._owned:
+            self._ingestor.reload_cursors()
+        return owned
+
+    def stop(self) -> None:
+        self._stopped.set()
@@ -0,0 +1,108 @@
+"""Telegram ingestion worker.
+
+Run one or more of these next to the API (``python -m app.worker``); channels are
+sharded between them through Redis leases, so adding a worker adds capacity and a
+dead worker's channels move to the survivors within INGEST_LEASE_TTL seconds.
+
+With TELEGRAM_INGEST_MODE=push the worker listens for new and edited posts instead
+of polling. Updates only reach a user session that is a member of the channels,
+and a session can hold one connection, so run a single push worker.
+
+Workers need POSTGRES_DSN: without it events live in process memory, and the API
+runs the ingestion service itself instead (see app.main).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import signal
+import socket
+import sys
+
+from prometheus_client import start_http_server
+
+from app.config import Settings
+from app.ingest.leases import ChannelLeases
+from app.ingest.telegram import TelegramIngestor
+from app.storage import Storage, open_storage
+from app.tasks.polling import TelegramPollingService
+from app.tasks.updates import TelegramUpdatesService
+
+logger = logging.getLogger("app.worker")
+
+
+def ingest_config_error(settings: Settings) -> str | None:
+    """Why ingestion cannot run with ``settings``, or None if it can."""
+    if not settings.telegram_channel_ids or not (settings.telegram_bot_token or settings.telegram_session_string):
+        return "Ingestion needs TELEGRAM_CHANNEL_IDS and a bot token or session string"
+    if settings.telegram_ingest_mode not in ("poll", "push"):
+        return f"TELEGRAM_INGEST_MODE must be poll or push, got {settings.telegram_ingest_mode!r}"
+    return None
+
+
+def create_service(
+    settings: Settings, storage: Storage, leases: ChannelLeases | None = None
+) -> TelegramPollingService | TelegramUpdatesService:
+    ingestor = TelegramIngestor(settings=settings, repo=storage.events, cursors=storage.cursors)
+    if settings.telegram_ingest_mode == "push":
+        return TelegramUpdatesService(
+            ingestor=ingestor,
+            health_check_interval_seconds=settings.telegram_health_check_interval,
+            leases=leases,
+            flush_interval=settings.telegram_push_flush_interval,
+            safety_poll_interval=settings.telegram_push_safety_poll,
+            gap_page_size=settings.telegram_poll_max_page,
+        )
+    return TelegramPollingService(
+        ingestor=ingestor,
+        interval_seconds=settings.bot_polling_interval,
+        health_check_interval_seconds=settings.telegram_health_check_interval,
+        leases=leases,
+    )
+
+
+async def run_worker(settings: Settings) -> None:
+    storage = await open_storage(settings)
+    try:
+        worker_id = settings.ingest_worker_id or f"{socket.gethostname()}:{os.getpid()}"
+        leases = ChannelLeases(
+            storage.redis,
+            worker_id,
+            settings.telegram_channel_ids,
+            lease_ttl=settings.ingest_lease_ttl,
+            heartbeat_seconds=settings.ingest_heartbeat_interval,
+        )
+        service = create_service(settings, storage, leases)
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, service.stop)
+        logger.info("Ingestion worker %s started for %s channels", worker_id, len(settings.telegram_channel_ids))
+        await service.run()
+    finally:
+        await storage.close()
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+    settings = Settings()
+    if not settings.telegram_polling_enabled:
+        logger.error("TELEGRAM_POLLING_ENABLED is false, nothing to do")
+        sys.exit(1)
+    error = ingest_config_error(settings)
+    if error is not None:
+        logger.error(error)
+        sys.exit(1)
+    if not settings.postgres_dsn:
+        # Posts would land in this process's memory, out of the API's reach.
+        logger.error("POSTGRES_DSN is required; without it the API ingests in-process when TELEGRAM_POLLING_ENABLED")
+        sys.exit(1)
+    if settings.telegram_ingest_mode == "push" and settings.telegram_login_mode != "user":
+        logger.warning("Bots only receive posts from channels they administer; push mode wants TELEGRAM_LOGIN_MODE=user")
+    if settings.ingest_metrics_port:
+        start_http_server(settings.ingest_metrics_port)
+    asyncio.run(run_worker(settings))
+
+
+if __name__ == "__main__":
+    main()
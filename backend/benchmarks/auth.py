@@ -0,0 +1,64 @@
+"""Per-request cost of Mini App initData verification.
+
+Compares building the verifier on every request (the old per-call key derivation),
+a shared verifier with its cache disabled, and the shared verifier with cache hits.
+
+Usage (from backend/):
+    python -m benchmarks.auth [iterations]
+"""
+from __future__ import annotations
+
+import hashlib
+import hmac
+import json
+import logging
+import sys
+import time
+from urllib.parse import quote
+
+from app.auth import InitDataError, InitDataVerifier, build_check_string
+
+BOT_TOKEN = "123456:benchmark-token"
+
+
+def make_init_data(user_id: int = 42) -> str:
+    fields = {
+        "auth_date": str(int(time.time())),
+        "query_id": "AAH-benchmark",
+        "user": json.dumps({"id": user_id, "first_name": "Bench", "username": "bench"}, separators=(",", ":")),
+    }
+    secret_key = hmac.new(BOT_TOKEN.encode(), msg=b"WebAppData", digestmod=hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret_key, build_check_string(fields).encode(), hashlib.sha256).hexdigest()
+    return "&".join(f"{key}={quote(value)}" for key, value in fields.items())
+
+
+def _per_call(label: str, fn, iterations: int) -> None:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    elapsed = (time.perf_counter() - started) / iterations * 1e6
+    print(f"{label:<40} {elapsed:>10.2f} us/request")
+
+
+def main() -> None:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    logging.disable(logging.WARNING)
+    init_data = make_init_data()
+    forged = init_data.replace("hash=", "signature=AAAA&hash=0")
+
+    def rejected(verifier: InitDataVerifier) -> None:
+        try:
+            verifier.verify(forged)
+        except InitDataError:
+            pass
+
+    shared_uncached = InitDataVerifier(BOT_TOKEN, cache_size=0)
+    shared_cached = InitDataVerifier(BOT_TOKEN)
+    _per_call("new verifier per request", lambda: InitDataVerifier(BOT_TOKEN, cache_size=0).verify(init_data), iterations)
+    _per_call("shared verifier, cache disabled", lambda: shared_uncached.verify(init_data), iterations)
+    _per_call("shared verifier, cache hit", lambda: shared_cached.verify(init_data), iterations)
+    _per_call("rejected (hash + ed25519 fallthrough)", lambda: rejected(shared_uncached), max(1, iterations // 10))
+
+
+if __name__ == "__main__":
+    main()
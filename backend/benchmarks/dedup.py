@@ -0,0 +1,69 @@
+"""Near-duplicate detection cost: signing a message and probing the LSH index.
+
+The index is filled with random signatures (distinct posts look random to MinHash),
+then probed with reposts of a recorded corpus.
+
+Usage (from backend/):
+    python -m benchmarks.dedup [index sizes...]
+"""
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app.dedup import SIGNATURE_BINS, NearDuplicateIndex, signature
+
+CORPUS = Path(__file__).resolve().parent / "data" / "posts_ru.jsonl"
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+PROBES = 20_000
+
+
+def _reposts(texts: list[str]) -> list[str]:
+    decorations = ["{}\n\n#афиша @rupor_msk", "Репост:\n{}", "‼️ {}\nБилеты по ссылке в профиле"]
+    return [pattern.format(text) for text in texts for pattern in decorations]
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    texts = [json.loads(line)["text"] for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    reposts = _reposts(texts)
+
+    started = time.perf_counter()
+    for seq in range(PROBES):
+        # A unique suffix keeps the shingle-hash cache from serving every feature.
+        signature(f"{reposts[seq % len(reposts)]} {seq}")
+    print(f"signature: {(time.perf_counter() - started) / PROBES * 1e6:.1f} us/message")
+
+    now = datetime(2024, 3, 1)
+    print(f"{'indexed':>10} {'fill s':>8} {'match us':>9} {'recall':>7}")
+    for size in sizes:
+        index = NearDuplicateIndex(window=timedelta(days=3650))
+        started = time.perf_counter()
+        for seq in range(size):
+            index.add(f"{seq:032x}", f"@channel_{seq % 35}", os.urandom(4 * SIGNATURE_BINS), now)
+        originals = {}
+        for number, text in enumerate(texts):
+            sig = signature(text)
+            if sig is not None:
+                originals[number] = f"original-{number}"
+                index.add(originals[number], "@original", sig, now)
+        fill = time.perf_counter() - started
+
+        probes = [(signature(text), number // 3) for number, text in enumerate(reposts)]
+        probes = [(sig, number) for sig, number in probes if sig is not None]
+        hits = 0
+        started = time.perf_counter()
+        for seq in range(PROBES):
+            sig, number = probes[seq % len(probes)]
+            if index.match(sig, "@repost", now) == originals.get(number):
+                hits += 1
+        match_us = (time.perf_counter() - started) / PROBES * 1e6
+        print(f"{size:>10} {fill:>8.1f} {match_us:>9.1f} {hits / PROBES:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""Latency of InMemoryEventsRepository reads and upserts as the store grows.
+
+Usage (from backend/):
+    python -m benchmarks.events_store [sizes...]
+"""
+from __future__ import annotations
+
+import asyncio
+import sys
+import time
+
+from app.repositories.events import InMemoryEventsRepository
+from app.schemas import EventIngestRequest
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+CHANNELS = [f"@channel_{i}" for i in range(35)]
+READS = 2_000
+
+
+def _request(seq: int) -> EventIngestRequest:
+    return EventIngestRequest(
+        channel=CHANNELS[seq % len(CHANNELS)],
+        message_id=seq,
+        text=f"Event number {seq}",
+    )
+
+
+async def _fill(repo: InMemoryEventsRepository, start: int, stop: int) -> None:
+    for seq in range(start, stop):
+        await repo.upsert(_request(seq))
+
+
+async def _timed(coro_factory, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await coro_factory()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+async def run(sizes: list[int]) -> None:
+    repo = InMemoryEventsRepository()
+    filled = 0
+    print(f"{'cards':>10} {'upsert new':>12} {'upsert dup':>12} {'recent(50)':>12} {'channel(20)':>12}  (us/op)")
+    for size in sorted(sizes):
+        await _fill(repo, filled, size)
+        filled = size
+        dup = _request(size // 2)
+        upsert_dup = await _timed(lambda: repo.upsert(dup), READS)
+        recent = await _timed(lambda: repo.list_recent(limit=50), READS)
+        channel = await _timed(lambda: repo.list_by_channel(CHANNELS[0], limit=20), READS)
+        started = time.perf_counter()
+        await _fill(repo, filled, filled + READS)
+        filled += READS
+        upsert_new = (time.perf_counter() - started) / READS * 1e6
+        print(f"{size:>10} {upsert_new:>12.2f} {upsert_dup:>12.2f} {recent:>12.2f} {channel:>12.2f}")
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    asyncio.run(run(sizes))
+
+
+if __name__ == "__main__":
+    main()
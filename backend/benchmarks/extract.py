@@ -0,0 +1,63 @@
+"""Throughput of the structured field extraction stage over a recorded corpus.
+
+Compares inline extraction with the process-pool stage used by the ingestor.
+
+Usage (from backend/):
+    python -m benchmarks.extract [messages] [workers...]
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from app.ingest.extract import ExtractionStage
+from app.schemas import EventIngestRequest
+
+CORPUS = Path(__file__).resolve().parent / "data" / "posts_ru.jsonl"
+DEFAULT_MESSAGES = 20_000
+DEFAULT_WORKERS = [0, 1, 2, 4]
+BATCH = 200
+
+
+def _load_corpus(size: int) -> list[EventIngestRequest]:
+    records = [json.loads(line) for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+    return [
+        EventIngestRequest(message_id=seq, **records[seq % len(records)])
+        for seq in range(size)
+    ]
+
+
+async def _measure(stage: ExtractionStage, requests: list[EventIngestRequest]) -> float:
+    # Warm the pool so process start-up is not billed to the first batch.
+    await stage.enrich(requests[:BATCH])
+    started = time.perf_counter()
+    for offset in range(0, len(requests), BATCH):
+        await stage.enrich(requests[offset : offset + BATCH])
+    return time.perf_counter() - started
+
+
+async def run(messages: int, workers: list[int]) -> None:
+    requests = _load_corpus(messages)
+    sample = (await ExtractionStage(workers=0).enrich(requests[:1]))[0]
+    print(f"sample: {sample.model_dump(include={'title', 'event_time', 'location', 'price', 'category', 'source_link'})}")
+    print(f"{'workers':>8} {'seconds':>9} {'msgs/s':>10}")
+    for count in workers:
+        stage = ExtractionStage(workers=count)
+        try:
+            elapsed = await _measure(stage, requests)
+        finally:
+            stage.close()
+        print(f"{count:>8} {elapsed:>9.3f} {messages / elapsed:>10.0f}")
+
+
+def main() -> None:
+    messages = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_MESSAGES
+    workers = [int(arg) for arg in sys.argv[2:]] or DEFAULT_WORKERS
+    asyncio.run(run(messages, workers))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""End-to-end throughput of TelegramIngestor.fetch_recent against FakeTelegramClient.
+
+Each round posts ``messages`` new posts to every channel and times one poll:
+fetch, extraction, upsert and media hand-off. Runs with the in-memory repository,
+and with Postgres too when POSTGRES_DSN points at a scratch database (rows of the
+benchmark channels are deleted first). The ``flood`` scenario makes 2% of
+Telegram calls raise FloodWaitError.
+
+Usage (from backend/):
+    python -m benchmarks.ingest [channels] [messages per channel per round] [rounds]
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import text
+
+from app.config import Settings
+from app.db import create_engine, create_session_maker
+from app.ingest.fake import FakeTelegramClient
+from app.ingest.telegram import TelegramIngestor
+from app.models import SCHEMA_PATCHES, Base
+from app.repositories.events import EventsRepository, InMemoryEventsRepository
+from app.repositories.postgres import PostgresEventsRepository
+from app.schemas import EventIngestRequest
+
+CORPUS = Path(__file__).resolve().parent / "data" / "posts_ru.jsonl"
+DEFAULT_CHANNELS = 35
+DEFAULT_MESSAGES = 20
+DEFAULT_ROUNDS = 20
+SCENARIOS = {
+    "steady": {"flood_wait_rate": 0.0},
+    "flood": {"flood_wait_rate": 0.02, "flood_wait_seconds": 1},
+}
+
+
+def _texts() -> list[str]:
+    return [json.loads(line)["text"] for line in CORPUS.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def _run(
+    repo: EventsRepository, channels: list[str], messages: int, rounds: int, scenario: dict[str, float]
+) -> dict[str, float]:
+    settings = Settings(
+        TELEGRAM_API_ID=1,
+        TELEGRAM_API_HASH="benchmark",
+        TELEGRAM_CHANNEL_IDS="\n".join(channels),
+        TELEGRAM_REQUESTS_PER_SECOND=0,
+        REDIS_URL="redis://localhost:6379/0",
+    )
+    client = FakeTelegramClient(
+        channels,
+        messages_per_channel=0,
+        texts=_texts(),
+        request_latency=0.02,
+        download_latency=0.05,
+        **scenario,
+    )
+    with tempfile.TemporaryDirectory() as media_root:
+        ingestor = TelegramIngestor(settings=settings, repo=repo, media_root=Path(media_root))
+        # Spawn the extraction workers outside the timed rounds.
+        await ingestor.extraction.enrich([EventIngestRequest(channel=channels[0], message_id=0, text="warm-up")])
+        poll_seconds: list[float] = []
+        channel_seconds: list[float] = []
+        ingested = 0
+        try:
+            for _ in range(rounds):
+                for channel in channels:
+                    client.post(channel, messages)
+                started = time.perf_counter()
+                report = await ingestor.fetch_recent(
+                    per_channel_limit=messages, pause_between_channels_seconds=0, client=client
+                )
+                poll_seconds.append(time.perf_counter() - started)
+                channel_seconds.extend(report["channel_seconds"].values())  # type: ignore[union-attr]
+                ingested += report["ingested_messages"]  # type: ignore[operator]
+            await ingestor.media.drain()
+        finally:
+            await ingestor.media.stop()
+            ingestor.extraction.close()
+            ingestor.images.close()
+    return {
+        "msgs_per_s": ingested / sum(poll_seconds),
+        "poll_p50_ms": statistics.median(poll_seconds) * 1e3,
+        "poll_p99_ms": _percentile(poll_seconds, 0.99) * 1e3,
+        "channel_p99_ms": _percentile(channel_seconds, 0.99) * 1e3,
+        "flood_waits": client.flood_waits,
+        "downloads": client.downloads,
+    }
+
+
+async def run(channel_count: int, messages: int, rounds: int) -> None:
+    channels = [f"@bench_{i}" for i in range(channel_count)]
+    dsn = os.environ.get("POSTGRES_DSN")
+    print(f"{channel_count} channels x {messages} messages x {rounds} rounds")
+    print(
+        f"{'repository':<10} {'scenario':<8} {'msgs/s':>9} {'poll p50':>9} {'poll p99':>9}"
+        f" {'chan p99':>9} {'floods':>7} {'media':>6}  (ms)"
+    )
+    for scenario_name, scenario in SCENARIOS.items():
+        result = await _run(InMemoryEventsRepository(), channels, messages, rounds, scenario)
+        _print_row("memory", scenario_name, result)
+    if not dsn:
+        print("postgres   skipped, set POSTGRES_DSN to a scratch database")
+        return
+    engine = create_engine(dsn)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for statement in SCHEMA_PATCHES:
+                await conn.execute(text(statement))
+        for scenario_name, scenario in SCENARIOS.items():
+            async with engine.begin() as conn:
+                await conn.execute(text("DELETE FROM events WHERE channel = ANY(:channels)"), {"channels": channels})
+            repo = PostgresEventsRepository(create_session_maker(engine))
+            _print_row("postgres", scenario_name, await _run(repo, channels, messages, rounds, scenario))
+    finally:
+        await engine.dispose()
+
+
+def _print_row(repository: str, scenario: str, result: dict[str, float]) -> None:
+    print(
+        f"{repository:<10} {scenario:<8} {result['msgs_per_s']:>9.0f} {result['poll_p50_ms']:>9.1f}"
+        f" {result['poll_p99_ms']:>9.1f} {result['channel_p99_ms']:>9.1f}"
+        f" {result['flood_waits']:>7} {result['downloads']:>6}"
+    )
+
+
+def main() -> None:
+    # FloodWait warnings would drown the table.
+    logging.basicConfig(level=logging.ERROR)
+    args = [int(arg) for arg in sys.argv[1:]]
+    channels, messages, rounds = args + [DEFAULT_CHANNELS, DEFAULT_MESSAGES, DEFAULT_ROUNDS][len(args) :]
+    asyncio.run(run(channels, messages, rounds))
+
+
+if __name__ == "__main__":
+    main()
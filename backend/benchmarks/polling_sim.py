@@ -0,0 +1,133 @@
+"""Simulated freshness and request cost of the polling strategies.
+
+Replays a synthetic day of posting across 35 channels (a few busy ones with
+bursts, a long tail of dormant ones) against the fixed loop the service used to
+run (every channel, 5 messages, each cycle) and against AdaptivePollScheduler.
+Polls are instantaneous and cost one request; a message's delay is the time from
+posting to being fetched.
+
+Usage (from backend/):
+    python -m benchmarks.polling_sim [hours] [seed]
+"""
+from __future__ import annotations
+
+import bisect
+import random
+import statistics
+import sys
+from dataclasses import dataclass, field
+
+from app.ingest.scheduler import AdaptivePollScheduler
+
+CHANNELS = 35
+REQUESTS_PER_SECOND = 5.0
+# Old loop: BOT_POLLING_INTERVAL=2s plus a 0.5s pause per channel at concurrency 4,
+# and never faster than the request budget allows.
+OLD_LOOP_CYCLE = max(2.0 + (CHANNELS / 4) * 0.5, CHANNELS / REQUESTS_PER_SECOND)
+
+
+@dataclass
+class _Channel:
+    posts: list[float]
+    cursor: int = 0
+
+    def poll(self, now: float, limit: int, delays: list[float]) -> int:
+        # Oldest-first above the high-water mark, like fetch_recent once a cursor exists.
+        available = bisect.bisect_right(self.posts, now) - self.cursor
+        taken = min(limit, available)
+        delays.extend(now - posted for posted in self.posts[self.cursor : self.cursor + taken])
+        self.cursor += taken
+        return taken
+
+
+@dataclass
+class _Result:
+    requests: int = 0
+    delays: list[float] = field(default_factory=list)
+
+
+def _posting_day(hours: float, rng: random.Random) -> list[list[float]]:
+    horizon = hours * 3600
+    channels = []
+    for index in range(CHANNELS):
+        if index < 3:
+            rate = 1 / 120  # busy aggregators
+        elif index < 12:
+            rate = 1 / 3600
+        else:
+            rate = 1 / 86400 * rng.uniform(0.2, 3)
+        posts: list[float] = []
+        t = rng.expovariate(rate)
+        while t < horizon:
+            posts.append(t)
+            if rng.random() < 0.05:
+                # Burst: a digest of several posts within a minute.
+                posts.extend(t + rng.uniform(0, 60) for _ in range(rng.randint(5, 20)))
+            t += rng.expovariate(rate)
+        channels.append(sorted(p for p in posts if p < horizon))
+    return channels
+
+
+def _fixed(posting: list[list[float]], hours: float, cycle: float, limit: int = 5) -> _Result:
+    channels = [_Channel(posts) for posts in posting]
+    result = _Result()
+    now = 0.0
+    while now < hours * 3600:
+        for channel in channels:
+            channel.poll(now, limit, result.delays)
+            result.requests += 1
+        now += cycle
+    return result
+
+
+def _adaptive(posting: list[list[float]], hours: float, scheduler: AdaptivePollScheduler) -> _Result:
+    names = [f"@channel_{index}" for index in range(len(posting))]
+    channels = dict(zip(names, (_Channel(posts) for posts in posting)))
+    result = _Result()
+    now = 0.0
+    scheduler.sync(names, now)
+    while now < hours * 3600:
+        for name in scheduler.take(now):
+            fetched = channels[name].poll(now, scheduler.page_size(name), result.delays)
+            result.requests += 1
+            scheduler.record_success(name, fetched, now)
+        now += max(0.01, scheduler.wait_time(now, idle=60.0))
+    return result
+
+
+def _row(name: str, result: _Result, posted: int, hours: float) -> str:
+    delays = sorted(result.delays)
+    if not delays:
+        return f"{name:<28} {result.requests / hours:>9.0f}  no messages fetched"
+    missed = posted - len(delays)
+    return (
+        f"{name:<28} {result.requests / hours:>9.0f} {statistics.mean(delays):>8.1f}"
+        f" {delays[int(0.95 * (len(delays) - 1))]:>8.1f} {delays[int(0.99 * (len(delays) - 1))]:>8.1f}"
+        f" {delays[-1]:>8.1f} {len(delays) / max(1, result.requests):>9.3f} {missed:>7}"
+    )
+
+
+def run(hours: float, seed: int) -> None:
+    posting = _posting_day(hours, random.Random(seed))
+    posted = sum(len(posts) for posts in posting)
+    print(f"{CHANNELS} channels, {posted} posts over {hours:g}h")
+    print(f"{'strategy':<28} {'req/h':>9} {'mean s':>8} {'p95 s':>8} {'p99 s':>8} {'max s':>8} {'msgs/req':>9} {'unread':>7}")
+    for cycle in (OLD_LOOP_CYCLE, 60.0, 300.0):
+        label = f"fixed every {cycle:g}s" + (" (old loop)" if cycle == OLD_LOOP_CYCLE else "")
+        print(_row(label, _fixed(posting, hours, cycle), posted, hours))
+    for poll_cost, max_interval in ((1.0, 300.0), (10.0, 300.0), (10.0, 900.0)):
+        scheduler = AdaptivePollScheduler(
+            max_interval=max_interval, poll_cost=poll_cost, requests_per_second=REQUESTS_PER_SECOND
+        )
+        label = f"adaptive cost={poll_cost:g} max={max_interval:g}s"
+        print(_row(label, _adaptive(posting, hours, scheduler), posted, hours))
+
+
+def main() -> None:
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 24.0
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 7
+    run(hours, seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Cost of turning event rows into a JSON listing response.
+
+``baseline`` is the previous path: a validated EventCard per row, then FastAPI's
+response_model re-validation, ``mode="json"`` dump and the stdlib encoder.
+``fast`` is the current path: unvalidated cards from ``_to_card`` and orjson.
+
+Usage (from backend/):
+    python -m benchmarks.serialization [page sizes...]
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from pydantic import TypeAdapter
+
+from app.repositories.postgres import PostgresEventsRepository
+from app.schemas import EventCard
+from app.serialization import CARD_FIELDS, dump_cards
+
+DEFAULT_SIZES = [20, 50, 200]
+ROUNDS = 300
+
+EventRow = namedtuple("EventRow", CARD_FIELDS)
+_CARDS = TypeAdapter(list[EventCard])
+
+
+def _rows(count: int) -> list[EventRow]:
+    now = datetime(2024, 3, 1, 12, 0, 0)
+    return [
+        EventRow(
+            id=f"{seq:032x}",
+            title=f"Концерт группы №{seq}",
+            description="Описание события с деталями о площадке, времени и билетах. " * 6,
+            channel=f"@channel_{seq % 35}",
+            message_id=seq,
+            event_time=now + timedelta(days=seq % 30, hours=19),
+            media_urls=[f"/media/channel_{seq % 35}_{seq}.jpg"],
+            media_pending=False,
+            location="Клуб «Известия Hall», ул. Новый Арбат, 21",
+            price="от 2500 ₽",
+            category="concert",
+            source_link=f"https://tickets.example.ru/event/{seq}" if seq % 2 else None,
+            media_variants={},
+            alternate_sources=[],
+            created_at=now - timedelta(seconds=seq),
+            edited_at=None,
+        )
+        for seq in range(count)
+    ]
+
+
+def baseline(rows: list[EventRow]) -> bytes:
+    cards = [EventCard(**row._asdict()) for row in rows]
+    content = _CARDS.dump_python(_CARDS.validate_python(cards), mode="json")
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast(rows: list[EventRow]) -> bytes:
+    return dump_cards([PostgresEventsRepository._to_card(row) for row in rows])
+
+
+def _per_call_us(fn, rows: list[EventRow]) -> float:
+    fn(rows)
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        fn(rows)
+    return (time.perf_counter() - started) / ROUNDS * 1e6
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    print(f"{'cards':>6} {'baseline us':>12} {'fast us':>10} {'speedup':>8}")
+    for size in sizes:
+        rows = _rows(size)
+        assert json.loads(baseline(rows)) == json.loads(fast(rows))
+        slow_us = _per_call_us(baseline, rows)
+        fast_us = _per_call_us(fast, rows)
+        print(f"{size:>6} {slow_us:>12.0f} {fast_us:>10.0f} {slow_us / fast_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.repositories.events import InMemoryEventsRepository
+from app.routers import events
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def events_repo() -> InMemoryEventsRepository:
+    return InMemoryEventsRepository()
+
+
+@pytest.fixture
+async def events_api(events_repo):
+    app = FastAPI()
+    app.include_router(events.router)
+    app.state.events_repo = events_repo
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
@@ -0,0 +1,76 @@
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import quote
+
+import pytest
+
+from app import auth
+from app.auth import InitDataError, InitDataVerifier, build_check_string
+
+BOT_TOKEN = "123456:test-token"
+
+
+def init_data(auth_date: float | None = None, user_id: int = 42, **fields: str) -> str:
+    fields = {
+        "auth_date": str(int(auth_date if auth_date is not None else time.time())),
+        "query_id": "AAH-test",
+        "user": json.dumps({"id": user_id, "first_name": "Anna"}, separators=(",", ":")),
+        **fields,
+    }
+    secret_key = hmac.new(BOT_TOKEN.encode(), msg=b"WebAppData", digestmod=hashlib.sha256).digest()
+    fields["hash"] = hmac.new(secret_key, build_check_string(fields).encode(), hashlib.sha256).hexdigest()
+    return "&".join(f"{key}={quote(value)}" for key, value in fields.items())
+
+
+def test_signed_init_data_is_accepted():
+    parsed = InitDataVerifier(BOT_TOKEN).verify(init_data())
+
+    assert json.loads(parsed["user"])["id"] == 42
+
+
+def test_tampered_or_foreign_init_data_is_rejected():
+    verifier = InitDataVerifier(BOT_TOKEN)
+
+    with pytest.raises(InitDataError):
+        verifier.verify(init_data().replace("AAH-test", "AAH-evil"))
+    with pytest.raises(InitDataError):
+        InitDataVerifier("654321:other-token").verify(init_data())
+    with pytest.raises(InitDataError):
+        verifier.verify("auth_date=1&user=%7B%7D")
+
+
+def test_expired_init_data_is_rejected():
+    verifier = InitDataVerifier(BOT_TOKEN, max_age_seconds=3600)
+
+    verifier.verify(init_data(time.time() - 60))
+    with pytest.raises(InitDataError, match="expired"):
+        verifier.verify(init_data(time.time() - 7200))
+
+
+def test_repeat_requests_are_served_from_the_cache(monkeypatch):
+    verifier = InitDataVerifier(BOT_TOKEN, cache_size=1)
+    data, other = init_data(), init_data(user_id=7)
+    first = verifier.verify(data)
+
+    calls = []
+    verify = verifier._verify
+    monkeypatch.setattr(verifier, "_verify", lambda *args: calls.append(args) or verify(*args))
+
+    assert verifier.verify(data) is first
+    assert calls == []
+    verifier.verify(other)
+    verifier.verify(data)
+    assert len(calls) == 2
+
+
+def test_cached_entries_do_not_outlive_max_age(monkeypatch):
+    now = time.time()
+    verifier = InitDataVerifier(BOT_TOKEN, max_age_seconds=100, cache_ttl_seconds=300)
+    data = init_data(now - 90)
+    verifier.verify(data)
+
+    monkeypatch.setattr(auth.time, "time", lambda: now + 20)
+    with pytest.raises(InitDataError, match="expired"):
+        verifier.verify(data)
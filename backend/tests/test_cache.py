@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.repositories.cache import CachedEventsRepository
+from app.repositories.events import InMemoryEventsRepository
+from app.schemas import EventIngestRequest
+
+pytestmark = pytest.mark.anyio
+
+
+class CountingRepository(InMemoryEventsRepository):
+    def __init__(self) -> None:
+        super().__init__()
+        self.loads = 0
+
+    async def list_recent(self, *args, **kwargs):
+        self.loads += 1
+        return await super().list_recent(*args, **kwargs)
+
+
+def request(message_id: int, channel: str = "@afisha", **fields) -> EventIngestRequest:
+    return EventIngestRequest(channel=channel, message_id=message_id, text="Концерт в пятницу", **fields)
+
+
+def cached(inner, redis, **options) -> CachedEventsRepository:
+    options = {"version_ttl_seconds": 0.0, "media_invalidation_delay": 0.0, **options}
+    return CachedEventsRepository(inner, redis, **options)
+
+
+async def test_listing_is_loaded_once_until_a_write():
+    inner = CountingRepository()
+    repo = cached(inner, FakeRedis())
+    await repo.upsert(request(1))
+
+    assert len(await repo.list_recent()) == 1
+    assert len(await repo.list_recent()) == 1
+    assert inner.loads == 1
+
+    await repo.upsert(request(2))
+    assert len(await repo.list_recent()) == 2
+    assert inner.loads == 2
+
+
+async def test_other_workers_share_pages_and_see_writes():
+    inner, redis = CountingRepository(), FakeRedis()
+    writer, reader = cached(inner, redis), cached(inner, redis)
+    await writer.upsert(request(1))
+
+    await writer.list_recent()
+    assert len(await reader.list_recent()) == 1
+    assert inner.loads == 1
+
+    await writer.upsert(request(2))
+    assert len(await reader.list_recent()) == 2
+
+
+async def test_media_invalidations_are_batched():
+    inner, redis = CountingRepository(), FakeRedis()
+    repo = cached(inner, redis, media_invalidation_delay=0.05)
+    await repo.upsert_many([request(1, media_pending=True), request(2, media_pending=True)])
+    await repo.list_recent()
+    version = await repo.version()
+
+    await repo.set_media("@afisha", 1, ["/media/1.jpg"])
+    await repo.set_media("@afisha", 2, ["/media/2.jpg"])
+    assert await repo.version() == version
+
+    await asyncio.sleep(0.1)
+    assert int(await redis.get("events:ver:all")) == int(version.token.split(".")[0]) + 1
+    assert not any(card.media_pending for card in await repo.list_recent())
+
+
+async def test_redis_outage_falls_back_to_the_repository():
+    server = FakeServer()
+    inner = CountingRepository()
+    repo = cached(inner, FakeRedis(server=server), retry_after_seconds=60.0)
+    await repo.upsert(request(1))
+    await repo.list_recent()
+
+    server.connected = False
+    await repo.upsert(request(2))
+    assert len(await repo.list_recent()) == 2
+    assert (await repo.version()).token == (await inner.version()).token
+
+    # Redis is skipped for retry_after_seconds instead of timing out on every read.
+    server.connected = True
+    await repo.list_recent()
+    await repo.list_recent()
+    assert inner.loads == 4
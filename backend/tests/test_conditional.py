@@ -0,0 +1,66 @@
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+import pytest
+
+from app.schemas import EventIngestRequest
+
+pytestmark = pytest.mark.anyio
+
+
+def request(channel: str, message_id: int) -> EventIngestRequest:
+    return EventIngestRequest(channel=channel, message_id=message_id, text="Концерт в пятницу")
+
+
+async def test_matching_etag_gets_a_304_until_the_listing_changes(events_api, events_repo):
+    await events_repo.upsert(request("@afisha", 1))
+    first = await events_api.get("/events")
+    etag = first.headers["ETag"]
+
+    cached = await events_api.get("/events", headers={"If-None-Match": f'W/"other", {etag}'})
+    assert (cached.status_code, cached.content, cached.headers["ETag"]) == (304, b"", etag)
+
+    await events_repo.upsert(request("@afisha", 2))
+    changed = await events_api.get("/events", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(changed.json()) == 2
+
+
+async def test_channel_listings_are_versioned_per_channel(events_api, events_repo):
+    await events_repo.upsert(request("@afisha", 1))
+    etag = (await events_api.get("/events/channel/@afisha")).headers["ETag"]
+
+    await events_repo.upsert(request("@rupor", 1))
+
+    cached = await events_api.get("/events/channel/@afisha", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert (await events_api.get("/events", headers={"If-None-Match": etag})).status_code == 200
+
+
+async def test_if_modified_since_needs_a_strictly_later_date(events_api, events_repo):
+    await events_repo.upsert(request("@afisha", 1))
+    last_modified = (await events_api.get("/events")).headers["Last-Modified"]
+    later = format_datetime(parsedate_to_datetime(last_modified) + timedelta(seconds=1), usegmt=True)
+
+    # A write later in the same second carries the same HTTP date, so that date is not proof.
+    same_second = await events_api.get("/events", headers={"If-Modified-Since": last_modified})
+    assert same_second.status_code == 200
+    assert (await events_api.get("/events", headers={"If-Modified-Since": later})).status_code == 304
+
+
+async def test_if_none_match_wins_over_if_modified_since(events_api, events_repo):
+    await events_repo.upsert(request("@afisha", 1))
+    last_modified = (await events_api.get("/events")).headers["Last-Modified"]
+    later = format_datetime(parsedate_to_datetime(last_modified) + timedelta(seconds=1), usegmt=True)
+
+    response = await events_api.get("/events", headers={"If-None-Match": '"stale"', "If-Modified-Since": later})
+
+    assert response.status_code == 200
+
+
+async def test_empty_store_has_no_validators(events_api):
+    response = await events_api.get("/events", headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
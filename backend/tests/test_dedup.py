@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from app.dedup import NearDuplicateIndex, RedisNearDuplicateIndex, signature
+from app.repositories.dedup import DedupingEventsRepository
+from app.repositories.events import InMemoryEventsRepository
+from app.schemas import EventIngestRequest, EventSource
+
+pytestmark = pytest.mark.anyio
+
+POST = (
+    "Концерт группы «Сплин» 15 марта в 20:00, клуб «Известия Hall», ул. Новый Арбат, 21. "
+    "Билеты от 2500 рублей на сайте группы, вход с 19:00, возрастное ограничение 16+."
+)
+OTHER = (
+    "Выставка «Русский авангард» открывается в Музее современного искусства с 5 апреля, "
+    "ежедневно с 11:00 до 21:00, вход свободный по предварительной регистрации на сайте."
+)
+
+
+def request(channel: str, message_id: int, text: str, **fields) -> EventIngestRequest:
+    return EventIngestRequest(channel=channel, message_id=message_id, text=text, **fields)
+
+
+def deduping(index=None) -> tuple[DedupingEventsRepository, InMemoryEventsRepository]:
+    inner = InMemoryEventsRepository()
+    return DedupingEventsRepository(inner, index or NearDuplicateIndex()), inner
+
+
+async def test_cross_channel_repost_is_folded_into_the_original():
+    repo, inner = deduping()
+    original = await repo.upsert(request("@afisha", 1, POST))
+    repost = await repo.upsert(request("@rupor", 7, "Репост:\n" + POST + "\n#афиша"))
+
+    assert repost.id == original.id
+    assert repost.alternate_sources == [EventSource(channel="@rupor", message_id=7)]
+    assert len(await inner.list_recent()) == 1
+
+
+async def test_same_channel_repeats_stay_separate():
+    repo, _ = deduping()
+    first = await repo.upsert(request("@afisha", 1, POST))
+    second = await repo.upsert(request("@afisha", 2, POST + " Повтор."))
+
+    assert second.id != first.id
+
+
+async def test_reposts_in_the_same_batch_are_folded():
+    repo, _ = deduping()
+    cards = await repo.upsert_many(
+        [request("@x", 1, POST), request("@y", 2, POST + " #концерт"), request("@z", 3, OTHER)]
+    )
+
+    assert cards[0].id == cards[1].id
+    assert cards[0].alternate_sources == [EventSource(channel="@y", message_id=2)]
+    assert cards[2].id != cards[0].id
+
+
+async def test_short_posts_are_never_folded():
+    repo, _ = deduping()
+    first = await repo.upsert(request("@a", 1, "Концерт сегодня"))
+    second = await repo.upsert(request("@b", 1, "Концерт сегодня"))
+
+    assert second.id != first.id
+
+
+async def test_edit_of_a_stored_post_updates_it_instead_of_folding():
+    repo, _ = deduping()
+    original = await repo.upsert(request("@afisha", 1, POST))
+    other = await repo.upsert(request("@rupor", 7, OTHER))
+
+    edited_at = datetime.utcnow()
+    edited = await repo.upsert(request("@rupor", 7, "Перенос! " + POST, edited_at=edited_at))
+
+    assert edited.id == other.id
+    assert edited.description == "Перенос! " + POST
+    assert edited.edited_at == edited_at
+    assert original.alternate_sources == []
+
+
+async def test_client_supplied_signature_is_ignored():
+    payload = {"channel": "@a", "message_id": 1, "text": POST, "dedup_signature": "AAAA"}
+
+    assert EventIngestRequest.model_validate(payload).dedup_signature is None
+
+
+async def test_redis_index_is_shared_between_workers():
+    redis = FakeRedis()
+    inner = InMemoryEventsRepository()
+    first_worker = DedupingEventsRepository(inner, RedisNearDuplicateIndex(redis))
+    second_worker = DedupingEventsRepository(inner, RedisNearDuplicateIndex(redis))
+
+    original = await first_worker.upsert(request("@afisha", 1, POST))
+    repost = await second_worker.upsert(request("@rupor", 7, POST + " #репост"))
+
+    assert repost.id == original.id
+
+
+async def test_redis_index_ignores_posts_outside_the_window():
+    index = RedisNearDuplicateIndex(FakeRedis(), window=timedelta(days=1))
+    sig = signature(POST)
+    old = datetime.utcnow() - timedelta(days=3)
+
+    assert await index.add_many([("old", "@a", sig, old)]) == 0
+    assert await index.match_many([(sig, "@b", datetime.utcnow())]) == [None]
+
+
+async def test_redis_index_only_lets_one_process_warm_it():
+    redis = FakeRedis()
+
+    assert await RedisNearDuplicateIndex(redis).claim_warm()
+    assert not await RedisNearDuplicateIndex(redis).claim_warm()
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.repositories.events import InMemoryEventsRepository
+from app.repositories.postgres import PostgresEventsRepository
+from app.schemas import EventIngestRequest
+
+pytestmark = pytest.mark.anyio
+
+
+def request(message_id: int = 1, **fields) -> EventIngestRequest:
+    return EventIngestRequest(**{"channel": "@afisha", "message_id": message_id, "text": "Концерт в пятницу", **fields})
+
+
+async def test_repolling_unchanged_rows_does_not_write():
+    repo = InMemoryEventsRepository()
+    first = await repo.upsert_many([request(1), request(2, media_pending=True)])
+    version = await repo.version()
+
+    again = await repo.upsert_many([request(1), request(2, media_pending=True)])
+
+    assert [card.id for card in again] == [card.id for card in first]
+    assert await repo.version() == version
+
+
+async def test_media_and_newer_edits_are_written():
+    repo = InMemoryEventsRepository()
+    edited_at = datetime(2026, 3, 1, 12, 0)
+    await repo.upsert(request(media_pending=True))
+
+    version = await repo.version()
+    card = await repo.upsert(request(media_urls=["/media/1.jpg"]))
+    assert (card.media_urls, card.media_pending) == (["/media/1.jpg"], False)
+    assert await repo.version() != version
+
+    card = await repo.upsert(request(text="Концерт перенесён", edited_at=edited_at))
+    assert (card.description, card.edited_at) == ("Концерт перенесён", edited_at)
+
+    version = await repo.version()
+    card = await repo.upsert(request(text="Старая правка", edited_at=edited_at - timedelta(minutes=5)))
+    assert card.description == "Концерт перенесён"
+    assert await repo.version() == version
+
+
+def test_batch_keeps_one_row_per_message_with_the_latest_edit():
+    edited_at = datetime(2026, 3, 1, 12, 0)
+    rows = PostgresEventsRepository._dedupe_rows(
+        [
+            request(1, media_urls=["/media/1.jpg"]),
+            request(1, text="Концерт перенесён", edited_at=edited_at),
+            request(1, text="Старая правка", edited_at=edited_at - timedelta(minutes=5)),
+            request(2),
+        ]
+    )
+
+    assert list(rows) == [("@afisha", 1), ("@afisha", 2)]
+    row = rows[("@afisha", 1)]
+    assert (row["description"], row["edited_at"]) == ("Концерт перенесён", edited_at)
+    assert (row["media_urls"], row["media_pending"]) == (["/media/1.jpg"], False)
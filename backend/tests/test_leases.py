@@ -0,0 +1,48 @@
+from collections import Counter
+
+import pytest
+
+from app.ingest.leases import assign
+
+CHANNELS = [f"@channel{i}" for i in range(200)]
+
+
+def test_no_workers_assigns_nothing():
+    assert assign(CHANNELS, []) == {}
+
+
+@pytest.mark.parametrize("workers", [1, 3, 7, 200, 300])
+def test_every_channel_has_one_owner_and_loads_differ_by_at_most_one(workers):
+    names = [f"worker-{i}" for i in range(workers)]
+    assignment = assign(CHANNELS, names)
+
+    assert set(assignment) == set(CHANNELS)
+    assert set(assignment.values()) <= set(names)
+    loads = Counter(assignment.values())
+    busiest = max(loads.values())
+    assert busiest - min(loads.get(name, 0) for name in names) <= 1
+    assert busiest == -(-len(CHANNELS) // workers)
+
+
+def test_assignment_is_deterministic_regardless_of_worker_order():
+    workers = ["b", "c", "a"]
+    assert assign(CHANNELS, workers) == assign(CHANNELS, sorted(workers))
+
+
+def test_worker_joining_moves_little_more_than_its_share():
+    before = assign(CHANNELS, ["a", "b", "c", "d"])
+    after = assign(CHANNELS, ["a", "b", "c", "d", "e"])
+
+    moved = [channel for channel in CHANNELS if before[channel] != after[channel]]
+    assert sum(after[channel] == "e" for channel in moved) == len(CHANNELS) // 5
+    assert len(moved) <= 2 * len(CHANNELS) // 5
+
+
+def test_worker_leaving_only_moves_its_own_channels_and_a_few_more():
+    before = assign(CHANNELS, ["a", "b", "c", "d", "e"])
+    after = assign(CHANNELS, ["a", "b", "c", "d"])
+
+    moved = [channel for channel in CHANNELS if before[channel] != after[channel]]
+    orphaned = [channel for channel in CHANNELS if before[channel] == "e"]
+    assert set(orphaned) <= set(moved)
+    assert len(moved) <= 2 * len(orphaned)
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.pagination import decode_cursor, encode_cursor, next_cursor
+from app.routers.events import NEXT_CURSOR_HEADER
+from app.schemas import EventCard, EventIngestRequest
+
+pytestmark = pytest.mark.anyio
+
+
+def card(event_id: str, created_at: datetime) -> EventCard:
+    return EventCard(id=event_id, title="Концерт", channel="@afisha", message_id=1, created_at=created_at)
+
+
+async def fill(repo, count: int, channel: str = "@afisha") -> list[str]:
+    requests = [EventIngestRequest(channel=channel, message_id=i, text=f"Событие {i}") for i in range(count)]
+    return [card.id for card in await repo.upsert_many(requests)]
+
+
+def test_cursor_round_trips_the_keyset_position():
+    created_at = datetime(2026, 3, 1, 12, 0, 0, 123456)
+
+    assert decode_cursor(encode_cursor(card("abc", created_at))) == (created_at, "abc")
+    with pytest.raises(ValueError):
+        decode_cursor("not a cursor")
+
+
+def test_next_cursor_only_when_the_page_is_full():
+    now = datetime(2026, 3, 1)
+    cards = [card("b", now), card("a", now - timedelta(seconds=1))]
+
+    assert next_cursor(cards, limit=3) is None
+    assert decode_cursor(next_cursor(cards, limit=2)) == (now - timedelta(seconds=1), "a")
+
+
+async def test_pages_walk_every_card_once_newest_first(events_repo):
+    ids = await fill(events_repo, 7)
+    await fill(events_repo, 2, channel="@rupor")
+
+    pages, before = [], None
+    while True:
+        page = await events_repo.list_by_channel("@afisha", limit=3, before=before)
+        pages.append([card.id for card in page])
+        if len(page) < 3:
+            break
+        before = decode_cursor(encode_cursor(page[-1]))
+
+    assert pages == [ids[6:3:-1], ids[3:0:-1], ids[:1]]
+
+
+async def test_api_pages_follow_the_next_cursor_header(events_api, events_repo):
+    ids = await fill(events_repo, 5)
+
+    first = await events_api.get("/events", params={"limit": 3})
+    second = await events_api.get("/events", params={"limit": 3, "cursor": first.headers[NEXT_CURSOR_HEADER]})
+
+    assert [item["id"] for item in first.json()] == ids[:1:-1]
+    assert [item["id"] for item in second.json()] == ids[1::-1]
+    assert NEXT_CURSOR_HEADER not in second.headers
+    assert (await events_api.get("/events", params={"cursor": "!!"})).status_code == 400
@@ -0,0 +1,127 @@
+import pytest
+
+from app.ingest.scheduler import AdaptivePollScheduler
+
+
+def test_new_channels_are_due_immediately_at_the_minimum_page():
+    scheduler = AdaptivePollScheduler(min_page=5)
+    scheduler.sync(["@a", "@b"], now=100.0)
+
+    assert sorted(scheduler.take(100.0)) == ["@a", "@b"]
+    assert scheduler.page_size("@a") == 5
+    assert scheduler.take(100.0) == []
+
+
+def test_sync_drops_removed_channels():
+    scheduler = AdaptivePollScheduler()
+    scheduler.sync(["@a", "@b"], now=0.0)
+    scheduler.sync(["@b"], now=0.0)
+
+    assert "@a" not in scheduler
+    assert scheduler.take(0.0) == ["@b"]
+    # A stale heap entry must not resurrect the channel.
+    scheduler.record_success("@a", fetched=1, now=0.0)
+    assert "@a" not in scheduler
+
+
+def test_take_returns_most_overdue_first():
+    scheduler = AdaptivePollScheduler(min_interval=10.0, max_interval=10.0)
+    scheduler.sync(["@a", "@b", "@c"], now=0.0)
+    scheduler.take(0.0)
+    scheduler.record_success("@b", fetched=0, now=0.0)
+    scheduler.record_success("@c", fetched=0, now=1.0)
+    scheduler.record_success("@a", fetched=0, now=2.0)
+
+    assert scheduler.take(5.0) == []
+    assert scheduler.take(20.0) == ["@b", "@c", "@a"]
+
+
+def test_saturated_page_is_polled_again_at_once_with_a_bigger_page():
+    scheduler = AdaptivePollScheduler(min_page=5, max_page=12)
+    scheduler.sync(["@a"], now=0.0)
+    scheduler.take(0.0)
+
+    scheduler.record_success("@a", fetched=5, now=1.0)
+    assert scheduler.page_size("@a") == 10
+    assert scheduler.take(1.0) == ["@a"]
+
+    scheduler.record_success("@a", fetched=10, now=2.0)
+    assert scheduler.page_size("@a") == 12
+
+
+def test_interval_follows_the_square_root_rule_within_bounds():
+    scheduler = AdaptivePollScheduler(min_interval=1.0, max_interval=100.0, poll_cost=32.0, smoothing=1.0)
+    scheduler.sync(["@a"], now=0.0)
+    scheduler.take(0.0)
+    scheduler.record_success("@a", fetched=0, now=0.0)
+    scheduler.take(1.0)
+
+    # 4 messages over 32 seconds: 0.125/s, so every sqrt(32 / 0.125) = 16 seconds,
+    # asking for three times the 2 messages expected by then.
+    scheduler.record_success("@a", fetched=4, now=32.0)
+    assert scheduler.next_due() == pytest.approx(48.0)
+    assert scheduler.page_size("@a") == 6
+
+
+def test_quiet_channels_settle_at_the_maximum_interval():
+    scheduler = AdaptivePollScheduler(min_interval=1.0, max_interval=60.0, smoothing=1.0)
+    scheduler.sync(["@a"], now=0.0)
+    scheduler.take(0.0)
+    scheduler.record_success("@a", fetched=0, now=0.0)
+    scheduler.take(1.0)
+    scheduler.record_success("@a", fetched=0, now=10.0)
+
+    assert scheduler.next_due() == pytest.approx(70.0)
+
+
+def test_failures_back_off_exponentially_and_honour_retry_after():
+    scheduler = AdaptivePollScheduler(min_interval=5.0, max_interval=60.0)
+    scheduler.sync(["@a"], now=0.0)
+    scheduler.take(0.0)
+
+    scheduler.record_failure("@a", now=0.0)
+    assert scheduler.next_due() == pytest.approx(10.0)
+    scheduler.record_failure("@a", now=10.0)
+    assert scheduler.next_due() == pytest.approx(30.0)
+    scheduler.record_failure("@a", now=30.0)
+    assert scheduler.next_due() == pytest.approx(70.0)
+    scheduler.record_failure("@a", now=70.0)
+    assert scheduler.next_due() == pytest.approx(130.0)  # capped at max_interval
+    scheduler.record_failure("@a", now=130.0, retry_after=500.0)
+    assert scheduler.next_due() == pytest.approx(630.0)
+
+
+def test_success_resets_the_backoff():
+    scheduler = AdaptivePollScheduler(min_interval=5.0, max_interval=60.0)
+    scheduler.sync(["@a"], now=0.0)
+    scheduler.take(0.0)
+    scheduler.record_failure("@a", now=0.0)
+    scheduler.record_failure("@a", now=10.0)
+    scheduler.record_success("@a", fetched=1, now=30.0)
+    scheduler.take(100.0)
+
+    scheduler.record_failure("@a", now=100.0)
+    assert scheduler.next_due() == pytest.approx(110.0)
+
+
+def test_request_rate_is_capped():
+    scheduler = AdaptivePollScheduler(requests_per_second=2.0)
+    scheduler.sync([f"@{i}" for i in range(10)], now=0.0)
+
+    assert len(scheduler.take(0.0)) == 2
+    assert scheduler.take(0.0) == []
+    assert scheduler.wait_time(0.0, idle=30.0) == pytest.approx(0.5)
+    assert len(scheduler.take(0.5)) == 1
+    # Idle time does not bank more than one second's worth of requests.
+    assert len(scheduler.take(100.0)) == 2
+
+
+def test_wait_time_is_capped_at_idle():
+    scheduler = AdaptivePollScheduler()
+    assert scheduler.wait_time(0.0, idle=7.0) == 7.0
+
+    scheduler.sync(["@a"], now=0.0)
+    assert scheduler.wait_time(0.0, idle=7.0) == 0.0
+    scheduler.take(0.0)
+    scheduler.record_failure("@a", now=0.0, retry_after=1000.0)
+    assert scheduler.wait_time(0.0, idle=7.0) == 7.0
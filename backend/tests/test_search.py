@@ -0,0 +1,41 @@
+from datetime import datetime
+
+import pytest
+
+from app.pagination import decode_search_cursor, encode_search_cursor
+from app.repositories.events import InMemoryEventsRepository
+from app.schemas import EventIngestRequest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cap_keeps_the_newest_matches_even_after_edits():
+    repo = InMemoryEventsRepository(search_max_candidates=2)
+    for message_id in range(1, 4):
+        await repo.upsert(EventIngestRequest(channel="@a", message_id=message_id, text=f"джаз вечер {message_id}"))
+    # Re-indexing the oldest card must not make it look like the newest match.
+    await repo.upsert(
+        EventIngestRequest(channel="@a", message_id=1, text="джаз вечер 1 перенос", edited_at=datetime.utcnow())
+    )
+
+    hits = await repo.search("джаз")
+
+    assert sorted(card.message_id for card, _ in hits) == [2, 3]
+
+
+async def test_pages_cover_every_candidate_once():
+    repo = InMemoryEventsRepository()
+    for message_id in range(1, 8):
+        await repo.upsert(EventIngestRequest(channel="@a", message_id=message_id, text="лекция " * message_id))
+
+    seen = []
+    before = None
+    while True:
+        page = await repo.search("лекция", limit=3, before=before)
+        seen.extend(card.message_id for card, _ in page)
+        if len(page) < 3:
+            break
+        card, rank = page[-1]
+        before = decode_search_cursor(encode_search_cursor(rank, card))
+
+    assert sorted(seen) == list(range(1, 8))
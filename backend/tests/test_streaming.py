@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from fakeredis.aioredis import FakeRedis
+
+from app.repositories.events import InMemoryEventsRepository
+from app.repositories.publishing import PublishingEventsRepository
+from app.schemas import EventIngestRequest
+from app.streaming import HEARTBEAT_FRAME, EventBroadcaster
+
+pytestmark = pytest.mark.anyio
+
+
+def request(channel: str, message_id: int, text: str = "Концерт", **fields) -> EventIngestRequest:
+    return EventIngestRequest(channel=channel, message_id=message_id, text=text, **fields)
+
+
+async def drain(subscription, after=None, skip=None) -> list[bytes]:
+    frames = []
+    async for frame in subscription.frames(0.05, after, skip):
+        if frame == HEARTBEAT_FRAME:
+            break
+        frames.append(frame)
+    return frames
+
+
+def kinds(frames: list[bytes]) -> list[str]:
+    lines = [line for frame in frames for line in frame.split(b"\n")]
+    return [line.split(b": ", 1)[1].decode() for line in lines if line.startswith(b"event:")]
+
+
+async def test_new_cards_reach_subscribers_once():
+    broadcaster = EventBroadcaster(None)
+    repo = PublishingEventsRepository(InMemoryEventsRepository(), broadcaster)
+    subscription = broadcaster.subscribe()
+
+    await repo.upsert_many([request("@a", 1), request("@a", 1)])
+    await repo.upsert(request("@a", 1))  # a re-poll is not news
+
+    frames = await drain(subscription)
+    assert kinds(frames) == ["event"]
+    assert frames[0].startswith(b"id: ")
+
+
+async def test_channel_subscribers_only_get_their_channel():
+    broadcaster = EventBroadcaster(None)
+    repo = PublishingEventsRepository(InMemoryEventsRepository(), broadcaster)
+    subscription = broadcaster.subscribe("@b")
+
+    await repo.upsert_many([request("@a", 1), request("@b", 1)])
+
+    frames = await drain(subscription)
+    assert len(frames) == 1 and b'"channel":"@b"' in frames[0]
+
+
+async def test_edits_and_media_are_streamed_as_edited_events_without_an_id():
+    broadcaster = EventBroadcaster(None)
+    repo = PublishingEventsRepository(InMemoryEventsRepository(), broadcaster)
+    card = await repo.upsert(request("@a", 1, media_pending=True))
+    subscription = broadcaster.subscribe()
+
+    edited_at = datetime.utcnow()
+    await repo.upsert(request("@a", 1, text="Концерт перенесён", edited_at=edited_at))
+    await repo.set_media("@a", 1, ["/media/a_1.jpg"])
+
+    # Resuming after the card itself must not hide changes to it.
+    frames = await drain(subscription, after=(card.created_at, card.id), skip={card.id})
+    assert kinds(frames) == ["edited", "edited"]
+    assert not any(frame.startswith(b"id:") for frame in frames)
+    assert b"/media/a_1.jpg" in frames[1]
+
+
+async def test_resume_filter_drops_cards_already_sent():
+    broadcaster = EventBroadcaster(None)
+    repo = PublishingEventsRepository(InMemoryEventsRepository(), broadcaster)
+    subscription = broadcaster.subscribe()
+    first = await repo.upsert(request("@a", 1))
+    second = await repo.upsert(request("@a", 2))
+    third = await repo.upsert(request("@a", 3))
+
+    frames = await drain(subscription, after=(first.created_at, first.id), skip={third.id})
+    assert len(frames) == 1 and second.id.encode() in frames[0]
+
+
+async def test_slow_subscriber_is_disconnected():
+    broadcaster = EventBroadcaster(None, queue_size=2)
+    repo = PublishingEventsRepository(InMemoryEventsRepository(), broadcaster)
+    subscription = broadcaster.subscribe()
+
+    await repo.upsert_many([request("@a", message_id) for message_id in range(3)])
+
+    assert subscription.overflowed
+    assert await drain(subscription) == []
+    assert broadcaster.subscriber_count == 0
+
+
+async def test_cards_fan_out_through_redis_to_other_processes():
+    redis = FakeRedis()
+    publisher = EventBroadcaster(redis)
+    listener = EventBroadcaster(redis)
+    listener.start()
+    try:
+        subscription = listener.subscribe()
+        await asyncio.sleep(0.1)  # let the listener subscribe
+        repo = PublishingEventsRepository(InMemoryEventsRepository(), publisher)
+        await repo.upsert(request("@a", 1, media_pending=True))
+        await repo.set_media("@a", 1, ["/media/a_1.jpg"])
+        await asyncio.sleep(0.1)
+
+        assert kinds(await drain(subscription)) == ["event", "edited"]
+    finally:
+        await listener.stop()
@@ -0,0 +1,52 @@
+import pytest
+
+from app.repositories.users import InMemoryUsersRepository
+from app.schemas import TelegramAuthUser, UserProfileUpdate
+
+pytestmark = pytest.mark.anyio
+
+
+def auth_user(**fields) -> TelegramAuthUser:
+    return TelegramAuthUser(**{"id": 42, "username": "anna", "first_name": "Anna", **fields})
+
+
+async def test_profile_update_creates_the_user_with_its_profile():
+    repo = InMemoryUsersRepository()
+
+    profile = await repo.upsert_with_profile(auth_user(), UserProfileUpdate(city="Москва", interests=["джаз"]))
+
+    assert (profile.username, profile.city, profile.interests) == ("anna", "Москва", ["джаз"])
+    assert await repo.get(42) == profile
+
+
+async def test_profile_update_only_replaces_the_fields_sent():
+    repo = InMemoryUsersRepository()
+    created = await repo.upsert_with_profile(auth_user(), UserProfileUpdate(city="Москва", interests=["джаз"]))
+
+    updated = await repo.upsert_with_profile(auth_user(username="anna_k"), UserProfileUpdate(interests=["театр"]))
+
+    assert updated.city == "Москва"
+    assert updated.interests == ["театр"]
+    assert updated.username == "anna_k"
+    assert updated.created_at == created.created_at
+
+
+async def test_unchanged_login_skips_the_write():
+    repo = InMemoryUsersRepository()
+    first = await repo.upsert_from_auth(auth_user())
+
+    again = await repo.upsert_from_auth(auth_user())
+
+    assert again is first
+    assert again.updated_at == first.updated_at
+
+
+async def test_changed_login_updates_auth_fields_and_keeps_the_profile():
+    repo = InMemoryUsersRepository()
+    await repo.upsert_with_profile(auth_user(), UserProfileUpdate(city="Москва", interests=["джаз"]))
+
+    profile = await repo.upsert_from_auth(auth_user(username="anna_k", photo_url="https://t.me/i/anna.jpg"))
+
+    assert (profile.username, profile.photo_url) == ("anna_k", "https://t.me/i/anna.jpg")
+    assert (profile.city, profile.interests) == ("Москва", ["джаз"])
+    assert await repo.get(42) == profile
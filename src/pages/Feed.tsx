@@ -9,9 +9,16 @@ type EventCard = {
   message_id: number
   event_time?: string | null
   media_urls?: string[]
+  media_variants?: Record<string, MediaVariant[]>
   created_at: string
 }
 
+type MediaVariant = {
+  url: string
+  width: number
+  height: number
+}
+
 type TelegramCreds = {
   login_mode: string
   channel_ids: string[]
@@ -164,6 +171,12 @@ function resolveMediaUrl(media: string | undefined, apiBase: string): string | n
   }
 }
 
+function mediaSrcSet(card: EventCard, media: string | undefined, apiBase: string): string | undefined {
+  const variants = media ? card.media_variants?.[media] : undefined
+  if (!variants?.length) return undefined
+  return variants.map((v) => `${resolveMediaUrl(v.url, apiBase)} ${v.width}w`).join(", ")
+}
+
 export default function Feed() {
   const [items, setItems] = React.useState<EventCard[]>([])
   const [loading, setLoading] = React.useState(true)
@@ -438,6 +451,7 @@ export default function Feed() {
                 const media = card.media_urls?.find((u) => isLikelyImageUrl(u)) ?? card.media_urls?.[0]
                 const rawSrc = resolveMediaUrl(media, apiUrl)
                 const imgSrc = rawSrc && isLikelyImageUrl(rawSrc) ? rawSrc : null
+                const imgSrcSet = mediaSrcSet(card, media, apiUrl)
                 const color = palette[(idxInCol + (col === 1 ? 3 : 0)) % palette.length]
                 const titleLine = firstLine(card.title) || firstLine(card.description) || "Событие"
                 const aiRating = aiRatingForId(card.id)
@@ -478,6 +492,8 @@ export default function Feed() {
                     {imgSrc && !failedImages[card.id] ? (
                       <Image
                         src={imgSrc}
+                        srcSet={imgSrcSet}
+                        sizes="50vw"
                         alt={titleLine}
                         width="100%"
                         height="auto"